@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import secrets
+
+from app.core.config import settings
+from app.core.profiler import profiler
+from app.services.container import services
+from app.models.schemas import ProfileRequest
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints exist only when ADMIN_TOKEN is set and the X-Admin-Token header matches."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.post("/profile")
+async def start_profile(request: ProfileRequest):
+    """Sample the whole process for the next N requests and/or a time window."""
+    if settings.SERVER_WORKERS > 1:
+        # Each worker would profile only itself, and later calls reach whichever worker accepts them
+        raise HTTPException(status_code=409, detail=f"Profiling needs a single server worker, "
+                                                    f"but {settings.SERVER_WORKERS} are running; restart with --workers 1")
+    try:
+        return profiler.start(requests=request.requests, seconds=request.seconds,
+                              interval=request.interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/profile")
+async def get_profile_status():
+    """Session progress and the hottest frames so far."""
+    return profiler.status()
+
+@router.post("/profile/stop")
+async def stop_profile():
+    return profiler.stop()
+
+@router.get("/profile/folded", response_class=PlainTextResponse)
+async def get_folded_profile():
+    """Folded stacks (``frame;frame;frame count``) for flamegraph.pl, speedscope or inferno."""
+    folded = profiler.folded()
+    if folded is None:
+        raise HTTPException(status_code=404, detail="No profile recorded")
+    return PlainTextResponse(folded)
+
+@router.get("/slow-queries")
+async def list_slow_queries(limit: int = Query(100, ge=1, le=1000), query_type: Optional[str] = None,
+                            min_duration_ms: Optional[float] = None):
+    """Most recent slow queries, newest first."""
+    return {
+        "threshold_ms": services.slow_query_log.threshold_ms,
+        "entries": services.slow_query_log.entries(limit=limit, query_type=query_type, min_duration_ms=min_duration_ms)
+    }
+
+@router.get("/slow-queries/shapes")
+async def list_slow_query_shapes(limit: int = Query(20, ge=1, le=200)):
+    """Slow queries grouped by normalized query, ranked by total time: candidates for caching or indexes."""
+    return {"threshold_ms": services.slow_query_log.threshold_ms, "shapes": services.slow_query_log.shapes(limit=limit)}
@@ -1,9 +1,10 @@
 from fastapi import APIRouter
-from app.api.v1 import evidence
+from app.api.v1 import admin, evidence
 
 api_router = APIRouter()
 
 api_router.include_router(evidence.router, prefix="/evidence", tags=["evidence"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"], include_in_schema=False)
 
 @api_router.get("/")
 async def api_root():
@@ -11,9 +12,14 @@ async def api_root():
         "message": "Evidence-on-Demand Bot API v1",
         "endpoints": {
             "query": "/evidence/query",
+            "query_status": "/evidence/query/{query_id}/status",
+            "query_cancel": "/evidence/query/{query_id}/cancel",
             "evidence": "/evidence/evidence/{query_id}",
             "export": "/evidence/export/{query_id}",
+            "export_stream": "/evidence/export/{query_id}/stream",
+            "export_download": "/evidence/export/{query_id}/download",
             "upload": "/evidence/documents/upload",
+            "ingestion_status": "/evidence/documents/ingestions/{ingestion_id}",
             "health": "/evidence/health"
         }
     }
@@ -1,25 +1,30 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse, FileResponse
 from typing import List, Optional
+from email.utils import formatdate, parsedate_to_datetime
+import asyncio
+import time
 import uuid
 import os
 from datetime import datetime
 
-from app.models.schemas import EvidenceQuery, QueryResponse, ExportRequest
-from app.services.ai_service import AIService
-from app.integrations.github_integration import GitHubIntegration
-from app.integrations.jira_integration import JiraIntegration
-from app.integrations.document_parser import DocumentParser
-from app.services.evidence_service import EvidenceService
+from app.models.schemas import EvidenceQuery, QueryResponse, QueryStatus, QueryMode, ExportRequest
+from app.core.config import settings
+from app.core.metrics import DOCUMENT_ROWS_SCANNED
+from app.core.query_stats import QueryStats, collect_query_stats, current_query_stats
+from app.core.tracing import tracer
+from app.services.container import services
+from app.services.job_service import JobCancelledError, NullProgress, checkpoint_current_job
+from app.services.document_store import FileTooLargeError
+from app.services.document_index import score_table_range
+from app.services.document_search import (
+    RELEVANCE_THRESHOLD, extract_meaningful_terms, extract_assignee_name, calculate_text_relevance
+)
 
 router = APIRouter()
 
-# Initialize services
-ai_service = AIService()
-github_integration = GitHubIntegration()
-jira_integration = JiraIntegration()
-document_parser = DocumentParser()
-evidence_service = EvidenceService()
+# Rows scored per compute pool task
+SCORE_PARTITION_ROWS = 50000
 
 @router.post("/query", response_model=QueryResponse)
 async def submit_query(query: EvidenceQuery):
@@ -28,56 +33,16 @@ async def submit_query(query: EvidenceQuery):
         # Generate unique query ID
         query_id = str(uuid.uuid4())
 
-        # Process the query with AI to understand intent
-        if query.query_type =="github":
-            ai_analysis = await ai_service.process_query_github(query.query)
-        else:
-            ai_analysis = await ai_service.process_query(query.query)
-        
-        # Route to appropriate integration based on query type
-        evidence_items = []
-        
-        # Use the explicit query_type if provided, otherwise use AI analysis
-        query_type = query.query_type or ai_analysis.get("query_type")
-        
-        if query_type == "github":
-            evidence_items = await _handle_github_query(ai_analysis, query.filters or {})
-            print(f"GitHub evidence items: {evidence_items}")  # Debug print
-        elif query_type == "jira":
-            evidence_items = await _handle_jira_query(ai_analysis, query.filters or {})
-        elif query_type == "document":
-            evidence_items = await _handle_document_query(ai_analysis, query.filters or {})
-        elif query_type == "mixed":
-            # Handle queries that require multiple sources
-            github_items = await _handle_github_query(ai_analysis, query.filters or {})
-            print(github_items)
-            jira_items = await _handle_jira_query(ai_analysis, query.filters or {})
-            document_items = await _handle_document_query(ai_analysis, query.filters or {})
-            evidence_items = github_items + jira_items + document_items
-
-        else:
-            # Default to searching all sources including documents
-            github_items = await _handle_github_query(ai_analysis, query.filters or {})
-            jira_items = await _handle_jira_query(ai_analysis, query.filters or {})
-            document_items = await _handle_document_query(ai_analysis, query.filters or {})
-            evidence_items = github_items + jira_items + document_items
+        if query.mode == QueryMode.ASYNC:
+            return await _submit_background_query(query_id, query, document_only=False)
         
-        # Format evidence with AI
-        if evidence_items:
-            formatted_summary = await ai_service.format_evidence(evidence_items, query.query)
-        else:
-            formatted_summary = "No evidence found matching your query."
-        
-        # Store results
-        result = await evidence_service.store_query_result(
-            query_id, query.query, evidence_items, formatted_summary
-        )
+        result = await _run_query_pipeline(query_id, query, NullProgress())
         
         return QueryResponse(
             query_id=query_id,
             status="completed",
-            message=formatted_summary,
-            evidence=evidence_items,
+            message=result["summary"],
+            evidence=result["evidence"],
             export_url=f"/api/v1/export/{query_id}",
             created_at=result["created_at"]
         )
@@ -85,11 +50,42 @@ async def submit_query(query: EvidenceQuery):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+@router.get("/query/{query_id}/status", response_model=QueryStatus)
+async def get_query_status(query_id: str):
+    """Report the progress of a query, including partial evidence counts for background jobs."""
+    status = await asyncio.to_thread(services.job_service.get_status, query_id)
+    if status:
+        return status
+    
+    # Inline queries are never tracked as jobs, but are complete once stored
+    result = await services.evidence_service.get_query_result(query_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Query not found")
+    
+    return {
+        "query_id": query_id,
+        "status": "completed",
+        "evidence_count": result.get("evidence_count", 0),
+        "created_at": result.get("created_at"),
+        "completed_at": result.get("created_at")
+    }
+
+@router.post("/query/{query_id}/cancel", response_model=QueryStatus)
+async def cancel_query(query_id: str):
+    """Cancel a queued or running background query."""
+    status = await asyncio.to_thread(services.job_service.cancel, query_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Background query not found")
+    if status["status"] in ("completed", "failed"):
+        raise HTTPException(status_code=409, detail=f"Query already {status['status']}")
+    
+    return status
+
 @router.get("/evidence/{query_id}")
 async def get_evidence(query_id: str):
     """Retrieve evidence results for a specific query."""
     try:
-        result = await evidence_service.get_query_result(query_id)
+        result = await services.evidence_service.get_query_result(query_id)
         if not result:
             raise HTTPException(status_code=404, detail="Query not found")
         
@@ -102,48 +98,115 @@ async def get_evidence(query_id: str):
 async def export_evidence(query_id: str, export_request: ExportRequest):
     """Export evidence to a file format."""
     try:
-        result = await evidence_service.get_query_result(query_id)
+        result = await services.evidence_service.get_query_result(query_id)
         if not result:
             raise HTTPException(status_code=404, detail="Query not found")
         
-        file_path = await evidence_service.export_evidence(
-            query_id, result["evidence"], export_request.format
+        file_path, cached = await services.evidence_service.export_evidence(
+            query_id,
+            result["evidence"],
+            export_request.format,
+            include_metadata=export_request.include_metadata,
+            split_by_source=export_request.split_by_source
         )
         
-        return {"download_url": file_path, "format": export_request.format}
+        download_url = (
+            f"/api/v1/evidence/export/{query_id}/download?format={export_request.format.lower()}"
+            f"&include_metadata={str(export_request.include_metadata).lower()}"
+            f"&split_by_source={str(export_request.split_by_source).lower()}"
+        )
+        return {
+            "download_url": download_url,
+            "file_path": file_path,
+            "format": export_request.format,
+            "cached": cached
+        }
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
-@router.post("/documents/query", response_model=QueryResponse)
-async def submit_document_query(query: EvidenceQuery):
-    """Submit a natural language query specifically for document search only."""
+@router.get("/export/{query_id}/download")
+async def download_export(
+    query_id: str,
+    request: Request,
+    format: str = Query("csv", description="Export format: json, csv, xlsx, xls, parquet or arrow"),
+    include_metadata: bool = Query(True),
+    split_by_source: bool = Query(False)
+):
+    """Serve a cached export artifact, generating it on first request."""
     try:
-        # Generate unique query ID
-        query_id = str(uuid.uuid4())
+        file_path = services.evidence_service.get_cached_export(query_id, format, include_metadata, split_by_source)
+        if not file_path:
+            result = await services.evidence_service.get_query_result(query_id)
+            if not result:
+                raise HTTPException(status_code=404, detail="Query not found")
+            file_path, _ = await services.evidence_service.export_evidence(
+                query_id,
+                result["evidence"],
+                format,
+                include_metadata=include_metadata,
+                split_by_source=split_by_source,
+                check_cache=False
+            )
         
-        # Process the query with AI to understand intent
-        ai_analysis = await ai_service.process_query(query.query)
+        return _file_download_response(request, file_path)
         
-        # Only search documents - no GitHub or JIRA
-        evidence_items = await _handle_document_query(ai_analysis, query.filters or {})
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Export download failed: {str(e)}")
+
+@router.get("/export/{query_id}/stream")
+async def stream_export(query_id: str, format: str = Query("csv", description="Export format: csv or ndjson")):
+    """Stream evidence as a chunked CSV or NDJSON download straight from the result store."""
+    try:
+        result = await services.evidence_service.get_query_result(query_id)
+        if not result:
+            raise HTTPException(status_code=404, detail="Query not found")
         
-        # Format evidence with AI
-        if evidence_items:
-            formatted_summary = await ai_service.format_evidence(evidence_items, query.query)
+        if format.lower() == "csv":
+            chunks = services.evidence_service.iter_csv(result)
+            media_type = "text/csv"
+        elif format.lower() == "ndjson":
+            chunks = services.evidence_service.iter_ndjson(result)
+            media_type = "application/x-ndjson"
         else:
-            formatted_summary = "No documents found matching your query."
+            raise HTTPException(status_code=400, detail="Unsupported format. Use 'csv' or 'ndjson'")
         
-        # Store results
-        result = await evidence_service.store_query_result(
-            query_id, query.query, evidence_items, formatted_summary
+        return StreamingResponse(
+            chunks,
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename=evidence_{query_id}.{format.lower()}"}
         )
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+
+@router.post("/documents/query", response_model=QueryResponse)
+async def submit_document_query(query: EvidenceQuery):
+    """Submit a natural language query specifically for document search only."""
+    try:
+        # Generate unique query ID
+        query_id = str(uuid.uuid4())
+
+        if query.mode == QueryMode.ASYNC:
+            return await _submit_background_query(query_id, query, document_only=True)
+        
+        result = await _run_query_pipeline(query_id, query, NullProgress(), document_only=True)
+        
         return QueryResponse(
             query_id=query_id,
             status="completed",
-            message=formatted_summary,
-            evidence=evidence_items,
+            message=result["summary"],
+            evidence=result["evidence"],
             export_url=f"/api/v1/export/{query_id}",
             created_at=result["created_at"]
         )
@@ -153,44 +216,75 @@ async def submit_document_query(query: EvidenceQuery):
 
 @router.post("/documents/upload")
 async def upload_document(file: UploadFile = File(...)):
-    """Upload and parse a document for evidence extraction."""
+    """Upload a document and queue it for parsing and indexing."""
     try:
         # Validate file
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
         file_extension = os.path.splitext(file.filename)[1].lower()
-        if file_extension not in ['.pdf', '.xlsx', '.xls', '.csv']:
+        if file_extension not in settings.ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail="Unsupported file format")
         
-        # Save uploaded file
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, file.filename)
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Stream the upload to disk in chunks, hashing as we go
+        document = await services.document_store.save_upload(file.filename, file.read)
+        
+        if document["duplicate"]:
+            ingestion = services.ingestion_service.get_document_status(document)
+            return {
+                "filename": file.filename,
+                "file_path": document["path"],
+                "sha256": document["sha256"],
+                "size": document["size"],
+                "duplicate": True,
+                "ingestion_id": ingestion["ingestion_id"] if ingestion else None,
+                "status": ingestion["status"] if ingestion else None,
+                "message": f"Document already uploaded as {document['filename']}; skipped parsing"
+            }
         
-        # Parse document
-        parsed_data = await document_parser.parse_document(file_path)
+        # Parsing and indexing happen in the background ingestion queue
+        ingestion = await services.ingestion_service.enqueue(document)
         
         return {
             "filename": file.filename,
-            "file_path": file_path,
-            "parsed_data": parsed_data,
-            "message": "Document uploaded and parsed successfully"
+            "file_path": document["path"],
+            "sha256": document["sha256"],
+            "size": document["size"],
+            "duplicate": False,
+            "ingestion_id": ingestion["ingestion_id"],
+            "status": ingestion["status"],
+            "status_url": f"/api/v1/evidence/documents/ingestions/{ingestion['ingestion_id']}",
+            "message": "Document uploaded and queued for indexing"
         }
         
+    except HTTPException:
+        raise
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Document upload failed: {str(e)}")
 
+@router.get("/documents/ingestions")
+async def list_ingestions():
+    """List ingestion status for uploaded documents."""
+    statuses = services.ingestion_service.list_statuses()
+    return {"ingestions": statuses, "total": len(statuses)}
+
+@router.get("/documents/ingestions/{ingestion_id}")
+async def get_ingestion_status(ingestion_id: str):
+    """Report whether an uploaded document is queued, parsing, indexed or failed."""
+    status = services.ingestion_service.get_status(ingestion_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Ingestion not found")
+    
+    return status
+
 @router.get("/reports")
 async def get_all_reports():
     """Get all stored query results for report generation."""
     try:
         # Get all stored results from evidence service
-        results = evidence_service._load_results()
+        results = await asyncio.to_thread(services.evidence_service._load_results)
         
         # Convert to report format
         reports = []
@@ -238,7 +332,7 @@ async def export_report(report_id: str, format: str = Query("txt", description="
         print(f"Export request: report_id={report_id}, format={format}")
         
         # Get the report data
-        result = await evidence_service.get_query_result(report_id)
+        result = await services.evidence_service.get_query_result(report_id)
         if not result:
             raise HTTPException(status_code=404, detail="Report not found")
         
@@ -283,6 +377,208 @@ async def health_check():
     return {"status": "healthy", "service": "evidence-api"}
 
 # Helper functions
+EXPORT_MEDIA_TYPES = {
+    ".json": "application/json",
+    ".csv": "text/csv",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".xls": "application/vnd.ms-excel",
+    ".parquet": "application/vnd.apache.parquet",
+    ".arrow": "application/vnd.apache.arrow.file"
+}
+
+def _file_download_response(request: Request, file_path: str) -> Response:
+    """Serve a file with conditional GET (ETag / Last-Modified) and single-range support."""
+    stat = os.stat(file_path)
+    file_size = stat.st_size
+    etag = f'"{int(stat.st_mtime_ns):x}-{file_size:x}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    filename = os.path.basename(file_path)
+    media_type = EXPORT_MEDIA_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+    
+    # Conditional GET
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            if int(stat.st_mtime) <= parsedate_to_datetime(request.headers["if-modified-since"]).timestamp():
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+    
+    # Range requests; If-Range falls back to the full body when the validator is stale
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+        byte_range = _parse_byte_range(range_header, file_size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{file_size}"})
+        if byte_range != "ignore":
+            start, end = byte_range
+            
+            def iter_range(chunk_size: int = 64 * 1024):
+                with open(file_path, "rb") as f:
+                    f.seek(start)
+                    remaining = end - start + 1
+                    while remaining > 0:
+                        chunk = f.read(min(chunk_size, remaining))
+                        if not chunk:
+                            break
+                        remaining -= len(chunk)
+                        yield chunk
+            
+            return StreamingResponse(
+                iter_range(),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{file_size}",
+                    "Content-Length": str(end - start + 1)
+                }
+            )
+    
+    return FileResponse(file_path, media_type=media_type, headers=headers)
+
+def _parse_byte_range(range_header: str, file_size: int):
+    """Parse a single 'bytes=' range. Returns (start, end), None if unsatisfiable, or 'ignore'."""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Unknown units and multipart ranges are served as a full response
+        return "ignore"
+    
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if not start_text:
+            # Suffix range: last N bytes
+            length = int(end_text)
+            if length <= 0:
+                return None
+            return max(0, file_size - length), file_size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else file_size - 1
+    except ValueError:
+        return "ignore"
+    
+    if start >= file_size or start > end:
+        return None
+    return start, min(end, file_size - 1)
+
+async def _submit_background_query(query_id: str, query: EvidenceQuery, document_only: bool) -> QueryResponse:
+    """Hand a query to the background worker pool and return immediately."""
+    async def pipeline(progress):
+        return await _run_query_pipeline(query_id, query, progress, document_only=document_only)
+    
+    job = await asyncio.to_thread(services.job_service.submit, query_id, query.query, pipeline)
+    
+    return QueryResponse(
+        query_id=query_id,
+        status=job["status"],
+        message="Query accepted for background processing",
+        export_url=f"/api/v1/export/{query_id}",
+        status_url=f"/api/v1/evidence/query/{query_id}/status",
+        created_at=job["created_at"]
+    )
+
+async def _run_query_pipeline(query_id: str, query: EvidenceQuery, progress, document_only: bool = False) -> dict:
+    """Run a query pipeline and record it in the slow-query log if it exceeded the threshold."""
+    started = time.perf_counter()
+    status, error = "completed", None
+    with collect_query_stats() as stats:
+        try:
+            return await _execute_query_pipeline(query_id, query, progress, stats, document_only)
+        except JobCancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status, error = "failed", str(e)
+            raise
+        finally:
+            try:
+                services.slow_query_log.record(
+                    query_id, query.query, (time.perf_counter() - started) * 1000, stats, status=status, error=error
+                )
+            except OSError as log_error:
+                print(f"Warning: could not write slow query log: {str(log_error)}")
+
+async def _execute_query_pipeline(query_id: str, query: EvidenceQuery, progress, stats: QueryStats,
+                                  document_only: bool = False) -> dict:
+    """Run analysis, source retrieval, summarization and storage for a query."""
+    filters = query.filters or {}
+    
+    # Process the query with AI to understand intent
+    progress.start_stage("analysis")
+    with stats.stage("analysis"):
+        if query.query_type == "github" and not document_only:
+            ai_analysis = await services.ai_service.process_query_github(query.query)
+        else:
+            ai_analysis = await services.ai_service.process_query(query.query)
+    progress.finish_stage("analysis")
+    
+    # Route to appropriate integration based on query type
+    if document_only:
+        # Only search documents - no GitHub or JIRA
+        sources = ["documents"]
+    else:
+        # Use the explicit query_type if provided, otherwise use AI analysis
+        query_type = query.query_type or ai_analysis.get("query_type")
+        if query_type == "github":
+            sources = ["github"]
+        elif query_type == "jira":
+            sources = ["jira"]
+        elif query_type == "document":
+            sources = ["documents"]
+        else:
+            # Mixed (or unknown) queries search all sources including documents
+            sources = ["github", "jira", "documents"]
+    
+    stats.query_type = "document" if document_only else getattr(query_type, "value", query_type) or "mixed"
+    if "github" in sources and ai_analysis.get("function"):
+        stats.github_function = ai_analysis["function"]
+        stats.github_parameters = ai_analysis.get("parameters", {})
+    
+    handlers = {
+        "github": _handle_github_query,
+        "jira": _handle_jira_query,
+        "documents": _handle_document_query
+    }
+    evidence_items = []
+    for source in sources:
+        progress.start_stage(source)
+        with stats.stage(source), tracer.start_span(handlers[source].__name__) as span:
+            source_items = await handlers[source](ai_analysis, filters)
+            span.set_attribute("evidence_count", len(source_items))
+        progress.finish_stage(source, evidence_count=len(source_items))
+        evidence_items.extend(source_items)
+    
+    # Format evidence with AI
+    progress.start_stage("summary")
+    with stats.stage("summary"):
+        if evidence_items:
+            formatted_summary = await services.ai_service.format_evidence(evidence_items, query.query)
+        elif document_only:
+            formatted_summary = "No documents found matching your query."
+        else:
+            formatted_summary = "No evidence found matching your query."
+    progress.finish_stage("summary")
+    
+    # Store results
+    progress.start_stage("store")
+    with stats.stage("store"):
+        result = await services.evidence_service.store_query_result(
+            query_id, query.query, evidence_items, formatted_summary
+        )
+    progress.finish_stage("store")
+    
+    return result
+
 async def _handle_github_query(ai_analysis: dict, filters: dict) -> List[dict]:
     """Handle GitHub-specific queries using AI-selected function."""
     evidence_items = []
@@ -295,7 +591,7 @@ async def _handle_github_query(ai_analysis: dict, filters: dict) -> List[dict]:
         # Route to the correct GitHubIntegration method
         if function == "get_merged_prs_last_n_days":
             n = parameters.get("n", 7)
-            merged_prs = github_integration.get_merged_prs_last_n_days(n)
+            merged_prs = services.github_integration.get_merged_prs_last_n_days(n)
             for pr in merged_prs:
                 evidence_items.append({
                     "source": "github",
@@ -308,7 +604,7 @@ async def _handle_github_query(ai_analysis: dict, filters: dict) -> List[dict]:
                 })
         elif function == "get_prs_waiting_for_review":
             hours = parameters.get("hours", 24)
-            waiting_prs = github_integration.get_prs_waiting_for_review(hours)
+            waiting_prs = services.github_integration.get_prs_waiting_for_review(hours)
             for pr in waiting_prs:
                 evidence_items.append({
                     "source": "github",
@@ -322,7 +618,7 @@ async def _handle_github_query(ai_analysis: dict, filters: dict) -> List[dict]:
         elif function == "get_pr_details":
             pr_number = parameters.get("pr_number")
             if pr_number is not None:
-                pr_data = github_integration.get_pr_details(pr_number)
+                pr_data = services.github_integration.get_pr_details(pr_number)
                 evidence_items.append({
                     "source": "github",
                     "source_type": "github",
@@ -333,7 +629,7 @@ async def _handle_github_query(ai_analysis: dict, filters: dict) -> List[dict]:
                     "timestamp": pr_data["created_at"]
                 })
         elif function == "get_prs":
-            prs = github_integration.get_prs(**parameters)
+            prs = services.github_integration.get_prs(**parameters)
             for pr in prs:
                 evidence_items.append({
                     "source": "github",
@@ -354,6 +650,8 @@ async def _handle_github_query(ai_analysis: dict, filters: dict) -> List[dict]:
                 "confidence_score": 0.0,
                 "timestamp": None
             })
+    except JobCancelledError:
+        raise
     except Exception as e:
         evidence_items.append({
             "source": "github",
@@ -375,7 +673,7 @@ async def _handle_jira_query(ai_analysis: dict, filters: dict) -> List[dict]:
         
         if "ticket_key" in parameters:
             # Specific ticket query
-            ticket_data = await jira_integration.get_ticket(parameters["ticket_key"])
+            ticket_data = await services.jira_integration.get_ticket(parameters["ticket_key"])
             evidence_items.append({
                 "source": "jira",
                 "source_type": "jira",
@@ -396,7 +694,7 @@ async def _handle_jira_query(ai_analysis: dict, filters: dict) -> List[dict]:
                 jql_parts.append(f"status = '{parameters['status']}'")
             
             jql_query = " AND ".join(jql_parts) if jql_parts else "project is not EMPTY"
-            tickets = await jira_integration.search_tickets(jql_query)
+            tickets = await services.jira_integration.search_tickets(jql_query)
             
             for ticket in tickets:
                 evidence_items.append({
@@ -409,6 +707,8 @@ async def _handle_jira_query(ai_analysis: dict, filters: dict) -> List[dict]:
                     "timestamp": ticket["created"]
                 })
     
+    except JobCancelledError:
+        raise
     except Exception as e:
         evidence_items.append({
             "source": "jira",
@@ -428,49 +728,69 @@ async def _handle_document_query(ai_analysis: dict, filters: dict) -> List[dict]
     
     try:
         query_text = ai_analysis.get("intent", "").lower()
-        uploads_dir = "uploads"
-        
-        # Search through uploaded files
-        if os.path.exists(uploads_dir):
-            for filename in os.listdir(uploads_dir):
-                file_path = os.path.join(uploads_dir, filename)
-                if os.path.isfile(file_path):
-                    try:
-                        # Parse the document
-                        parsed_data = await document_parser.parse_document(file_path)
-                        
-                        # Search for relevant data based on query
-                        matches = await _search_document_data(parsed_data, query_text)
-                        
-                        if matches:
-                            # Calculate overall confidence based on match quality
-                            avg_relevance = sum(match.get("_relevance_score", 0) for match in matches) / len(matches)
-                            confidence_score = min(0.95, 0.5 + (avg_relevance * 0.5))  # Scale to 0.5-0.95
-                            
-                            # Create more descriptive title and description
-                            top_matches = matches[:3]  # Get top 3 matches for description
-                            match_reasons = [match.get("_match_reason", "Relevant data") for match in top_matches]
-                            
-                            evidence_items.append({
-                                "source": f"documents/{filename}",
-                                "source_type": "document",
-                                "title": f"Evidence from {filename}",
-                                "description": f"Found {len(matches)} relevant records. Top matches: {'; '.join(match_reasons[:2])}",
-                                "data": {
-                                    "filename": filename,
-                                    "matches": matches,
-                                    "total_matches": len(matches),
-                                    "query": query_text,
-                                    "avg_relevance": avg_relevance,
-                                    "file_type": parsed_data.get("content_type", "unknown")
-                                },
-                                "confidence_score": confidence_score,
-                                "timestamp": None
-                            })
-                    except Exception as file_error:
-                        # Log file-specific errors but continue with other files
-                        print(f"Error processing file {filename}: {str(file_error)}")
-                        continue
+        
+        # Only fully indexed documents are searched; queued or parsing files are skipped
+        documents = services.document_index.entries()
+        
+        search_results = []
+        if documents and query_text:
+            # Use AI to understand query intent and extract relevant search terms
+            search_analysis = await services.ai_service.process_query(query_text)
+            query_intent = search_analysis.get("intent", "").lower()
+            
+            # Extract key search terms from both original query and AI analysis
+            # Filter out stop words and focus on meaningful terms
+            search_terms = extract_meaningful_terms(query_text, query_intent, search_analysis.get("parameters", {}))
+            
+            # Search all files concurrently so their row ranges share the compute pool
+            search_results = await asyncio.gather(
+                *[_search_document_data(document, query_text, query_intent, search_terms) for document in documents],
+                return_exceptions=True
+            )
+            for matches in search_results:
+                if isinstance(matches, JobCancelledError):
+                    raise matches
+            rows_scanned = sum(table["rows"] for document in documents for table in document.get("tables", []))
+            DOCUMENT_ROWS_SCANNED.observe(rows_scanned)
+            stats = current_query_stats()
+            if stats is not None:
+                stats.add_scan(len(documents), rows_scanned)
+        
+        for document, matches in zip(documents, search_results):
+            filename = document["filename"]
+            try:
+                if isinstance(matches, Exception):
+                    raise matches
+                
+                if matches:
+                    # Calculate overall confidence based on match quality
+                    avg_relevance = sum(match.get("_relevance_score", 0) for match in matches) / len(matches)
+                    confidence_score = min(0.95, 0.5 + (avg_relevance * 0.5))  # Scale to 0.5-0.95
+                    
+                    # Create more descriptive title and description
+                    top_matches = matches[:3]  # Get top 3 matches for description
+                    match_reasons = [match.get("_match_reason", "Relevant data") for match in top_matches]
+                    
+                    evidence_items.append({
+                        "source": f"documents/{filename}",
+                        "source_type": "document",
+                        "title": f"Evidence from {filename}",
+                        "description": f"Found {len(matches)} relevant records. Top matches: {'; '.join(match_reasons[:2])}",
+                        "data": {
+                            "filename": filename,
+                            "matches": matches,
+                            "total_matches": len(matches),
+                            "query": query_text,
+                            "avg_relevance": avg_relevance,
+                            "file_type": document.get("content_type", "unknown")
+                        },
+                        "confidence_score": confidence_score,
+                        "timestamp": None
+                    })
+            except Exception as file_error:
+                # Log file-specific errors but continue with other files
+                print(f"Error processing file {filename}: {str(file_error)}")
+                continue
         
         # Sort evidence items by confidence score (highest first)
         evidence_items.sort(key=lambda x: x.get("confidence_score", 0), reverse=True)
@@ -481,11 +801,17 @@ async def _handle_document_query(ai_analysis: dict, filters: dict) -> List[dict]
                 "source_type": "document",
                 "title": "No Matches Found",
                 "description": f"No documents found matching query: {query_text}",
-                "data": {"query": query_text, "searched_files": len(os.listdir(uploads_dir)) if os.path.exists(uploads_dir) else 0},
+                "data": {
+                    "query": query_text,
+                    "searched_files": len(documents),
+                    "pending_files": services.ingestion_service.pending_count()
+                },
                 "confidence_score": 0.0,
                 "timestamp": None
             })
     
+    except JobCancelledError:
+        raise
     except Exception as e:
         evidence_items.append({
             "source": "documents",
@@ -499,242 +825,84 @@ async def _handle_document_query(ai_analysis: dict, filters: dict) -> List[dict]
     
     return evidence_items
 
-def _extract_meaningful_terms(query_text: str, query_intent: str, parameters: dict) -> set:
-    """Extract meaningful search terms, filtering out stop words and common words."""
-    
-    # Common stop words that don't add meaning to search
-    stop_words = {
-        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'in', 'is', 'it', 
-        'its', 'of', 'on', 'that', 'the', 'to', 'was', 'will', 'with', 'would', 'this', 'these', 'they',
-        'them', 'their', 'there', 'then', 'than', 'or', 'but', 'if', 'so', 'up', 'out', 'off', 'over',
-        'under', 'again', 'further', 'then', 'once', 'here', 'when', 'where', 'why', 'how', 'all', 'any',
-        'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own',
-        'same', 'so', 'than', 'too', 'very', 'can', 'could', 'should', 'would', 'may', 'might', 'must',
-        'shall', 'will', 'do', 'does', 'did', 'have', 'has', 'had', 'having', 'being', 'been'
-    }
-    
-    # Extract terms from query text
-    query_terms = set()
-    for word in query_text.lower().split():
-        # Remove punctuation and check if it's meaningful
-        clean_word = word.strip('.,!?;:"()[]{}')
-        if clean_word and len(clean_word) > 1 and clean_word not in stop_words:
-            query_terms.add(clean_word)
-    
-    # Extract terms from query intent
-    intent_terms = set()
-    for word in query_intent.lower().split():
-        clean_word = word.strip('.,!?;:"()[]{}')
-        if clean_word and len(clean_word) > 1 and clean_word not in stop_words:
-            intent_terms.add(clean_word)
-    
-    # Extract terms from parameters
-    param_terms = set()
-    for param_value in parameters.values():
-        if isinstance(param_value, str):
-            for word in param_value.lower().split():
-                clean_word = word.strip('.,!?;:"()[]{}')
-                if clean_word and len(clean_word) > 1 and clean_word not in stop_words:
-                    param_terms.add(clean_word)
-    
-    # Combine all meaningful terms
-    all_terms = query_terms.union(intent_terms).union(param_terms)
-    
-    # Special handling for common query patterns
-    if 'list' in query_text.lower() and 'assigned' in query_text.lower():
-        # For "list assets assigned to [person]" queries
-        all_terms.add('assigned')
-        all_terms.add('asset')
-    
-    if 'count' in query_text.lower():
-        all_terms.add('count')
-    
-    if 'find' in query_text.lower():
-        all_terms.add('find')
-    
-    return all_terms
-
-async def _search_document_data(parsed_data: dict, query_text: str) -> List[dict]:
-    """Search through parsed document data for relevant matches using AI-powered analysis."""
+async def _search_document_data(document: dict, query_text: str, query_intent: str, search_terms: set) -> List[dict]:
+    """Search an indexed document for relevant matches, scoring row ranges in the compute pool."""
     matches = []
     
     try:
-        if not parsed_data or not query_text:
+        if not document or not query_text:
             return matches
         
-        content_type = parsed_data.get("content_type", "").lower()
-        data = parsed_data.get("data", [])
-        
-        # Use AI to understand query intent and extract relevant search terms
-        ai_analysis = await ai_service.process_query(query_text)
-        query_intent = ai_analysis.get("intent", "").lower()
-        parameters = ai_analysis.get("parameters", {})
-        
-        # Extract key search terms from both original query and AI analysis
-        # Filter out stop words and focus on meaningful terms
-        search_terms = _extract_meaningful_terms(query_text, query_intent, parameters)
-        
-        # For CSV/Excel data
-        if content_type in ["csv", "excel"] and isinstance(data, list):
-            for row in data:
-                if isinstance(row, dict):
-                    # Calculate relevance score for this row
-                    relevance_score = await _calculate_row_relevance(row, query_text, query_intent, search_terms)
-                    
-                    # Only include rows with meaningful relevance
-                    if relevance_score > 0.3:  # Threshold for relevance
-                        row_with_score = row.copy()
-                        row_with_score["_relevance_score"] = relevance_score
-                        row_with_score["_match_reason"] = _get_match_reason(row, query_text, search_terms)
-                        matches.append(row_with_score)
+        checkpoint_current_job()
+        content_type = document.get("content_type", "").lower()
+        
+        # For CSV/Excel rows and PDF passages
+        if content_type in ["csv", "excel", "pdf"] and document.get("tables"):
+            # Partition every table into row ranges so large files spread across cores
+            partitions = []
+            tasks = []
+            for table_index, table in enumerate(document.get("tables", [])):
+                for start in range(0, table["rows"], SCORE_PARTITION_ROWS):
+                    end = min(table["rows"], start + SCORE_PARTITION_ROWS)
+                    partitions.append(table_index)
+                    tasks.append(_score_partition(table["path"], start, end, query_text, query_intent, search_terms))
+            
+            scored = {}
+            for table_index, partition_matches in zip(partitions, await asyncio.gather(*tasks)):
+                for row_index, score, reason in partition_matches:
+                    scored[(table_index, row_index)] = (table_index, row_index, score, reason)
+            
+            # Typo-tolerant person lookup, so "Jon Smyth" still finds rows for "John Smith"
+            assignee = extract_assignee_name(query_text)
+            if assignee:
+                for table_index, row_index, name, distance in services.document_index.fuzzy_name_rows(
+                    document, assignee, settings.NAME_MATCH_TOP_K
+                ):
+                    score = round(max(RELEVANCE_THRESHOLD + 0.1, 0.9 - 0.15 * distance), 2)
+                    current = scored.get((table_index, row_index))
+                    if current is None or current[2] < score:
+                        reason = f"Assigned to: {name}" if distance == 0 else f"Assigned to: {name} (close match for '{assignee}')"
+                        scored[(table_index, row_index)] = (table_index, row_index, score, reason)
+            scored = list(scored.values())
+            
+            # Sort matches by relevance score (highest first) and keep the top 20
+            scored.sort(key=lambda match: match[2], reverse=True)
+            scored = scored[:20]
+            
+            # Only the returned rows are converted to dicts
+            rows = services.document_index.materialize_rows(document, [(table_index, row_index) for table_index, row_index, _, _ in scored])
+            for row, (_, _, score, reason) in zip(rows, scored):
+                row["_relevance_score"] = score
+                row["_match_reason"] = reason
+                matches.append(row)
         
         # For text-based content (PDFs, etc.)
-        elif isinstance(data, str):
-            text_relevance = await _calculate_text_relevance(data, query_text, search_terms)
-            if text_relevance > 0.3:
+        elif document.get("text"):
+            text = document["text"]
+            text_relevance = calculate_text_relevance(text, query_text, search_terms)
+            if text_relevance > RELEVANCE_THRESHOLD:
                 matches.append({
-                    "content": data, 
+                    "content": text, 
                     "match_type": "text_content",
                     "_relevance_score": text_relevance,
                     "_match_reason": f"Text content matches query terms"
                 })
-        
-        # Sort matches by relevance score (highest first)
-        matches.sort(key=lambda x: x.get("_relevance_score", 0), reverse=True)
-        
-        # Limit results to most relevant matches (top 20)
-        matches = matches[:20]
     
+    except JobCancelledError:
+        raise
     except Exception as e:
         print(f"Error searching document data: {str(e)}")
     
     return matches
 
-async def _calculate_row_relevance(row: dict, query_text: str, query_intent: str, search_terms: set) -> float:
-    """Calculate relevance score for a data row based on query."""
-    try:
-        # Convert row values to searchable text
-        row_text = " ".join(str(value).lower() for value in row.values() if value is not None)
-        
-        if not row_text:
-            return 0.0
-        
-        # Base score from keyword matches
-        keyword_matches = sum(1 for term in search_terms if term in row_text)
-        base_score = keyword_matches / len(search_terms) if search_terms else 0
-        
-        # Boost score for exact phrase matches
-        phrase_boost = 0.0
-        if query_text.lower() in row_text:
-            phrase_boost = 0.3
-        
-        # Boost score for intent-specific matches
-        intent_boost = 0.0
-        if query_intent and any(word in row_text for word in query_intent.split()):
-            intent_boost = 0.2
-        
-        # Boost score for common query patterns
-        pattern_boost = 0.0
-        
-        # Handle "assigned to [person]" queries
-        if "assigned" in query_text.lower() and "to" in query_text.lower():
-            # Look for assignment-related fields
-            assignment_fields = ['assigned', 'assignee', 'owner', 'user', 'person', 'employee']
-            if any(field in row_text for field in assignment_fields):
-                pattern_boost = 0.5
-                # Extra boost if we find a name match
-                for term in search_terms:
-                    if len(term) > 2 and term in row_text:  # Likely a name
-                        pattern_boost += 0.3
-                        break
-        
-        # Handle "count" queries
-        elif "count" in query_text.lower():
-            if any(term in row_text for term in search_terms):
-                pattern_boost = 0.4
-        
-        # Handle "list" queries
-        elif "list" in query_text.lower():
-            if any(term in row_text for term in search_terms):
-                pattern_boost = 0.3
-        
-        # Handle specific device/asset queries
-        elif "laptop" in query_text.lower():
-            if "laptop" in row_text:
-                pattern_boost = 0.4
-        elif "apple" in query_text.lower():
-            if "apple" in row_text:
-                pattern_boost = 0.4
-        elif "office" in query_text.lower():
-            if "office" in row_text:
-                pattern_boost = 0.3
-        
-        # Calculate final relevance score
-        relevance = min(1.0, base_score + phrase_boost + intent_boost + pattern_boost)
-        
-        return relevance
-        
-    except Exception as e:
-        print(f"Error calculating row relevance: {str(e)}")
-        return 0.0
-
-async def _calculate_text_relevance(text: str, query_text: str, search_terms: set) -> float:
-    """Calculate relevance score for text content."""
-    try:
-        text_lower = text.lower()
-        
-        # Base score from keyword matches
-        keyword_matches = sum(1 for term in search_terms if term in text_lower)
-        base_score = keyword_matches / len(search_terms) if search_terms else 0
-        
-        # Boost for exact phrase matches
-        phrase_boost = 0.3 if query_text.lower() in text_lower else 0.0
-        
-        return min(1.0, base_score + phrase_boost)
-        
-    except Exception as e:
-        print(f"Error calculating text relevance: {str(e)}")
-        return 0.0
-
-def _get_match_reason(row: dict, query_text: str, search_terms: set) -> str:
-    """Generate a human-readable reason for why a row matched."""
-    try:
-        row_text = " ".join(str(value).lower() for value in row.values() if value is not None)
-        
-        # Find which terms matched
-        matched_terms = [term for term in search_terms if term in row_text]
-        
-        # Special handling for assignment queries
-        if "assigned" in query_text.lower() and "to" in query_text.lower():
-            # Look for name matches in the row
-            name_matches = []
-            for term in search_terms:
-                if len(term) > 2 and term in row_text:
-                    name_matches.append(term)
-            
-            if name_matches:
-                return f"Assigned to: {', '.join(name_matches[:2])}"
-            elif any(field in row_text for field in ['assigned', 'assignee', 'owner']):
-                return "Contains assignment information"
-        
-        # Special handling for count queries
-        elif "count" in query_text.lower():
-            if matched_terms:
-                return f"Countable items: {', '.join(matched_terms[:2])}"
-        
-        # Special handling for list queries
-        elif "list" in query_text.lower():
-            if matched_terms:
-                return f"List items: {', '.join(matched_terms[:2])}"
-        
-        # General matching
-        if matched_terms:
-            return f"Matches: {', '.join(matched_terms[:3])}"
-        else:
-            return "Relevant data found"
-            
-    except Exception as e:
-        return "Relevant data found"
+async def _score_partition(table_path: str, start: int, end: int, query_text: str, query_intent: str,
+                           search_terms: set) -> List[tuple]:
+    """Score one row range in the compute pool; each finished range is a cancellation point."""
+    matches = await services.compute_pool.run(
+        score_table_range, table_path, start, end, query_text, query_intent, search_terms
+    )
+    checkpoint_current_job()
+    return matches
 
 # Report generation helper functions
 async def _generate_report_content(result: dict) -> dict:
@@ -6,15 +6,23 @@ class Settings(BaseModel):
     # API Configuration
     API_HOST: str = "localhost"
     API_PORT: int = 8000
+    # Production server (app.server): worker processes (0 = one per CPU) and drain time on shutdown
+    WORKERS: int = 0
+    GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    # Set by app.server for its workers: how many there are and where they merge metrics
+    SERVER_WORKERS: int = 1
+    METRICS_DIR: Optional[str] = None
     FRONTEND_URL: str = "http://localhost:3000"
     
     # AI Configuration
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible endpoint, e.g. a local stub
     AI_MODEL: str = "gpt-4"
     
     # GitHub Integration
     GITHUB_TOKEN: Optional[str] = None
     GITHUB_ORG: Optional[str] = None
+    GITHUB_API_URL: str = "https://api.github.com"
     
     # JIRA Integration
     JIRA_URL: Optional[str] = None
@@ -28,21 +36,67 @@ class Settings(BaseModel):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ADMIN_TOKEN: Optional[str] = None  # enables /api/v1/admin when set
     
     # File Upload
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: list = [".pdf", ".xlsx", ".xls", ".csv"]
     UPLOAD_DIR: str = "./uploads"
+    INGESTION_WORKERS: int = 2
+    INDEX_DIR: str = "./storage/index"
+    CSV_CHUNK_ROWS: int = 100000
+    EXCEL_ENGINE: str = "auto"  # auto, openpyxl or calamine
+    EXCEL_STREAMING_MIN_BYTES: int = 50 * 1024 * 1024  # 50MB
+    PDF_CACHE_DIR: str = "./storage/pdf_pages"
+    
+    # Fuzzy person-name matching for "assigned to" queries
+    NAME_MATCH_MAX_DISTANCE: int = 2
+    NAME_MATCH_TOP_K: int = 10
+    
+    # CPU-bound parsing and scoring (0 runs them on threads instead of processes)
+    COMPUTE_PROCESSES: int = os.cpu_count() or 1
+    
+    # Background Jobs
+    QUERY_WORKERS: int = 4
+    
+    # Job and ingestion status shared by all server workers; finished records are kept this long
+    STATE_DIR: str = "./storage/state"
+    STATUS_RETENTION_SECONDS: int = 24 * 60 * 60  # 1 day
+    
+    # Stored query results: journal size that triggers compaction into the snapshot
+    RESULTS_JOURNAL_COMPACT_BYTES: int = 16 * 1024 * 1024  # 16MB
+    
+    # Exports
+    EXPORT_CACHE_MAX_BYTES: int = 500 * 1024 * 1024  # 500MB
+    
+    # Tracing: none, console, file or package.module:factory
+    TRACING_EXPORTER: str = "none"
+    TRACING_FILE: str = "./storage/traces.jsonl"
+    
+    # Slow-query log (queries at or above the threshold are recorded)
+    SLOW_QUERY_THRESHOLD_MS: float = 2000
+    SLOW_QUERY_LOG: str = "./storage/slow_queries.jsonl"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024  # 10MB per file
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+    
+    # Startup: background pre-warming after boot (comma-separated imports, index, compute; none disables)
+    PREWARM: str = "imports,index"
 
 # Load from environment variables
 settings = Settings(
     API_HOST=os.getenv("API_HOST", "localhost"),
     API_PORT=int(os.getenv("API_PORT", "8000")),
+    WORKERS=int(os.getenv("WORKERS", "0")),
+    GRACEFUL_SHUTDOWN_SECONDS=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30")),
+    SERVER_WORKERS=int(os.getenv("SERVER_WORKERS", "1")),
+    METRICS_DIR=os.getenv("METRICS_DIR") or None,
     FRONTEND_URL=os.getenv("FRONTEND_URL", "http://localhost:3000"),
     OPENAI_API_KEY=os.getenv("OPENAI_API_KEY"),
+    OPENAI_BASE_URL=os.getenv("OPENAI_BASE_URL") or None,
     AI_MODEL=os.getenv("AI_MODEL", "gpt-4"),
     GITHUB_TOKEN=os.getenv("GITHUB_TOKEN"),
     GITHUB_ORG=os.getenv("GITHUB_ORG"),
+    GITHUB_API_URL=os.getenv("GITHUB_API_URL", "https://api.github.com"),
     JIRA_URL=os.getenv("JIRA_URL"),
     JIRA_USERNAME=os.getenv("JIRA_USERNAME"),
     JIRA_API_TOKEN=os.getenv("JIRA_API_TOKEN"),
@@ -50,6 +104,28 @@ settings = Settings(
     SECRET_KEY=os.getenv("SECRET_KEY", "your-secret-key-change-in-production"),
     ALGORITHM=os.getenv("ALGORITHM", "HS256"),
     ACCESS_TOKEN_EXPIRE_MINUTES=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")),
+    ADMIN_TOKEN=os.getenv("ADMIN_TOKEN") or None,
     MAX_FILE_SIZE=int(os.getenv("MAX_FILE_SIZE", "10485760")),
-    UPLOAD_DIR=os.getenv("UPLOAD_DIR", "./uploads")
+    UPLOAD_DIR=os.getenv("UPLOAD_DIR", "./uploads"),
+    INGESTION_WORKERS=int(os.getenv("INGESTION_WORKERS", "2")),
+    INDEX_DIR=os.getenv("INDEX_DIR", "./storage/index"),
+    CSV_CHUNK_ROWS=int(os.getenv("CSV_CHUNK_ROWS", "100000")),
+    EXCEL_ENGINE=os.getenv("EXCEL_ENGINE", "auto"),
+    EXCEL_STREAMING_MIN_BYTES=int(os.getenv("EXCEL_STREAMING_MIN_BYTES", str(50 * 1024 * 1024))),
+    PDF_CACHE_DIR=os.getenv("PDF_CACHE_DIR", "./storage/pdf_pages"),
+    NAME_MATCH_MAX_DISTANCE=int(os.getenv("NAME_MATCH_MAX_DISTANCE", "2")),
+    NAME_MATCH_TOP_K=int(os.getenv("NAME_MATCH_TOP_K", "10")),
+    COMPUTE_PROCESSES=int(os.getenv("COMPUTE_PROCESSES", str(os.cpu_count() or 1))),
+    QUERY_WORKERS=int(os.getenv("QUERY_WORKERS", "4")),
+    STATE_DIR=os.getenv("STATE_DIR", "./storage/state"),
+    STATUS_RETENTION_SECONDS=int(os.getenv("STATUS_RETENTION_SECONDS", str(24 * 60 * 60))),
+    RESULTS_JOURNAL_COMPACT_BYTES=int(os.getenv("RESULTS_JOURNAL_COMPACT_BYTES", str(16 * 1024 * 1024))),
+    EXPORT_CACHE_MAX_BYTES=int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(500 * 1024 * 1024))),
+    TRACING_EXPORTER=os.getenv("TRACING_EXPORTER", "none"),
+    TRACING_FILE=os.getenv("TRACING_FILE", "./storage/traces.jsonl"),
+    SLOW_QUERY_THRESHOLD_MS=float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "2000")),
+    SLOW_QUERY_LOG=os.getenv("SLOW_QUERY_LOG", "./storage/slow_queries.jsonl"),
+    SLOW_QUERY_LOG_MAX_BYTES=int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+    SLOW_QUERY_LOG_BACKUPS=int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5")),
+    PREWARM=os.getenv("PREWARM", "imports,index")
 )
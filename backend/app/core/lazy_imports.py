@@ -0,0 +1,58 @@
+"""Heavy libraries imported on first use, with the time each import took.
+
+pandas, pyarrow and openai add about a second to process start. Modules that use
+them bind a ``LazyModule`` at the top instead of importing directly. The real import
+then happens on first attribute access, or earlier when the app lifespan pre-warms
+it in the background. Import times are published on ``/metrics``.
+"""
+from typing import Any, Dict, Iterable
+import importlib
+import sys
+import time
+
+from app.core.metrics import MODULE_IMPORT_SECONDS
+
+# Imported ahead of the first query when pre-warming is enabled
+HEAVY_MODULES = ("pandas", "pyarrow", "pyarrow.compute")
+
+def timed_import(name: str):
+    """Import ``name`` (once) and record how long the import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    MODULE_IMPORT_SECONDS.set(time.perf_counter() - started, module=name)
+    return module
+
+def import_modules(names: Iterable[str] = HEAVY_MODULES) -> Dict[str, float]:
+    """Import each module and return the import times recorded in this process.
+
+    Module-level so the compute pool can run it to warm up its worker processes.
+    """
+    for name in names:
+        timed_import(name)
+    return MODULE_IMPORT_SECONDS.values()
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is first used.
+
+    Attributes are cached on the proxy as they are looked up, so hot loops pay for
+    the indirection only once per name. Modules that annotate with a lazy module's
+    types need ``from __future__ import annotations``; otherwise the annotations
+    trigger the import while the module is being defined.
+    """
+
+    def __init__(self, name: str):
+        self._lazy_name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        value = getattr(timed_import(self._lazy_name), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_name in sys.modules else "not loaded"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
@@ -0,0 +1,313 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are kept per label set behind one lock. Values are per
+process, so anything recorded inside a spawned compute pool worker is not
+reported; time those calls around ``compute_pool.run`` instead. Server workers
+share theirs through ``SharedMetrics``, which merges per-process snapshots
+(``Registry.snapshot``) when rendering.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import bisect
+import threading
+import time
+
+# Content type served by the /metrics endpoint (Starlette appends the charset)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Latency buckets in seconds, from cache hits up to slow LLM completions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Row count buckets for document scans
+ROW_BUCKETS = (100, 1000, 10000, 50000, 100000, 500000, 1000000, 5000000, 10000000)
+
+# Durable-write buckets in seconds, from a page-cache fsync up to a stalled disk
+COMMIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Records per group commit
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> Iterator[str]:
+        pass
+
+    @abstractmethod
+    def state(self) -> Dict[str, Any]:
+        """JSON-serializable values, for merging with other processes."""
+        pass
+
+    @abstractmethod
+    def merged(self, states: List[Tuple[str, Dict[str, Any]]]) -> "_Metric":
+        """A new metric combining ``(worker, state)`` pairs from several processes."""
+        pass
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"values": [[list(key), value] for key, value in self._values.items()]}
+
+    def merged(self, states: List[Tuple[str, Dict[str, Any]]]) -> "Counter":
+        """Counts summed over all processes."""
+        total = Counter(self.name, self.description, self.label_names)
+        for _, state in states:
+            for key, value in state.get("values", []):
+                total.inc(value, **dict(zip(self.label_names, key)))
+        return total
+
+class Gauge(Counter):
+    """Last value set per label set."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def values(self) -> Dict[str, float]:
+        """Current values keyed by the first label, for single-label gauges."""
+        with self._lock:
+            return {key[0]: value for key, value in self._values.items()}
+
+    def merged(self, states: List[Tuple[str, Dict[str, Any]]]) -> "Gauge":
+        """One series per process, told apart by a ``worker`` label; summing gauges means nothing."""
+        gauge = Gauge(self.name, self.description, self.label_names + ("worker",))
+        for worker, state in states:
+            for key, value in state.get("values", []):
+                gauge.set(value, worker=worker, **dict(zip(self.label_names, key)))
+        return gauge
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the ``with`` block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_number(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {_format_number(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"series": [[list(key), list(counts), total, count]
+                               for key, (counts, total, count) in self._series.items()]}
+
+    def merged(self, states: List[Tuple[str, Dict[str, Any]]]) -> "Histogram":
+        """Bucket counts, sums and counts added up over all processes."""
+        histogram = Histogram(self.name, self.description, self.label_names, self.buckets)
+        for _, state in states:
+            for key, counts, total, count in state.get("series", []):
+                series = histogram._series.setdefault(tuple(key), [[0] * (len(self.buckets) + 1), 0.0, 0])
+                series[0] = [current + added for current, added in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+        return histogram
+
+class CacheRatio(_Metric):
+    """Hit ratio gauge derived from a cache's hit and miss counter."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, lookups: Counter):
+        super().__init__(name, description, ("cache",))
+        self.lookups = lookups
+
+    def _samples(self) -> Iterator[str]:
+        with self.lookups._lock:
+            values = dict(self.lookups._values)
+        for cache in sorted({cache for cache, _ in values}):
+            hits = values.get((cache, "hit"), 0)
+            total = hits + values.get((cache, "miss"), 0)
+            if total:
+                yield f"{self.name}{_format_labels(self.label_names, (cache,))} {_format_number(hits / total)}"
+
+    def state(self) -> Dict[str, Any]:
+        return self.lookups.state()
+
+    def merged(self, states: List[Tuple[str, Dict[str, Any]]]) -> "CacheRatio":
+        """The ratio of the lookups summed over all processes."""
+        return CacheRatio(self.name, self.description, self.lookups.merged(states))
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """This process's values by metric name, as plain JSON data."""
+        return {metric.name: metric.state() for metric in self._metrics}
+
+    def totals(self, snapshots: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """One snapshot holding the summed counters and histograms of several; gauges are left out."""
+        return {
+            metric.name: metric.merged([("", snapshot.get(metric.name, {})) for snapshot in snapshots]).state()
+            for metric in self._metrics if not isinstance(metric, Gauge)
+        }
+
+    def render(self, snapshots: Optional[List[Tuple[str, Dict[str, Dict[str, Any]]]]] = None) -> str:
+        """This process's metrics, or with ``snapshots`` the merge of those ``(worker, snapshot)`` pairs."""
+        lines = []
+        for metric in self._metrics:
+            if snapshots is not None:
+                metric = metric.merged([(worker, snapshot.get(metric.name, {})) for worker, snapshot in snapshots])
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+QUERY_STAGE_SECONDS = registry.register(Histogram(
+    "evidence_query_stage_seconds",
+    "Time spent in each stage of the query pipeline.",
+    ("stage",)
+))
+INTEGRATION_CALL_SECONDS = registry.register(Histogram(
+    "evidence_integration_call_seconds",
+    "Latency of calls to GitHub, Jira and the LLM, by operation.",
+    ("integration", "operation")
+))
+UPSTREAM_REQUESTS = registry.register(Counter(
+    "evidence_upstream_requests_total",
+    "Requests sent to upstream services, by response status (or error when none was received).",
+    ("integration", "status")
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    "evidence_cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result")
+))
+CACHE_HIT_RATIO = registry.register(CacheRatio(
+    "evidence_cache_hit_ratio",
+    "Fraction of lookups served from each cache since start.",
+    CACHE_LOOKUPS
+))
+DOCUMENT_ROWS_SCANNED = registry.register(Histogram(
+    "evidence_document_rows_scanned",
+    "Rows and passages scored per document query, across all indexed documents.",
+    buckets=ROW_BUCKETS
+))
+
+STARTUP_SECONDS = registry.register(Gauge(
+    "evidence_startup_seconds",
+    "Time spent in each startup phase: importing the app, starting services and background pre-warming.",
+    ("phase",)
+))
+MODULE_IMPORT_SECONDS = registry.register(Gauge(
+    "evidence_module_import_seconds",
+    "Import time of heavy libraries loaded on first use or by pre-warming, in this process.",
+    ("module",)
+))
+
+RESULTS_COMMIT_SECONDS = registry.register(Histogram(
+    "evidence_results_commit_seconds",
+    "Time for a query result to become durable in the results journal, including the wait for its group commit.",
+    buckets=COMMIT_BUCKETS
+))
+RESULTS_COMMIT_BATCH = registry.register(Histogram(
+    "evidence_results_commit_batch_records",
+    "Query results written by one journal group commit (one fsync).",
+    buckets=BATCH_BUCKETS
+))
+RESULTS_COMPACTION_SECONDS = registry.register(Histogram(
+    "evidence_results_compaction_seconds",
+    "Time to fold sealed journal segments into the results snapshot."
+))
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
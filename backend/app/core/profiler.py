@@ -0,0 +1,201 @@
+"""Low-overhead sampling profiler that produces folded stacks for flame graphs.
+
+A daemon thread snapshots every thread's Python stack with ``sys._current_frames``
+at a fixed interval. No tracing hooks are installed, so the cost is one stack
+walk per thread per sample. Compute pool processes are separate interpreters
+and are not sampled; run with ``COMPUTE_PROCESSES=0`` to profile parsing and
+scoring in process.
+
+Use ``profile()`` from benchmarks, or ``ProfilerControl`` (the ``profiler``
+instance) to cover the next N requests or a time window of a running server.
+"""
+from typing import Dict, List, Optional
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+import os
+import sys
+import threading
+import time
+
+# Default time between samples
+DEFAULT_INTERVAL = 0.005
+
+# Leaf frames in these modules are threads parked on a lock, queue or selector
+IDLE_MODULES = ("threading.py", "selectors.py", "queue.py")
+
+# Leaf frames that are idle executor workers waiting for their next work item
+IDLE_FUNCTIONS = {("thread.py", "_worker"), ("process.py", "_queue_management_worker")}
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_DIR):
+        filename = os.path.relpath(filename, _BACKEND_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Collects folded stacks (``root;...;leaf count``) from a background thread."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stacks_lock = threading.Lock()
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        if self.stopped_at is None:
+            self.stopped_at = time.time()
+
+    def folded(self) -> str:
+        """Stacks in Brendan Gregg's folded format, ready for flamegraph.pl or speedscope."""
+        with self._stacks_lock:
+            stacks = sorted(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top_frames(self, limit: int = 20) -> List[Dict[str, object]]:
+        """Frames that were on the stack in the most samples (inclusive counts)."""
+        with self._stacks_lock:
+            stacks = list(self._stacks.items())
+        inclusive: Counter = Counter()
+        for stack, count in stacks:
+            for frame in set(stack.split(";")):
+                inclusive[frame] += count
+        return [{"frame": frame, "samples": count} for frame, count in inclusive.most_common(limit)]
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            sample = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not self.include_idle and self._is_idle(frame.f_code):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = self._labels.get(code)
+                    if label is None:
+                        label = self._labels[code] = _frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(f"thread:{names.get(thread_id, thread_id)}")
+                sample.append(";".join(reversed(stack)))
+            with self._stacks_lock:
+                self._stacks.update(sample)
+                self.samples += 1
+
+    @staticmethod
+    def _is_idle(code) -> bool:
+        module = os.path.basename(code.co_filename)
+        return module in IDLE_MODULES or (module, code.co_name) in IDLE_FUNCTIONS
+
+@contextmanager
+def profile(interval: float = DEFAULT_INTERVAL, include_idle: bool = False):
+    """Sample the ``with`` block; read ``folded()`` from the yielded profiler afterwards."""
+    sampler = SamplingProfiler(interval, include_idle)
+    sampler.start()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
+
+class ProfilerControl:
+    """One profiling session at a time for the API: the next N requests and/or a time window."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sampler: Optional[SamplingProfiler] = None
+        self._session: Optional[Dict[str, object]] = None
+        self._timer: Optional[threading.Timer] = None
+
+    def start(self, requests: Optional[int] = None, seconds: Optional[float] = None,
+              interval: float = DEFAULT_INTERVAL) -> Dict[str, object]:
+        if not requests and not seconds:
+            raise ValueError("Set requests, seconds or both")
+        with self._lock:
+            if self._sampler is not None and self._sampler.running:
+                raise RuntimeError("A profiling session is already running")
+            self._sampler = SamplingProfiler(interval)
+            self._session = {
+                "requests_limit": requests,
+                "seconds_limit": seconds,
+                "interval": interval,
+                "requests_seen": 0,
+                "started_at": datetime.now().isoformat(),
+                "completed_at": None
+            }
+            self._sampler.start()
+            if seconds:
+                self._timer = threading.Timer(seconds, self.stop)
+                self._timer.daemon = True
+                self._timer.start()
+        return self.status()
+
+    def stop(self) -> Dict[str, object]:
+        with self._lock:
+            if self._sampler is not None and self._sampler.running:
+                self._sampler.stop()
+                self._session["completed_at"] = datetime.now().isoformat()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return self.status()
+
+    def request_finished(self):
+        """Count a served request; ends the session once its request budget is used."""
+        with self._lock:
+            if self._sampler is None or not self._sampler.running:
+                return
+            self._session["requests_seen"] += 1
+            limit = self._session["requests_limit"]
+            done = limit is not None and self._session["requests_seen"] >= limit
+        if done:
+            self.stop()
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            if self._session is None:
+                return {"status": "idle"}
+            return {
+                **self._session,
+                "status": "running" if self._sampler.running else "completed",
+                "samples": self._sampler.samples,
+                "top_frames": self._sampler.top_frames(10)
+            }
+
+    def folded(self) -> Optional[str]:
+        """Folded stacks of the current or last session, or None if nothing was profiled."""
+        with self._lock:
+            return self._sampler.folded() if self._sampler is not None else None
+
+profiler = ProfilerControl()
@@ -0,0 +1,66 @@
+"""Per-query counters collected while a query pipeline runs.
+
+The active ``QueryStats`` lives in a context variable. Integrations and handlers
+therefore add to it without it being threaded through their signatures, and
+tasks started by ``asyncio.gather`` share the same object.
+"""
+from typing import Any, Dict, Optional
+from collections import Counter
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+
+from app.core.metrics import QUERY_STAGE_SECONDS
+
+_current_stats: contextvars.ContextVar = contextvars.ContextVar("query_stats", default=None)
+
+class QueryStats:
+    def __init__(self):
+        self.stage_seconds: Dict[str, float] = {}
+        self.upstream_calls: Counter = Counter()
+        self.files_scanned = 0
+        self.rows_scored = 0
+        self.query_type: Optional[str] = None
+        self.github_function: Optional[str] = None
+        self.github_parameters: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage, for this query and for the stage histogram."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            QUERY_STAGE_SECONDS.observe(elapsed, stage=name)
+            with self._lock:
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + elapsed
+
+    def add_upstream_call(self, integration: str):
+        with self._lock:
+            self.upstream_calls[integration] += 1
+
+    def add_scan(self, files: int, rows: int):
+        with self._lock:
+            self.files_scanned += files
+            self.rows_scored += rows
+
+@contextmanager
+def collect_query_stats():
+    """Make a fresh ``QueryStats`` current for the ``with`` block."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+def record_upstream_call(integration: str):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add_upstream_call(integration)
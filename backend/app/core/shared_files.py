@@ -0,0 +1,123 @@
+"""Files shared by several server worker processes.
+
+Every worker reads and writes the same files under ``storage``. Read-modify-write
+cycles run under an exclusive ``flock`` on a sidecar lock file, and files are
+replaced atomically so readers never see a partial write. ``flock`` locks belong to
+the open file, so they also serialize threads within one process.
+"""
+from typing import Any, Iterator
+from contextlib import contextmanager
+import json
+import os
+import tempfile
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+@contextmanager
+def file_lock(lock_path: str, shared: bool = False) -> Iterator[None]:
+    """Hold a cross-process lock on ``lock_path`` (created if missing) for the block."""
+    directory = os.path.dirname(lock_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(lock_path, "a+") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+def write_atomic(path: str, text: str, durable: bool = False):
+    """Replace ``path`` with ``text`` through a uniquely named temporary file.
+
+    With ``durable``, the data and the rename are flushed to disk before returning.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if durable:
+            fsync_dir(directory)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_json_atomic(path: str, data: Any, durable: bool = False, **dump_kwargs):
+    write_atomic(path, json.dumps(data, default=str, **dump_kwargs), durable=durable)
+
+def fsync_dir(directory: str):
+    """Make file creations, renames and deletions in ``directory`` durable."""
+    if not hasattr(os, "O_DIRECTORY"):  # Windows
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def read_json(path: str, default: Any = None) -> Any:
+    """Load a JSON file, returning ``default`` when it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError, IOError):
+        return default
+
+class ProcessLease:
+    """A lock file held for as long as this process lives.
+
+    The kernel drops ``flock`` locks when a process exits, crash included, so other
+    processes can test a lease to learn whether its owner is still running. Unlike a
+    pid check, this is not fooled by pids being reused after a restart.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(directory, exist_ok=True)
+        self._handle = open(self._path(self.owner), "a")
+        if fcntl is not None:
+            fcntl.flock(self._handle, fcntl.LOCK_EX)
+
+    def is_held(self, owner: str) -> bool:
+        """Whether the process that took lease ``owner`` is still running."""
+        if owner == self.owner or fcntl is None:
+            return True
+        try:
+            handle = open(self._path(owner), "r")
+        except FileNotFoundError:
+            return False
+        with handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            # Nobody holds it any more; drop the stale file
+            try:
+                os.remove(self._path(owner))
+            except OSError:
+                pass
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        return False
+
+    def release(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            try:
+                os.remove(self._path(self.owner))
+            except OSError:
+                pass
+
+    def _path(self, owner: str) -> str:
+        return os.path.join(self.directory, f"{owner}.lock")
@@ -0,0 +1,86 @@
+"""Metrics merged across the worker processes of one server.
+
+Each worker writes a snapshot of its registry to ``<directory>/<lease owner>.json``
+every ``FLUSH_INTERVAL_SECONDS`` and once more when it stops. ``/metrics`` on any
+worker merges the latest snapshots of all of them: counters and histograms are summed,
+and gauges get a ``worker`` label. The counters and histograms of a worker that has
+exited are folded into ``retired.json``, so totals do not drop when a worker is
+replaced. Its gauges are dropped.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import threading
+
+from app.core.metrics import Registry, registry as default_registry
+from app.core.shared_files import ProcessLease, file_lock, read_json, write_json_atomic
+
+# How stale another worker's values can be in a scrape
+FLUSH_INTERVAL_SECONDS = 1.0
+
+RETIRED_FILE = "retired.json"
+
+class SharedMetrics:
+    """Publishes this process's metrics and renders the merge of every worker's."""
+
+    def __init__(self, directory: str, lease: ProcessLease, registry: Registry = default_registry):
+        self.directory = directory
+        self.lease = lease
+        self.registry = registry
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, ".lock")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.publish()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write a final snapshot; call before the lease is released."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.publish()
+
+    def publish(self):
+        write_json_atomic(self._path(self.lease.owner), self.registry.snapshot())
+
+    def render(self) -> str:
+        """Prometheus text for the whole server."""
+        self.publish()
+        return self.registry.render(self.snapshots())
+
+    def snapshots(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """``(worker, snapshot)`` of every running worker, plus the retired totals."""
+        with file_lock(self._lock_path):
+            snapshots = []
+            retired = read_json(os.path.join(self.directory, RETIRED_FILE), default={})
+            for filename in sorted(os.listdir(self.directory)):
+                if not filename.endswith(".json") or filename == RETIRED_FILE:
+                    continue
+                owner = filename[:-len(".json")]
+                snapshot = read_json(os.path.join(self.directory, filename))
+                if snapshot is None:
+                    continue
+                if self.lease.is_held(owner):
+                    snapshots.append((owner, snapshot))
+                else:
+                    retired = self.registry.totals([retired, snapshot])
+                    write_json_atomic(os.path.join(self.directory, RETIRED_FILE), retired)
+                    os.remove(os.path.join(self.directory, filename))
+        if retired:
+            snapshots.append(("retired", retired))
+        return snapshots
+
+    def _run(self):
+        while not self._stop.wait(FLUSH_INTERVAL_SECONDS):
+            try:
+                self.publish()
+            except OSError as e:
+                print(f"Warning: could not publish metrics: {str(e)}")
+
+    def _path(self, owner: str) -> str:
+        return os.path.join(self.directory, f"{owner}.json")
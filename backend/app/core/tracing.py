@@ -0,0 +1,151 @@
+"""Lightweight tracing with OpenTelemetry-style spans and pluggable exporters.
+
+The current span is held in a context variable, so spans opened in coroutines,
+``asyncio.to_thread`` calls and background jobs (which copy the submitting
+request's context) nest under the span that was active when they started.
+Finished spans are handed to the configured exporter one at a time.
+"""
+from typing import Any, Dict, Optional
+from contextlib import contextmanager
+import contextvars
+import importlib
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+
+# W3C trace context header, so callers can join their own traces
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.attributes["error.type"] = type(error).__name__
+        self.attributes["error.message"] = str(error)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+class SpanExporter:
+    """Receives every finished span. Subclass and override ``export``."""
+
+    def export(self, span: Span):
+        pass
+
+    def shutdown(self):
+        pass
+
+class ConsoleSpanExporter(SpanExporter):
+    """One JSON line per span on stdout."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            print(line, file=self.stream, flush=True)
+
+class FileSpanExporter(SpanExporter):
+    """Appends spans as JSON lines, for offline inspection of traces."""
+
+    def __init__(self, path: str = "./storage/traces.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        self.exporter = exporter or SpanExporter()
+
+    @contextmanager
+    def start_span(self, name: str, traceparent: Optional[str] = None, root: bool = False, **attributes):
+        """Open a child of the current span, or a root span continuing ``traceparent`` if given.
+
+        ``root`` starts a new trace even inside another span, for work such as
+        queued ingestion that merely happens to be scheduled from a request.
+        """
+        parent = None if root else _current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            match = TRACEPARENT_RE.match(traceparent or "")
+            trace_id, parent_id = match.groups() if match else (secrets.token_hex(16), None)
+
+        span = Span(name, trace_id, parent_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            try:
+                self.exporter.export(span)
+            except Exception as e:
+                print(f"Warning: span export failed: {str(e)}")
+
+tracer = Tracer()
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def create_exporter(name: str, file_path: str = "./storage/traces.jsonl") -> SpanExporter:
+    """``none``, ``console``, ``file`` or ``package.module:factory`` for a custom exporter."""
+    if not name or name == "none":
+        return SpanExporter()
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return FileSpanExporter(file_path)
+    module_name, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown tracing exporter: {name}")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+def configure_tracing(exporter: str, file_path: str = "./storage/traces.jsonl"):
+    tracer.exporter.shutdown()
+    tracer.exporter = create_exporter(exporter, file_path)
@@ -1,13 +1,281 @@
-from typing import List, Dict, Any, Optional
-import pandas as pd
+from __future__ import annotations
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, Callable, Awaitable
+from collections import OrderedDict
+import asyncio
+import hashlib
+import math
 import os
 import io
 import csv
+import datetime
+import re
+import time
 from pathlib import Path
 
+from app.core.lazy_imports import LazyModule
+from app.core.metrics import record_cache_lookup
+from app.core.shared_files import write_atomic
+from app.core.tracing import tracer
+from app.services.document_search import TermMatcher, select_columns
+
+pd = LazyModule("pandas")
+pa = LazyModule("pyarrow")
+pc = LazyModule("pyarrow.compute")
+
+# Rows read to infer explicit dtypes before a chunked CSV read
+CSV_SNIFF_ROWS = 1000
+# Rows per chunk when parsing a CSV file in-process
+CSV_CHUNK_ROWS = 100000
+# Excel reader engines: "auto" prefers calamine when python-calamine is installed
+EXCEL_ENGINES = ["auto", "openpyxl", "calamine"]
+# PDF pages extracted per worker task
+PDF_PAGES_PER_TASK = 8
+# Target passage length when splitting PDF pages for the search index
+PDF_PASSAGE_CHARS = 600
+# Characters of context on each side of a PDF search hit
+PDF_SNIPPET_CHARS = 80
+# PDFs whose trigram page index is kept in memory between searches
+PDF_PAGE_INDEX_CACHE_SIZE = 32
+
+def extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF. Runs in compute pool workers."""
+    from PyPDF2 import PdfReader
+    
+    reader = PdfReader(file_path)
+    return [reader.pages[page_index].extract_text() or "" for page_index in range(start, end)]
+
+def trigrams(text: str) -> set:
+    """Distinct three-character substrings of ``text``."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def build_pdf_page_index(pages: Dict[int, str]) -> Dict[str, List[int]]:
+    """Trigram -> pages of lowercased page text.
+
+    A term can only occur on pages holding every one of its trigrams, so the index
+    narrows a substring search without ever dropping a match.
+    """
+    page_index: Dict[str, List[int]] = {}
+    for page in sorted(pages):
+        for gram in trigrams(pages[page].lower()):
+            page_index.setdefault(gram, []).append(page)
+    return page_index
+
+def split_passages(text: str, max_chars: int = PDF_PASSAGE_CHARS) -> List[str]:
+    """Split page text into paragraph-aligned passages of roughly ``max_chars``."""
+    passages = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 1 > max_chars:
+            passages.append(current)
+            current = ""
+        while len(paragraph) > max_chars:
+            # Break long paragraphs on the last space before the limit
+            cut = paragraph.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            passages.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        current = f"{current} {paragraph}".strip()
+    if current:
+        passages.append(current)
+    return passages
+
+def dataframe_to_arrow(df: pd.DataFrame) -> pa.Table:
+    """Convert a DataFrame to Arrow, falling back to text for mixed-type columns."""
+    arrays = []
+    for column in df.columns:
+        series = df[column]
+        try:
+            arrays.append(pa.Array.from_pandas(series))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            arrays.append(pa.array(
+                [None if pd.isna(value) else str(value) for value in series.tolist()],
+                type=pa.string()
+            ))
+    return pa.Table.from_arrays(arrays, names=[str(column) for column in df.columns])
+
+def _json_value(value: Any) -> Any:
+    """Make a single Arrow scalar value JSON-serializable."""
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    return str(value)
+
+class RowTable:
+    """Parsed rows kept as Arrow column buffers.
+    
+    Rows only become JSON-ready dicts through ``rows()``, which callers use for the
+    few rows they actually return.
+    """
+    
+    def __init__(self, table: pa.Table):
+        self.table = table
+    
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "RowTable":
+        return cls(dataframe_to_arrow(df))
+    
+    @classmethod
+    def concat(cls, tables: List[pa.Table]) -> "RowTable":
+        """Join same-shaped chunk tables, cast to the first chunk's schema."""
+        if not tables:
+            return cls(pa.table({}))
+        schema = tables[0].schema
+        return cls(pa.concat_tables([table.cast(schema) for table in tables]))
+    
+    def __len__(self) -> int:
+        return self.table.num_rows
+    
+    @property
+    def columns(self) -> List[str]:
+        return self.table.column_names
+    
+    def column_values(self, column: str) -> List[Any]:
+        """Python values of one column."""
+        return self.table.column(column).to_pylist()
+    
+    def match_column(self, column: str, matcher: TermMatcher) -> List[Tuple[int, List[int], Any]]:
+        """``(row index, term indices, value)`` for rows whose value in ``column`` contains a term.
+        
+        Each distinct value is lowercased and scanned once, however many rows share it.
+        """
+        values = self.table.column(column)
+        distinct = values.unique()
+        distinct_terms = [
+            matcher.find(str(value)) if value is not None else []
+            for value in distinct.to_pylist()
+        ]
+        hit_ids = [value_id for value_id, terms in enumerate(distinct_terms) if terms]
+        if not hit_ids:
+            return []
+        
+        positions = pc.index_in(values, value_set=distinct)
+        rows = pc.indices_nonzero(pc.is_in(positions, value_set=pa.array(hit_ids, type=positions.type)))
+        row_values = distinct.to_pylist()
+        return [
+            (row_index, distinct_terms[value_id], row_values[value_id])
+            for row_index, value_id in zip(rows.to_pylist(), pc.take(positions, rows).to_pylist())
+        ]
+    
+    def rows(self, indices: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """JSON-ready dicts for the given row indices (all rows when omitted), in that order."""
+        table = self.table
+        if indices is not None:
+            table = table.take(pa.array(list(indices), type=pa.int64()))
+        return [
+            {key: _json_value(value) for key, value in record.items()}
+            for record in table.to_pylist()
+        ]
+
+class PdfPageCache:
+    """On-disk cache of extracted PDF page text, keyed by file hash and page number."""
+    
+    def __init__(self, cache_dir: str = "storage/pdf_pages"):
+        self.cache_dir = cache_dir
+    
+    def get(self, file_hash: str, page: int) -> Optional[str]:
+        path = self._page_path(file_hash, page)
+        if not os.path.exists(path):
+            record_cache_lookup("pdf_page", hit=False)
+            return None
+        record_cache_lookup("pdf_page", hit=True)
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def put(self, file_hash: str, page: int, text: str):
+        path = self._page_path(file_hash, page)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temporary name: workers of several server processes may extract the same page
+        write_atomic(path, text)
+    
+    def _page_path(self, file_hash: str, page: int) -> str:
+        return os.path.join(self.cache_dir, file_hash, f"{page}.txt")
+
+class DataFrameSummaryBuilder:
+    """Builds the ``_get_dataframe_summary`` statistics incrementally, one chunk at a time."""
+    
+    def __init__(self, sample_size: int = 3):
+        self.sample_size = sample_size
+        self.row_count = 0
+        self.columns: Optional[List[str]] = None
+        self.dtypes: Dict[str, str] = {}
+        self.null_counts: Dict[str, int] = {}
+        self.sample_data: List[Dict[str, Any]] = []
+        # column -> [count, mean, M2, min, max], merged with Chan's parallel variance formula
+        self._numeric: Dict[str, List[float]] = {}
+    
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk into the running summary."""
+        if self.columns is None:
+            self.columns = df.columns.tolist()
+            self.dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
+            self.null_counts = {col: 0 for col in self.columns}
+        
+        self.row_count += int(len(df))
+        for col, count in df.isnull().sum().items():
+            self.null_counts[col] += int(count)
+        
+        if len(self.sample_data) < self.sample_size:
+            self.sample_data.extend(RowTable.from_dataframe(df.head(self.sample_size - len(self.sample_data))).rows())
+        
+        for col in df.select_dtypes(include=['number']).columns:
+            values = df[col].dropna().astype(float)
+            if values.empty:
+                continue
+            count = float(len(values))
+            mean = float(values.mean())
+            m2 = float(((values - mean) ** 2).sum())
+            stats = self._numeric.get(col)
+            if stats is None:
+                self._numeric[col] = [count, mean, m2, float(values.min()), float(values.max())]
+                continue
+            total = stats[0] + count
+            delta = mean - stats[1]
+            stats[2] += m2 + delta * delta * stats[0] * count / total
+            stats[1] += delta * count / total
+            stats[0] = total
+            stats[3] = min(stats[3], float(values.min()))
+            stats[4] = max(stats[4], float(values.max()))
+    
+    def summary(self) -> Dict[str, Any]:
+        """Summary in the same shape as ``DocumentParser._get_dataframe_summary``."""
+        columns = self.columns or []
+        summary = {
+            "shape": [self.row_count, len(columns)],
+            "columns": columns,
+            "dtypes": self.dtypes,
+            "null_counts": self.null_counts,
+            "sample_data": self.sample_data
+        }
+        if self._numeric:
+            numeric_summary = {}
+            for col, (count, mean, m2, min_value, max_value) in self._numeric.items():
+                numeric_summary[col] = {
+                    "count": int(count),
+                    "mean": mean,
+                    "std": math.sqrt(m2 / (count - 1)) if count > 1 else None,
+                    "min": min_value,
+                    "max": max_value,
+                }
+            summary["numeric_summary"] = numeric_summary
+        return summary
+
 class DocumentParser:
-    def __init__(self):
+    def __init__(self, excel_engine: str = "auto", pdf_cache_dir: str = "storage/pdf_pages",
+                 page_runner: Optional[Callable[..., Awaitable[Any]]] = None):
+        """``page_runner`` runs ``extract_pdf_pages`` batches (e.g. ``ComputePool.run``);
+        by default they run on the event loop's thread executor."""
         self.supported_formats = ['.pdf', '.xlsx', '.xls', '.csv']
+        if excel_engine not in EXCEL_ENGINES:
+            raise ValueError(f"Unsupported Excel engine: {excel_engine}")
+        self.excel_engine = excel_engine
+        self.page_cache = PdfPageCache(pdf_cache_dir)
+        self.page_runner = page_runner
+        # file hash -> trigram page index, least recently searched first
+        self._page_indexes: OrderedDict = OrderedDict()
     
     async def parse_document(self, file_path: str, query_context: str = "") -> Dict[str, Any]:
         """Parse a document and extract relevant information."""
@@ -17,14 +285,15 @@ class DocumentParser:
             raise ValueError(f"Unsupported file format: {file_extension}")
         
         try:
-            if file_extension == '.pdf':
-                return await self._parse_pdf(file_path, query_context)
-            elif file_extension in ['.xlsx', '.xls']:
-                return await self._parse_excel(file_path, query_context)
-            elif file_extension == '.csv':
-                return await self._parse_csv(file_path, query_context)
-            else:
-                raise ValueError(f"Parser not implemented for {file_extension}")
+            with tracer.start_span("parse_document", filename=Path(file_path).name, format=file_extension):
+                if file_extension == '.pdf':
+                    return await self._parse_pdf(file_path, query_context)
+                elif file_extension in ['.xlsx', '.xls']:
+                    return await self._parse_excel(file_path, query_context)
+                elif file_extension == '.csv':
+                    return await self._parse_csv(file_path, query_context)
+                else:
+                    raise ValueError(f"Parser not implemented for {file_extension}")
         
         except Exception as e:
             return {
@@ -34,24 +303,24 @@ class DocumentParser:
             }
     
     async def _parse_pdf(self, file_path: str, query_context: str) -> Dict[str, Any]:
-        """Parse PDF document using PyPDF2 or similar."""
+        """Parse PDF document page by page with PyPDF2.
+        
+        Page text goes to the page cache rather than into the result; searches and
+        ``pdf_passages`` read it from there. Hashing and opening the PDF are blocking, so
+        they run in a thread; pages are extracted through the page runner.
+        """
         try:
-            # This is a placeholder - you'd use PyPDF2 or pdfplumber here
-            # import PyPDF2
-            # with open(file_path, 'rb') as file:
-            #     pdf_reader = PyPDF2.PdfReader(file)
-            #     text = ""
-            #     for page in pdf_reader.pages:
-            #         text += page.extract_text()
+            file_hash, page_count = await asyncio.to_thread(self._pdf_fingerprint, file_path)
+            await self.read_pdf_pages(file_path, file_hash, list(range(1, page_count + 1)))
             
-            # For now, return a mock response
             return {
                 "filename": Path(file_path).name,
                 "content_type": "pdf",
-                "extracted_text": "Mock PDF content - implement PyPDF2 parsing",
+                "path": file_path,
                 "relevant_sections": [],
                 "metadata": {
-                    "pages": 1,
+                    "pages": page_count,
+                    "sha256": file_hash,
                     "size": os.path.getsize(file_path) if os.path.exists(file_path) else 0
                 }
             }
@@ -59,29 +328,105 @@ class DocumentParser:
         except Exception as e:
             raise Exception(f"PDF parsing failed: {str(e)}")
     
+    def _pdf_fingerprint(self, file_path: str) -> Tuple[str, int]:
+        """Content hash and page count of a PDF. Blocking."""
+        from PyPDF2 import PdfReader
+        
+        return self._file_hash(file_path), len(PdfReader(file_path).pages)
+    
+    async def read_pdf_pages(self, file_path: str, file_hash: str, pages: List[int]) -> Dict[int, str]:
+        """Text of the given 1-based pages, extracting cache misses in parallel batches."""
+        # The page cache is on disk, so it is read and written from a thread
+        texts = await asyncio.to_thread(self._cached_pages, file_hash, pages)
+        missing = [page for page in pages if page not in texts]
+        
+        # Contiguous runs of missing pages, split into batches of PDF_PAGES_PER_TASK
+        batches = []
+        for page in missing:
+            if batches and page == batches[-1][1] + 1 and batches[-1][1] - batches[-1][0] + 1 < PDF_PAGES_PER_TASK:
+                batches[-1][1] = page
+            else:
+                batches.append([page, page])
+        
+        results = await asyncio.gather(*[
+            self._run_page_task(extract_pdf_pages, file_path, first - 1, last) for first, last in batches
+        ])
+        extracted = {}
+        for (first, _), batch_texts in zip(batches, results):
+            for offset, text in enumerate(batch_texts):
+                extracted[first + offset] = text
+        if extracted:
+            await asyncio.to_thread(self._cache_pages, file_hash, extracted)
+            texts.update(extracted)
+        return texts
+    
+    def _cached_pages(self, file_hash: str, pages: List[int]) -> Dict[int, str]:
+        texts = {}
+        for page in pages:
+            cached = self.page_cache.get(file_hash, page)
+            if cached is not None:
+                texts[page] = cached
+        return texts
+    
+    def _cache_pages(self, file_hash: str, texts: Dict[int, str]):
+        for page, text in texts.items():
+            self.page_cache.put(file_hash, page, text)
+    
+    async def pdf_passages(self, parsed_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Page-numbered passages of a parsed PDF, for the passage search index."""
+        metadata = parsed_data.get("metadata", {})
+        pages = await self.read_pdf_pages(
+            parsed_data["path"], metadata["sha256"], list(range(1, metadata.get("pages", 0) + 1))
+        )
+        return await asyncio.to_thread(self._split_pdf_pages, pages)
+    
+    @staticmethod
+    def _split_pdf_pages(pages: Dict[int, str]) -> List[Dict[str, Any]]:
+        passages = []
+        for page in sorted(pages):
+            for passage_number, text in enumerate(split_passages(pages[page]), start=1):
+                passages.append({"page": page, "passage": passage_number, "text": text})
+        return passages
+    
+    async def pdf_page_index(self, parsed_data: Dict[str, Any]) -> Dict[str, List[int]]:
+        """Trigram page index of a parsed PDF, built on its first search."""
+        metadata = parsed_data["metadata"]
+        file_hash = metadata["sha256"]
+        page_index = self._page_indexes.get(file_hash)
+        if page_index is None:
+            pages = await self.read_pdf_pages(parsed_data["path"], file_hash, list(range(1, metadata.get("pages", 0) + 1)))
+            page_index = await asyncio.to_thread(build_pdf_page_index, pages)
+            self._page_indexes[file_hash] = page_index
+            while len(self._page_indexes) > PDF_PAGE_INDEX_CACHE_SIZE:
+                self._page_indexes.popitem(last=False)
+        else:
+            self._page_indexes.move_to_end(file_hash)
+        return page_index
+    
+    async def _run_page_task(self, func: Callable, *args) -> Any:
+        if self.page_runner is not None:
+            return await self.page_runner(func, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    
+    @staticmethod
+    def _file_hash(file_path: str) -> str:
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+    
     async def _parse_excel(self, file_path: str, query_context: str) -> Dict[str, Any]:
-        """Parse Excel document."""
+        """Parse Excel document, reading every sheet from a single open workbook."""
         try:
-            # Read all sheets
-            excel_file = pd.ExcelFile(file_path)
             sheets_data = {}
+            sheet_parse_seconds = {}
+            engine = self.resolve_excel_engine(file_path)
             
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                
-                # Convert to JSON-serializable format
-                data_records = df.to_dict('records')
-                for record in data_records:
-                    for key, value in record.items():
-                        if pd.isna(value):
-                            record[key] = None
-                        elif hasattr(value, 'item'):  # numpy scalar
-                            record[key] = value.item()
-                        else:
-                            record[key] = str(value) if not isinstance(value, (str, int, float, bool, type(None))) else value
-                
+            for sheet_name, df, seconds in self.iter_excel_sheets(file_path, engine):
+                sheet_parse_seconds[sheet_name] = seconds
                 sheets_data[sheet_name] = {
-                    "data": data_records,
+                    "data": RowTable.from_dataframe(df),
                     "columns": df.columns.tolist(),
                     "shape": [int(df.shape[0]), int(df.shape[1])],
                     "summary": self._get_dataframe_summary_safe(df)
@@ -92,9 +437,11 @@ class DocumentParser:
                 "content_type": "excel",
                 "sheets": sheets_data,
                 "metadata": {
-                    "sheet_count": len(excel_file.sheet_names),
-                    "sheet_names": excel_file.sheet_names,
-                    "size": os.path.getsize(file_path)
+                    "sheet_count": len(sheets_data),
+                    "sheet_names": list(sheets_data.keys()),
+                    "size": os.path.getsize(file_path),
+                    "excel_engine": engine,
+                    "sheet_parse_seconds": sheet_parse_seconds
                 }
             }
         
@@ -102,49 +449,28 @@ class DocumentParser:
             raise Exception(f"Excel parsing failed: {str(e)}")
     
     async def _parse_csv(self, file_path: str, query_context: str) -> Dict[str, Any]:
-        """Parse CSV document."""
+        """Parse CSV document in chunks into Arrow buffers, never holding the whole frame."""
         try:
-            df = pd.read_csv(file_path)
-            
-            # Convert pandas data to JSON-serializable format
-            data_records = df.to_dict('records')
-            
-            # Convert numpy types to Python types
-            for record in data_records:
-                for key, value in record.items():
-                    if pd.isna(value):
-                        record[key] = None
-                    elif hasattr(value, 'item'):  # numpy scalar
-                        record[key] = value.item()
-                    else:
-                        record[key] = str(value) if not isinstance(value, (str, int, float, bool, type(None))) else value
-            
-            # Convert column types to JSON-serializable format
-            dtypes_dict = {}
-            for col, dtype in df.dtypes.items():
-                dtypes_dict[col] = str(dtype)
-            
-            # Convert null counts to regular int
-            null_counts = {}
-            for col, count in df.isnull().sum().items():
-                null_counts[col] = int(count)
+            def collect(chunks: Iterator[pd.DataFrame], dtypes: Dict[str, str]):
+                chunk_tables = []
+                summary = DataFrameSummaryBuilder()
+                for chunk in chunks:
+                    summary.update(chunk)
+                    chunk_tables.append(dataframe_to_arrow(chunk))
+                return chunk_tables, summary
             
+            chunk_tables, summary = self.read_csv_chunked(file_path, CSV_CHUNK_ROWS, collect)
+            columns = summary.columns or []
             return {
                 "filename": Path(file_path).name,
                 "content_type": "csv",
-                "data": data_records,
-                "columns": df.columns.tolist(),
-                "shape": [int(df.shape[0]), int(df.shape[1])],
-                "summary": {
-                    "shape": [int(df.shape[0]), int(df.shape[1])],
-                    "columns": df.columns.tolist(),
-                    "dtypes": dtypes_dict,
-                    "null_counts": null_counts,
-                    "sample_data": data_records[:3] if data_records else []
-                },
+                "data": RowTable.concat(chunk_tables),
+                "columns": columns,
+                "shape": [summary.row_count, len(columns)],
+                "summary": summary.summary(),
                 "metadata": {
-                    "row_count": int(len(df)),
-                    "column_count": int(len(df.columns)),
+                    "row_count": summary.row_count,
+                    "column_count": len(columns),
                     "size": os.path.getsize(file_path)
                 }
             }
@@ -152,6 +478,155 @@ class DocumentParser:
         except Exception as e:
             raise Exception(f"CSV parsing failed: {str(e)}")
     
+    def resolve_excel_engine(self, file_path: str) -> str:
+        """Pick the reader for a workbook, falling back when calamine is not installed."""
+        if self.excel_engine == "openpyxl":
+            return "openpyxl"
+        try:
+            import python_calamine  # noqa: F401
+            return "calamine"
+        except ImportError:
+            if self.excel_engine == "calamine":
+                print("Warning: python-calamine not installed. Falling back to openpyxl for Excel files.")
+        # .xls files are not readable by openpyxl; let pandas pick its default reader
+        return "openpyxl" if Path(file_path).suffix.lower() == '.xlsx' else "default"
+    
+    def iter_excel_sheets(self, file_path: str, engine: Optional[str] = None) -> Iterator[Tuple[str, pd.DataFrame, float]]:
+        """Yield ``(sheet_name, frame, parse_seconds)`` for every sheet of a workbook opened once."""
+        engine = engine or self.resolve_excel_engine(file_path)
+        
+        if engine == "calamine":
+            from python_calamine import CalamineWorkbook
+            workbook = CalamineWorkbook.from_path(file_path)
+            for sheet_name in workbook.sheet_names:
+                started = time.perf_counter()
+                rows = workbook.get_sheet_by_name(sheet_name).to_python()
+                df = self._calamine_frame(rows)
+                yield sheet_name, df, round(time.perf_counter() - started, 4)
+            return
+        
+        with pd.ExcelFile(file_path, engine=None if engine == "default" else engine) as workbook:
+            for sheet_name in workbook.sheet_names:
+                started = time.perf_counter()
+                df = workbook.parse(sheet_name)
+                yield sheet_name, df, round(time.perf_counter() - started, 4)
+    
+    def iter_excel_sheet_chunks(self, file_path: str, chunk_rows: int, as_text: bool = False,
+                                sheet_names: Optional[List[str]] = None) -> Iterator[Tuple[str, Iterator[pd.DataFrame]]]:
+        """Stream an .xlsx workbook in read-only mode, yielding each sheet as bounded-size chunks.
+        
+        Each sheet's chunk iterator must be consumed before moving to the next sheet.
+        With ``as_text`` every column is read as strings.
+        """
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for worksheet in workbook.worksheets:
+                if sheet_names is not None and worksheet.title not in sheet_names:
+                    continue
+                yield worksheet.title, self._iter_worksheet_chunks(worksheet, chunk_rows, as_text)
+        finally:
+            workbook.close()
+    
+    def _iter_worksheet_chunks(self, worksheet, chunk_rows: int, as_text: bool) -> Iterator[pd.DataFrame]:
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        dtypes = {column: "string" for column in self._rows_to_frame(header, []).columns} if as_text else None
+        batch = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                chunk = self._rows_to_frame(header, batch)
+                # The first chunk fixes explicit dtypes so every chunk shares one schema
+                dtypes = dtypes or self._worksheet_dtypes(chunk)
+                yield chunk.astype(dtypes)
+                batch = []
+        if batch or dtypes is None:
+            chunk = self._rows_to_frame(header, batch)
+            yield chunk.astype(dtypes or self._worksheet_dtypes(chunk))
+    
+    def _worksheet_dtypes(self, sample: pd.DataFrame) -> Dict[str, str]:
+        """Explicit dtypes for worksheet chunks, which unlike CSV text carry real dates."""
+        dtypes = self._explicit_dtypes(sample)
+        for col, dtype in sample.dtypes.items():
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                dtypes[col] = "datetime64[ns]"
+        return dtypes
+    
+    def _calamine_frame(self, rows: List[list]) -> pd.DataFrame:
+        """Build a frame from calamine rows with the same value types pandas' openpyxl reader gives."""
+        # calamine returns every number as a float; openpyxl-backed pandas keeps whole numbers as ints
+        rows = [
+            [int(value) if isinstance(value, float) and value.is_integer() else value for value in row]
+            for row in rows
+        ]
+        df = self._rows_to_frame(rows[0] if rows else [], rows[1:], empty_value="")
+        for column in df.select_dtypes(include=['object']).columns:
+            values = df[column].dropna()
+            if len(values) and all(isinstance(value, (datetime.date, datetime.datetime)) for value in values):
+                df[column] = pd.to_datetime(df[column])
+        return df
+    
+    @staticmethod
+    def _rows_to_frame(header, rows, empty_value=None) -> pd.DataFrame:
+        """Build a DataFrame from raw sheet rows, naming blank headers the way pandas does."""
+        columns = [
+            f"Unnamed: {index}" if value is None or value == "" else str(value)
+            for index, value in enumerate(header)
+        ]
+        records = [list(row[:len(columns)]) + [None] * (len(columns) - len(row)) for row in rows]
+        df = pd.DataFrame(records, columns=columns)
+        if empty_value is not None:
+            df = df.replace(empty_value, None)
+        return df.infer_objects()
+    
+    def sniff_csv_dtypes(self, file_path: str, sample_rows: int = CSV_SNIFF_ROWS) -> Dict[str, str]:
+        """Infer explicit column dtypes from the head of a CSV file for chunked reads."""
+        return self._explicit_dtypes(pd.read_csv(file_path, nrows=sample_rows))
+    
+    @staticmethod
+    def _explicit_dtypes(sample: pd.DataFrame) -> Dict[str, str]:
+        """Map a sample frame's inferred dtypes to nullable dtypes safe for later chunks."""
+        dtypes = {}
+        for col, dtype in sample.dtypes.items():
+            if sample[col].isna().all():
+                # Empty in the sample; could hold anything later on
+                dtypes[col] = "string"
+            elif pd.api.types.is_bool_dtype(dtype):
+                dtypes[col] = "boolean"
+            elif pd.api.types.is_integer_dtype(dtype):
+                dtypes[col] = "Int64"
+            elif pd.api.types.is_float_dtype(dtype):
+                dtypes[col] = "float64"
+            else:
+                dtypes[col] = "string"
+        return dtypes
+    
+    def iter_csv_chunks(self, file_path: str, chunk_rows: int, dtypes: Optional[Dict[str, str]] = None) -> Iterator[pd.DataFrame]:
+        """Read a CSV file in bounded-size chunks with explicit dtypes."""
+        if dtypes is None:
+            dtypes = self.sniff_csv_dtypes(file_path)
+        with pd.read_csv(file_path, dtype=dtypes, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield chunk
+    
+    def read_csv_chunked(self, file_path: str, chunk_rows: int,
+                         consume: Callable[[Iterator[pd.DataFrame], Dict[str, str]], Any]) -> Any:
+        """Pass a CSV file's chunks and dtypes to ``consume`` and return its result.
+        
+        The dtypes are sniffed from the head of the file. When a later chunk contradicts
+        them, ``consume`` is called again from the first chunk with every column as text.
+        """
+        dtypes = self.sniff_csv_dtypes(file_path)
+        try:
+            return consume(self.iter_csv_chunks(file_path, chunk_rows, dtypes), dtypes)
+        except (ValueError, TypeError):
+            text_dtypes = {col: "string" for col in dtypes}
+            return consume(self.iter_csv_chunks(file_path, chunk_rows, text_dtypes), text_dtypes)
+    
     def _get_dataframe_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Generate summary statistics for a DataFrame."""
         # Convert to JSON-serializable format
@@ -164,15 +639,7 @@ class DocumentParser:
             null_counts[col] = int(count)
         
         # Convert sample data
-        sample_data = df.head(3).to_dict('records')
-        for record in sample_data:
-            for key, value in record.items():
-                if pd.isna(value):
-                    record[key] = None
-                elif hasattr(value, 'item'):  # numpy scalar
-                    record[key] = value.item()
-                else:
-                    record[key] = str(value) if not isinstance(value, (str, int, float, bool, type(None))) else value
+        sample_data = RowTable.from_dataframe(df.head(3)).rows()
         
         summary = {
             "shape": [int(df.shape[0]), int(df.shape[1])],
@@ -202,11 +669,20 @@ class DocumentParser:
         """Generate summary statistics for a DataFrame with safe JSON conversion."""
         return self._get_dataframe_summary(df)
     
-    async def search_in_document(self, parsed_data: Dict[str, Any], search_terms: List[str]) -> List[Dict[str, Any]]:
-        """Search for specific terms in parsed document data."""
+    async def search_in_document(self, parsed_data: Dict[str, Any], search_terms: List[str],
+                                 columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Search for specific terms in parsed document data.
+        
+        For spreadsheets, ``columns`` restricts the search to the named columns; names
+        are compared case-insensitively with spaces and underscores treated alike, so
+        "assigned_to" matches an "Assigned To" column. The parsed data is never modified.
+        """
         matches = []
         
-        if parsed_data.get("content_type") == "pdf":
+        if parsed_data.get("content_type") == "pdf" and parsed_data.get("metadata", {}).get("sha256"):
+            matches.extend(await self._search_pdf_pages(parsed_data, search_terms))
+        
+        elif parsed_data.get("content_type") == "pdf":
             text = parsed_data.get("extracted_text", "")
             for term in search_terms:
                 if term.lower() in text.lower():
@@ -222,24 +698,75 @@ class DocumentParser:
                     })
         
         elif parsed_data.get("content_type") in ["excel", "csv"]:
-            # Search in structured data
-            data = parsed_data.get("data", [])
-            if parsed_data.get("content_type") == "excel":
-                # Search in all sheets
-                for sheet_name, sheet_data in parsed_data.get("sheets", {}).items():
-                    data.extend(sheet_data.get("data", []))
+            # Search in structured data; rows are numbered across the CSV data and all sheets
+            tables = []
+            if parsed_data.get("data") is not None:
+                tables.append(parsed_data["data"])
+            for sheet_data in parsed_data.get("sheets", {}).values():
+                tables.append(sheet_data["data"])
             
-            for term in search_terms:
-                for row_idx, row in enumerate(data):
-                    for col, value in row.items():
-                        if str(value).lower().find(term.lower()) != -1:
-                            matches.append({
-                                "term": term,
-                                "row": row_idx,
-                                "column": col,
-                                "value": value,
-                                "full_row": row,
-                                "confidence": 0.9
-                            })
+            # All terms are matched in a single scan of each distinct cell value
+            matcher = TermMatcher(search_terms)
+            row_offset = 0
+            for table in tables:
+                hits = []
+                for column_position, col in enumerate(select_columns(table.columns, columns)):
+                    for row_idx, term_indices, value in table.match_column(col, matcher):
+                        hits.extend((term_index, row_idx, column_position, col, value) for term_index in term_indices)
+                
+                # Term-major order, as callers expect; only matched rows are turned into dicts
+                hits.sort(key=lambda hit: hit[:3])
+                matched_rows = sorted({hit[1] for hit in hits})
+                full_rows = dict(zip(matched_rows, table.rows(matched_rows)))
+                for term_index, row_idx, _, col, value in hits:
+                    matches.append({
+                        "term": matcher.terms[term_index],
+                        "row": row_offset + row_idx,
+                        "column": col,
+                        "value": _json_value(value),
+                        "full_row": full_rows[row_idx],
+                        "confidence": 0.9
+                    })
+                row_offset += len(table)
+        
+        return matches
+    
+    async def _search_pdf_pages(self, parsed_data: Dict[str, Any], search_terms: List[str]) -> List[Dict[str, Any]]:
+        """Page-numbered snippets for each term, reading only pages holding all of its trigrams."""
+        page_index = await self.pdf_page_index(parsed_data)
+        all_pages = range(1, parsed_data["metadata"].get("pages", 0) + 1)
+        candidates = {}
+        for term in search_terms:
+            if not term:
+                continue
+            # Terms under three characters have no trigrams and check every page
+            pages = set(all_pages)
+            for gram in trigrams(term.lower()):
+                pages &= set(page_index.get(gram, ()))
+                if not pages:
+                    break
+            candidates[term] = sorted(pages)
+        
+        needed = sorted({page for pages in candidates.values() for page in pages})
+        if not needed:
+            return []
+        texts = await self.read_pdf_pages(parsed_data["path"], parsed_data["metadata"]["sha256"], needed)
         
+        matches = []
+        for term, pages in candidates.items():
+            needle = term.lower()
+            for page in pages:
+                text = texts[page]
+                position = text.lower().find(needle)
+                if position == -1:
+                    # Trigrams all occur on the page but not as this exact phrase
+                    continue
+                start_idx = max(0, position - PDF_SNIPPET_CHARS)
+                end_idx = min(len(text), position + len(term) + PDF_SNIPPET_CHARS)
+                matches.append({
+                    "term": term,
+                    "page": page,
+                    "context": " ".join(text[start_idx:end_idx].split()),
+                    "confidence": 0.8
+                })
         return matches
@@ -1,14 +1,15 @@
 from typing import List, Dict, Any, Optional
-import requests
 import os
 from datetime import datetime, timedelta, timezone
 
+from app.integrations.http import send_request
+
 class GitHubIntegration:
     def __init__(self):
         self.mcp_url = os.getenv("GITHUB_MCP_URL", "http://localhost:3000")
         self.token = os.getenv("GITHUB_TOKEN")
         self.org = os.getenv("GITHUB_ORG", "mayani2002")  # <-- default to your GitHub username
-        self.base_url = "https://api.github.com"
+        self.base_url = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
         self.headers = {
             "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json"
@@ -26,7 +27,7 @@ class GitHubIntegration:
             'per_page': per_page,
             'page': page
         }
-        resp = requests.get(url, headers=self.headers, params=params)
+        resp = send_request("github", "get_prs", "GET", url, headers=self.headers, params=params)
         resp.raise_for_status()
         return resp.json()
 
@@ -34,7 +35,7 @@ class GitHubIntegration:
         if repo is None:
             repo = self.default_repo
         url = f"{self.base_url}/repos/{self.org}/{repo}/pulls/{pr_number}"
-        resp = requests.get(url, headers=self.headers)
+        resp = send_request("github", "get_pr_details", "GET", url, headers=self.headers)
         resp.raise_for_status()
         return resp.json()
 
@@ -42,7 +43,7 @@ class GitHubIntegration:
         if repo is None:
             repo = self.default_repo
         url = f"{self.base_url}/repos/{self.org}/{repo}/pulls/{pr_number}/reviews"
-        resp = requests.get(url, headers=self.headers)
+        resp = send_request("github", "get_pr_reviews", "GET", url, headers=self.headers)
         resp.raise_for_status()
         return resp.json()
 
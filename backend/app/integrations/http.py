@@ -0,0 +1,33 @@
+"""Instrumented HTTP calls to upstream services (GitHub, Jira)."""
+import time
+
+import requests
+
+from app.core.metrics import INTEGRATION_CALL_SECONDS, UPSTREAM_REQUESTS
+from app.core.query_stats import record_upstream_call
+from app.core.tracing import tracer
+from app.services.job_service import checkpoint_current_job
+
+def send_request(integration: str, operation: str, method: str, url: str, **kwargs) -> requests.Response:
+    """``requests.request`` that records latency per operation, the response status and a span.
+
+    Each call is a cancellation point for the background job making it, so paging
+    through GitHub or Jira stops between requests once the job is cancelled.
+    """
+    checkpoint_current_job()
+    with tracer.start_span(f"HTTP {method}", integration=integration, operation=operation,
+                           **{"http.method": method, "http.url": url}) as span:
+        record_upstream_call(integration)
+        started = time.perf_counter()
+        try:
+            response = requests.request(method, url, **kwargs)
+        except requests.RequestException:
+            UPSTREAM_REQUESTS.inc(integration=integration, status="error")
+            raise
+        finally:
+            INTEGRATION_CALL_SECONDS.observe(time.perf_counter() - started, integration=integration, operation=operation)
+        UPSTREAM_REQUESTS.inc(integration=integration, status=str(response.status_code))
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 400:
+            span.status = "error"
+        return response
@@ -4,6 +4,8 @@ import os
 from datetime import datetime
 import base64
 
+from app.integrations.http import send_request
+
 class JiraIntegration:
     def __init__(self):
         self.url = os.getenv("JIRA_URL")
@@ -29,7 +31,7 @@ class JiraIntegration:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = send_request("jira", "get_ticket", "GET", url, headers=self.headers, params=params)
             response.raise_for_status()
             ticket_data = response.json()
             
@@ -64,7 +66,7 @@ class JiraIntegration:
         }
         
         try:
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = send_request("jira", "search_tickets", "POST", url, headers=self.headers, json=payload)
             response.raise_for_status()
             data = response.json()
             
@@ -96,12 +98,12 @@ class JiraIntegration:
             # Get user details
             user_url = f"{self.url}/rest/api/3/user"
             user_params = {"accountId": username}
-            user_response = requests.get(user_url, headers=self.headers, params=user_params)
+            user_response = send_request("jira", "get_user", "GET", user_url, headers=self.headers, params=user_params)
             
             if user_response.status_code != 200:
                 # Try with username instead of accountId
                 user_params = {"username": username}
-                user_response = requests.get(user_url, headers=self.headers, params=user_params)
+                user_response = send_request("jira", "get_user", "GET", user_url, headers=self.headers, params=user_params)
             
             user_data = user_response.json() if user_response.status_code == 200 else {}
             
@@ -111,7 +113,7 @@ class JiraIntegration:
             if project_key:
                 permissions_params["projectKey"] = project_key
             
-            permissions_response = requests.get(permissions_url, headers=self.headers, params=permissions_params)
+            permissions_response = send_request("jira", "get_permissions", "GET", permissions_url, headers=self.headers, params=permissions_params)
             permissions_data = permissions_response.json() if permissions_response.status_code == 200 else {}
             
             return {
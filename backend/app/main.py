@@ -1,6 +1,13 @@
-from fastapi import FastAPI, HTTPException, Depends
+import time
+
+# App import time is measured from here and reported at startup
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+import asyncio
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -11,13 +18,33 @@ load_dotenv(config_path)
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core import metrics
+from app.core.tracing import configure_tracing, tracer
+from app.core.profiler import profiler
+from app.services.container import services
+
+metrics.STARTUP_SECONDS.set(time.perf_counter() - _import_started, phase="import")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create and start the services when the server starts, and stop them on shutdown."""
+    await services.start(settings)
+    startup = metrics.STARTUP_SECONDS.values()
+    loaded = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in metrics.MODULE_IMPORT_SECONDS.values().items())
+    print(f"Startup: app imported in {startup['import'] * 1000:.0f} ms, services started in "
+          f"{startup['services'] * 1000:.0f} ms; heavy modules loaded so far: {loaded or 'none'}")
+    try:
+        yield
+    finally:
+        await services.stop()
 
 app = FastAPI(
     title="Evidence-on-Demand Bot API",
     description="AI-powered evidence retrieval system for audits and compliance",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -29,6 +56,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+configure_tracing(settings.TRACING_EXPORTER, settings.TRACING_FILE)
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Root span per request (joining the caller's ``traceparent``) and profiler request counting."""
+    with tracer.start_span(
+        f"{request.method} {request.url.path}",
+        traceparent=request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.target": request.url.path}
+    ) as span:
+        response = await call_next(request)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.status = "error"
+        response.headers["traceparent"] = span.traceparent
+    # Admin calls and metric scrapes do not use up a profiling session
+    if not request.url.path.startswith(("/api/v1/admin", "/metrics")):
+        profiler.request_finished()
+    return response
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -44,6 +91,16 @@ async def root():
 async def health_check():
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint: stage and upstream latencies, request counts and cache ratios."""
+    if services.shared_metrics is not None:
+        # Merged from the snapshot files of every server worker
+        content = await asyncio.to_thread(services.shared_metrics.render)
+    else:
+        content = metrics.registry.render()
+    return Response(content=content, media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
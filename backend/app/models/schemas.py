@@ -1,4 +1,4 @@
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -9,11 +9,16 @@ class QueryType(str, Enum):
     DOCUMENT = "document"
     MIXED = "mixed"
 
+class QueryMode(str, Enum):
+    SYNC = "sync"
+    ASYNC = "async"
+
 class EvidenceQuery(BaseModel):
     query: str
     query_type: Optional[QueryType] = None
     source: Optional[QueryType] = None  # Backward compatibility field
     filters: Optional[Dict[str, Any]] = None
+    mode: QueryMode = QueryMode.SYNC
     
     @model_validator(mode='after')
     def validate_query_type_compatibility(self):
@@ -31,8 +36,28 @@ class QueryResponse(BaseModel):
     message: str
     evidence: Optional[List[Dict[str, Any]]] = None
     export_url: Optional[str] = None
+    status_url: Optional[str] = None
     created_at: datetime
 
+class QueryStage(BaseModel):
+    name: str
+    status: str
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    evidence_count: Optional[int] = None
+
+class QueryStatus(BaseModel):
+    query_id: str
+    status: str  # queued, running, cancelling, completed, failed, cancelled
+    current_stage: Optional[str] = None
+    stages: List[QueryStage] = []
+    evidence_counts: Dict[str, int] = {}
+    evidence_count: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
 class GitHubPullRequest(BaseModel):
     number: int
     title: str
@@ -69,5 +94,17 @@ class EvidenceItem(BaseModel):
 
 class ExportRequest(BaseModel):
     query_id: str
-    format: str  # csv, xlsx, json
+    format: str  # csv, xlsx, json, parquet, arrow
     include_metadata: bool = True
+    split_by_source: bool = False  # xlsx only: one sheet per source_type
+
+class ProfileRequest(BaseModel):
+    requests: Optional[int] = Field(None, ge=1)  # stop after this many requests
+    seconds: Optional[float] = Field(None, gt=0, le=3600)  # or after this long
+    interval_ms: float = Field(5, ge=1, le=1000)
+    
+    @model_validator(mode='after')
+    def validate_limit(self):
+        if self.requests is None and self.seconds is None:
+            raise ValueError("Set requests, seconds or both")
+        return self
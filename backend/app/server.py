@@ -0,0 +1,160 @@
+"""Production server: several uvicorn worker processes sharing one listening socket.
+
+    cd backend
+    python -m app.server --host 0.0.0.0 --port 8000 --workers 4
+
+The supervisor binds the socket once and starts ``WORKERS`` processes (one per CPU
+when 0), each running the whole app with its own services. A worker that crashes is
+replaced; one that dies while starting up stops the server instead of looping.
+
+On SIGTERM or SIGINT every worker stops accepting connections and finishes the
+requests in flight, waiting at most ``GRACEFUL_SHUTDOWN_SECONDS``. It then runs the
+app shutdown, which lets running background queries complete. Workers still alive
+``SHUTDOWN_MARGIN_SECONDS`` after the drain deadline are killed.
+
+Unless ``COMPUTE_PROCESSES`` is set, the CPUs are split between the workers' compute
+pools rather than each worker starting one process per CPU. Workers publish their
+metrics to a directory of this server run under ``STATE_DIR/metrics``, so ``/metrics``
+on any of them reports the whole server.
+"""
+from multiprocessing.context import SpawnProcess
+from typing import Dict, List, Optional
+import argparse
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Same environment file the app loads, read here so WORKERS and friends apply
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "config", ".env"))
+
+import uvicorn
+from uvicorn._subprocess import get_subprocess
+
+from app.core.config import settings
+
+# A worker exiting sooner than this after its start is treated as failing to boot
+MIN_WORKER_UPTIME_SECONDS = 10
+
+# How often the supervisor checks for exited workers
+MONITOR_INTERVAL_SECONDS = 1
+
+# Time allowed for the app shutdown (background queries, ingestion) after requests drain
+SHUTDOWN_MARGIN_SECONDS = 30
+
+def default_workers() -> int:
+    return settings.WORKERS or os.cpu_count() or 1
+
+class WorkerSupervisor:
+    """Starts, replaces and stops the worker processes of one server."""
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self._processes: List[SpawnProcess] = []
+        self._started_at: Dict[int, float] = {}
+        self._should_exit = threading.Event()
+
+    def run(self) -> int:
+        """Serve until signalled; returns the process exit code."""
+        sock = self.config.bind_socket()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._handle_signal)
+        print(f"Supervisor {os.getpid()} serving http://{self.config.host}:{self.config.port} "
+              f"with {self.workers} workers", flush=True)
+
+        self._processes = [self._spawn(sock) for _ in range(self.workers)]
+        exit_code = 0
+        while not self._should_exit.wait(MONITOR_INTERVAL_SECONDS):
+            failed = self._replace_exited(sock)
+            if failed:
+                exit_code = 1
+                break
+
+        # Closing our copy too, so new connections are refused rather than queued while workers drain
+        sock.close()
+        self._shutdown()
+        return exit_code
+
+    def _spawn(self, sock: socket.socket) -> SpawnProcess:
+        server = uvicorn.Server(self.config)
+        process = get_subprocess(config=self.config, target=server.run, sockets=[sock])
+        process.start()
+        self._started_at[process.pid] = time.monotonic()
+        return process
+
+    def _replace_exited(self, sock: socket.socket) -> bool:
+        """Restart crashed workers; returns True when one failed during startup."""
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            uptime = time.monotonic() - self._started_at.pop(process.pid, 0)
+            if uptime < MIN_WORKER_UPTIME_SECONDS:
+                print(f"Worker {process.pid} exited with code {process.exitcode} after {uptime:.1f}s; "
+                      f"stopping the server", flush=True)
+                return True
+            print(f"Warning: worker {process.pid} exited with code {process.exitcode}; starting a replacement", flush=True)
+            self._processes[index] = self._spawn(sock)
+        return False
+
+    def _shutdown(self):
+        """Ask every worker to drain and exit, killing the ones that overrun."""
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + (self.config.timeout_graceful_shutdown or 0) + SHUTDOWN_MARGIN_SECONDS
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        for process in self._processes:
+            if process.is_alive():
+                print(f"Warning: worker {process.pid} did not stop in time; killing it", flush=True)
+                process.kill()
+                process.join()
+        print(f"Supervisor {os.getpid()} stopped", flush=True)
+
+    def _handle_signal(self, sig: int, frame):
+        self._should_exit.set()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--graceful-shutdown-seconds", type=int, default=settings.GRACEFUL_SHUTDOWN_SECONDS,
+                        help="How long a stopping worker waits for requests in flight")
+    parser.add_argument("--timeout-keep-alive", type=int, default=5)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    workers = max(1, args.workers)
+
+    # Workers read this when they build their compute pools
+    if "COMPUTE_PROCESSES" not in os.environ:
+        os.environ["COMPUTE_PROCESSES"] = str(max(1, (os.cpu_count() or 1) // workers))
+    # Workers read these from their settings; a fresh directory starts the counters at zero
+    metrics_root = os.path.join(settings.STATE_DIR, "metrics")
+    os.makedirs(metrics_root, exist_ok=True)
+    metrics_dir = tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=metrics_root)
+    os.environ["SERVER_WORKERS"] = str(workers)
+    os.environ["METRICS_DIR"] = metrics_dir
+
+    config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        timeout_keep_alive=args.timeout_keep_alive,
+        timeout_graceful_shutdown=args.graceful_shutdown_seconds
+    )
+    try:
+        return WorkerSupervisor(config, workers).run()
+    finally:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,53 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
-import openai
 import os
 import re
+import time
+
+from app.core.lazy_imports import LazyModule
+from app.core.metrics import INTEGRATION_CALL_SECONDS, UPSTREAM_REQUESTS
+from app.core.query_stats import record_upstream_call
+from app.core.tracing import tracer
+
+openai = LazyModule("openai")
 
 class AIService:
     def __init__(self):
         api_key = os.getenv("OPENAI_API_KEY")
+        self._client = None
         if api_key and api_key != "sk-your-openai-api-key-here":
-            self.client = openai.OpenAI(api_key=api_key)
+            self._api_key = api_key
             self.enabled = True
         else:
-            self.client = None
+            self._api_key = None
             self.enabled = False
             print("Warning: OpenAI API key not configured. AI features will be disabled.")
     
+    @property
+    def client(self):
+        """OpenAI client, created (and the openai package imported) on first use."""
+        if self._client is None and self.enabled:
+            self._client = openai.OpenAI(api_key=self._api_key, base_url=os.getenv("OPENAI_BASE_URL") or None)
+        return self._client
+    
+    def _complete(self, operation: str, **kwargs):
+        """Chat completion that records latency per operation, the response status and a span."""
+        with tracer.start_span("llm.chat_completion", operation=operation, model=kwargs.get("model")) as span:
+            record_upstream_call("openai")
+            started = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                UPSTREAM_REQUESTS.inc(integration="openai", status=str(getattr(e, "status_code", None) or "error"))
+                raise
+            finally:
+                INTEGRATION_CALL_SECONDS.observe(time.perf_counter() - started, integration="openai", operation=operation)
+            UPSTREAM_REQUESTS.inc(integration="openai", status="200")
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                span.set_attribute("llm.total_tokens", usage.total_tokens)
+            return response
+    
     async def process_query(self, query: str) -> Dict[str, Any]:
         """Process natural language query and extract intent and parameters."""
         if not self.enabled:
@@ -45,7 +78,8 @@ class AIService:
             
             # Try GPT-4 first, fallback to GPT-3.5-turbo
             try:
-                response = self.client.chat.completions.create(
+                response = self._complete(
+                    "process_query",
                     model="gpt-4",
                     messages=[
                         {"role": "system", "content": system_prompt},
@@ -55,7 +89,8 @@ class AIService:
                 )
             except Exception as gpt4_error:
                 print(f"GPT-4 not available, trying GPT-3.5-turbo: {str(gpt4_error)}")
-                response = self.client.chat.completions.create(
+                response = self._complete(
+                    "process_query",
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": system_prompt},
@@ -82,7 +117,7 @@ class AIService:
         """
         # Use AI if enabled, otherwise fallback
         if not self.enabled:
-            result = self._process_query_fallback(natural_query)
+            result = self._process_query_github_fallback(natural_query)
         else:
             try:
                 system_prompt = """
@@ -101,7 +136,8 @@ class AIService:
                   "parameters": { ... }
                 }
                 """
-                response = self.client.chat.completions.create(
+                response = self._complete(
+                    "process_query_github",
                     model="gpt-4",
                     messages=[
                         {"role": "system", "content": system_prompt},
@@ -153,7 +189,8 @@ class AIService:
             
             # Try GPT-4 first, fallback to GPT-3.5-turbo
             try:
-                response = self.client.chat.completions.create(
+                response = self._complete(
+                    "format_evidence",
                     model="gpt-4",
                     messages=[
                         {"role": "system", "content": system_prompt},
@@ -163,7 +200,8 @@ class AIService:
                 )
             except Exception as gpt4_error:
                 print(f"GPT-4 not available for formatting, trying GPT-3.5-turbo: {str(gpt4_error)}")
-                response = self.client.chat.completions.create(
+                response = self._complete(
+                    "format_evidence",
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": system_prompt},
@@ -0,0 +1,47 @@
+from typing import Any, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import threading
+
+class ComputePool:
+    """Process pool for CPU-bound parsing and scoring work.
+
+    With ``processes`` set to 0 the work runs on the event loop's default thread
+    executor instead, which keeps local development simple.
+    """
+
+    def __init__(self, processes: int = 0):
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run a picklable module-level function in the pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    async def warm(self, func: Callable[..., Any], *args):
+        """Start the worker processes and run ``func`` in them, so the first real task
+        does not pay for spawning an interpreter and importing its libraries."""
+        if self.processes <= 0:
+            return
+        await asyncio.gather(*[self.run(func, *args) for _ in range(self.processes)])
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.processes <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the API process runs job and ingestion threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
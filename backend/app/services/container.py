@@ -0,0 +1,156 @@
+"""The long-lived services of one API process.
+
+They are created and started by the app lifespan rather than at import time. That
+keeps importing the API cheap and free of filesystem side effects, which matters for
+tests, tooling and every newly spawned worker.
+"""
+from typing import List, Optional
+import asyncio
+import os
+import time
+
+from app.core.config import Settings
+from app.core.lazy_imports import HEAVY_MODULES, import_modules
+from app.core.metrics import STARTUP_SECONDS
+from app.core.shared_files import ProcessLease
+from app.core.shared_metrics import SharedMetrics
+from app.services.ai_service import AIService
+from app.integrations.github_integration import GitHubIntegration
+from app.integrations.jira_integration import JiraIntegration
+from app.integrations.document_parser import DocumentParser
+from app.services.evidence_service import EvidenceService
+from app.services.job_service import JobService, TERMINAL_STATUSES
+from app.services.document_store import DocumentStore
+from app.services.document_index import DocumentIndex
+from app.services.compute_pool import ComputePool
+from app.services.ingestion_service import IngestionService, FINISHED_STATUSES
+from app.services.slow_query_log import SlowQueryLog
+from app.services.status_store import StatusStore
+
+# Background pre-warming steps run after startup, in this order
+PREWARM_STEPS = ["imports", "index", "compute"]
+
+class ServiceContainer:
+    """One instance of each service, available once ``start`` has run."""
+
+    def __init__(self):
+        self.started = False
+        self._prewarm_task: Optional[asyncio.Task] = None
+
+    def __getattr__(self, name: str):
+        # Only reached for services that have not been created yet
+        if name.startswith("__"):
+            raise AttributeError(name)
+        raise RuntimeError(f"{name} is not available until the app lifespan has started the services")
+
+    def create(self, settings: Settings):
+        """Build the services; heavy libraries are left to load on first use."""
+        # Lets other server workers see whether this process is still running
+        self.lease = ProcessLease(os.path.join(settings.STATE_DIR, "leases"))
+        # Under app.server, /metrics reports every worker rather than just this one
+        self.shared_metrics = SharedMetrics(settings.METRICS_DIR, self.lease) if settings.METRICS_DIR else None
+        self.ai_service = AIService()
+        self.github_integration = GitHubIntegration()
+        self.jira_integration = JiraIntegration()
+        self.evidence_service = EvidenceService(
+            max_export_bytes=settings.EXPORT_CACHE_MAX_BYTES,
+            journal_compact_bytes=settings.RESULTS_JOURNAL_COMPACT_BYTES
+        )
+        self.job_service = JobService(
+            StatusStore(os.path.join(settings.STATE_DIR, "jobs"), self.lease,
+                        terminal_statuses=TERMINAL_STATUSES,
+                        retention_seconds=settings.STATUS_RETENTION_SECONDS),
+            max_workers=settings.QUERY_WORKERS
+        )
+        self.document_store = DocumentStore(
+            upload_dir=settings.UPLOAD_DIR,
+            max_file_size=settings.MAX_FILE_SIZE,
+            allowed_extensions=settings.ALLOWED_EXTENSIONS
+        )
+        self.document_index = DocumentIndex(storage_dir=settings.INDEX_DIR)
+        self.compute_pool = ComputePool(processes=settings.COMPUTE_PROCESSES)
+        self.document_parser = DocumentParser(
+            excel_engine=settings.EXCEL_ENGINE,
+            pdf_cache_dir=settings.PDF_CACHE_DIR,
+            page_runner=self.compute_pool.run
+        )
+        self.slow_query_log = SlowQueryLog(
+            path=settings.SLOW_QUERY_LOG,
+            threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+            max_bytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backups=settings.SLOW_QUERY_LOG_BACKUPS
+        )
+        self.ingestion_service = IngestionService(
+            self.document_store,
+            self.document_index,
+            self.compute_pool,
+            self.document_parser,
+            StatusStore(os.path.join(settings.STATE_DIR, "ingestions"), self.lease,
+                        terminal_statuses=FINISHED_STATUSES,
+                        retention_seconds=settings.STATUS_RETENTION_SECONDS),
+            workers=settings.INGESTION_WORKERS,
+            csv_chunk_rows=settings.CSV_CHUNK_ROWS,
+            excel_engine=settings.EXCEL_ENGINE,
+            excel_streaming_min_bytes=settings.EXCEL_STREAMING_MIN_BYTES,
+            name_max_distance=settings.NAME_MATCH_MAX_DISTANCE
+        )
+
+    async def start(self, settings: Settings):
+        """Create the services, start ingestion and kick off background pre-warming."""
+        started = time.perf_counter()
+        self.create(settings)
+        if self.shared_metrics is not None:
+            self.shared_metrics.start()
+        # Ingestion workers also index documents uploaded before this process started
+        await self.ingestion_service.start()
+        self.started = True
+        STARTUP_SECONDS.set(time.perf_counter() - started, phase="services")
+
+        steps = [step.strip() for step in settings.PREWARM.split(",") if step.strip() and step.strip() != "none"]
+        unknown = [step for step in steps if step not in PREWARM_STEPS]
+        if unknown:
+            print(f"Warning: ignoring unknown PREWARM steps: {', '.join(unknown)}")
+        steps = [step for step in PREWARM_STEPS if step in steps]
+        if steps:
+            self._prewarm_task = asyncio.create_task(self.prewarm(steps))
+
+    async def prewarm(self, steps: List[str]):
+        """Load libraries, index tables and compute workers before the first query needs them."""
+        started = time.perf_counter()
+        modules = list(HEAVY_MODULES) + (["openai"] if self.ai_service.enabled else [])
+        done = []
+        try:
+            if "imports" in steps:
+                await asyncio.to_thread(import_modules, modules)
+                done.append("imports")
+            if "index" in steps:
+                tables = await asyncio.to_thread(self.document_index.warm)
+                done.append(f"{tables} index tables")
+            if "compute" in steps and self.compute_pool.processes > 0:
+                await self.compute_pool.warm(import_modules, HEAVY_MODULES)
+                done.append(f"{self.compute_pool.processes} compute workers")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warning: pre-warming stopped early: {str(e)}")
+        elapsed = time.perf_counter() - started
+        STARTUP_SECONDS.set(elapsed, phase="prewarm")
+        print(f"Pre-warmed {', '.join(done) or 'nothing'} in {elapsed * 1000:.0f} ms")
+
+    async def stop(self):
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+            await asyncio.gather(self._prewarm_task, return_exceptions=True)
+            self._prewarm_task = None
+        if self.started:
+            # Running background queries finish before the process exits
+            await asyncio.to_thread(self.job_service.shutdown)
+            await self.ingestion_service.stop()
+            self.compute_pool.shutdown()
+            if self.shared_metrics is not None:
+                # Last snapshot while the lease is still held, so other workers keep our counts
+                self.shared_metrics.stop()
+            self.lease.release()
+            self.started = False
+
+services = ServiceContainer()
@@ -0,0 +1,491 @@
+from __future__ import annotations
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from functools import lru_cache
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app.core.lazy_imports import LazyModule
+from app.core.shared_files import file_lock
+from app.core.metrics import record_cache_lookup
+from app.integrations.document_parser import DocumentParser, DataFrameSummaryBuilder, RowTable, dataframe_to_arrow
+from app.services.document_search import build_row_text, normalize_column_name, score_rows
+from app.services.name_index import MappedNameIndex, NameIndex, is_person_column
+
+pd = LazyModule("pandas")
+pa = LazyModule("pyarrow")
+pc = LazyModule("pyarrow.compute")
+
+# Hidden column holding each row's lowercased search text
+ROW_TEXT_COLUMN = "__row_text"
+
+def build_document_tables(file_path: str, output_dir: str, csv_chunk_rows: int = 100000,
+                          excel_engine: str = "auto", excel_streaming_min_bytes: int = 50 * 1024 * 1024) -> Dict[str, Any]:
+    """Parse a document and write each sheet as a memory-mappable Arrow IPC file.
+
+    Runs inside a compute pool worker, so only small metadata is returned to the
+    caller; row data is handed over through the Arrow files. CSV files, and .xlsx
+    workbooks of at least ``excel_streaming_min_bytes``, are read in chunks of
+    ``csv_chunk_rows`` so memory stays bounded regardless of file size.
+    """
+    parser = DocumentParser(excel_engine=excel_engine)
+    file_extension = Path(file_path).suffix.lower()
+
+    if file_extension == '.pdf':
+        return asyncio.run(build_pdf_tables(parser, file_path, output_dir))
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    if file_extension == '.csv':
+        table_path = os.path.join(output_dir, "0.arrow")
+        started = time.perf_counter()
+        table = parser.read_csv_chunked(
+            file_path, csv_chunk_rows,
+            lambda chunks, dtypes: _write_chunked_table(chunks, table_path, _empty_frame(dtypes))
+        )
+        table["sheet"] = Path(file_path).stem
+        table["parse_seconds"] = round(time.perf_counter() - started, 4)
+        return {
+            "content_type": "csv",
+            "tables": [table],
+            "text": "",
+            "metadata": {
+                "sheet_names": [table["sheet"]],
+                "row_count": table["rows"],
+                "size": os.path.getsize(file_path)
+            }
+        }
+
+    if file_extension == '.xlsx' and os.path.getsize(file_path) >= excel_streaming_min_bytes:
+        tables = _write_streamed_workbook(parser, file_path, output_dir, csv_chunk_rows)
+        return _excel_result(file_path, tables, "openpyxl-read-only")
+
+    engine = parser.resolve_excel_engine(file_path)
+    tables = []
+    for table_index, (sheet_name, df, seconds) in enumerate(parser.iter_excel_sheets(file_path, engine)):
+        table = dataframe_to_arrow(df)
+        table = table.append_column(ROW_TEXT_COLUMN, pa.array(_row_texts(df), type=pa.string()))
+
+        table_path = os.path.join(output_dir, f"{table_index}.arrow")
+        _write_table(table, table_path)
+
+        tables.append({
+            "sheet": str(sheet_name),
+            "path": table_path,
+            "rows": int(df.shape[0]),
+            "columns": [str(column) for column in df.columns],
+            "summary": parser._get_dataframe_summary_safe(df),
+            "parse_seconds": seconds
+        })
+
+    return _excel_result(file_path, tables, engine)
+
+async def build_pdf_tables(parser: DocumentParser, file_path: str, output_dir: str) -> Dict[str, Any]:
+    """Extract a PDF page by page and index its page-numbered passages as one Arrow table.
+
+    Pages are extracted through the parser's page runner, so with a compute pool
+    attached they are spread across worker processes. Every other blocking step runs
+    in a thread, so this is safe to await on the server's event loop.
+    """
+    parsed_data = await parser.parse_document(file_path)
+    if parsed_data.get("error"):
+        raise ValueError(parsed_data["error"])
+    passages = await parser.pdf_passages(parsed_data)
+
+    table_path = os.path.join(output_dir, "0.arrow")
+    await asyncio.to_thread(_write_passage_table, passages, table_path)
+
+    return {
+        "content_type": "pdf",
+        "tables": [{
+            "sheet": "passages",
+            "path": table_path,
+            "rows": len(passages),
+            "columns": ["page", "passage", "text"]
+        }],
+        "text": "",
+        "metadata": parsed_data.get("metadata", {})
+    }
+
+def _write_passage_table(passages: List[Dict[str, Any]], table_path: str):
+    os.makedirs(os.path.dirname(table_path), exist_ok=True)
+    texts = [passage["text"] for passage in passages]
+    table = pa.table({
+        "page": pa.array([passage["page"] for passage in passages], type=pa.int32()),
+        "passage": pa.array([passage["passage"] for passage in passages], type=pa.int32()),
+        "text": pa.array(texts, type=pa.string()),
+        ROW_TEXT_COLUMN: pa.array([text.lower() for text in texts], type=pa.string())
+    })
+    _write_table(table, table_path)
+
+def _write_table(table: pa.Table, table_path: str):
+    """Atomically write a table as an Arrow IPC file."""
+    tmp_path = f"{table_path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, table_path)
+
+def _excel_result(file_path: str, tables: List[Dict[str, Any]], engine: str) -> Dict[str, Any]:
+    return {
+        "content_type": "excel",
+        "tables": tables,
+        "text": "",
+        "metadata": {
+            "sheet_names": [table["sheet"] for table in tables],
+            "row_count": sum(table["rows"] for table in tables),
+            "size": os.path.getsize(file_path),
+            "excel_engine": engine,
+            "sheet_parse_seconds": {table["sheet"]: table["parse_seconds"] for table in tables}
+        }
+    }
+
+def _write_streamed_workbook(parser: DocumentParser, file_path: str, output_dir: str,
+                             chunk_rows: int) -> List[Dict[str, Any]]:
+    """Write every sheet of a large workbook chunk by chunk from a read-only handle."""
+    tables = []
+    sheets = parser.iter_excel_sheet_chunks(file_path, chunk_rows)
+    try:
+        for table_index, (sheet_name, chunks) in enumerate(sheets):
+            started = time.perf_counter()
+            table_path = os.path.join(output_dir, f"{table_index}.arrow")
+            try:
+                table = _write_chunked_table(chunks, table_path)
+            except (ValueError, TypeError):
+                # A later chunk contradicted the first chunk's dtypes; re-read this sheet as text
+                text_sheets = parser.iter_excel_sheet_chunks(
+                    file_path, chunk_rows, as_text=True, sheet_names=[sheet_name]
+                )
+                try:
+                    _, text_chunks = next(text_sheets)
+                    table = _write_chunked_table(text_chunks, table_path)
+                finally:
+                    text_sheets.close()
+            table["sheet"] = str(sheet_name)
+            table["parse_seconds"] = round(time.perf_counter() - started, 4)
+            tables.append(table)
+    finally:
+        # Closes the read-only workbook handle
+        sheets.close()
+    return tables
+
+def _empty_frame(dtypes: Dict[str, str]) -> pd.DataFrame:
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()})
+
+def _write_chunked_table(chunks: Iterable[pd.DataFrame], table_path: str,
+                         empty_frame: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Stream DataFrame chunks into an Arrow IPC file, building the summary as we go."""
+    summary = DataFrameSummaryBuilder()
+    tmp_path = f"{table_path}.tmp"
+    writer = None
+    schema = None
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            for chunk in chunks:
+                summary.update(chunk)
+                table = dataframe_to_arrow(chunk)
+                table = table.append_column(ROW_TEXT_COLUMN, pa.array(_row_texts(chunk), type=pa.string()))
+                if writer is None:
+                    # The first chunk fixes the file schema; explicit dtypes keep later chunks castable
+                    schema = table.schema
+                    writer = pa.ipc.new_file(sink, schema)
+                writer.write_table(table.cast(schema))
+
+            if writer is None:
+                # Header-only file
+                empty = empty_frame if empty_frame is not None else pd.DataFrame()
+                summary.update(empty)
+                table = dataframe_to_arrow(empty).append_column(ROW_TEXT_COLUMN, pa.array([], type=pa.string()))
+                writer = pa.ipc.new_file(sink, table.schema)
+                writer.write_table(table)
+            writer.close()
+        os.replace(tmp_path, table_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "path": table_path,
+        "rows": summary.row_count,
+        "columns": [str(column) for column in (summary.columns or [])],
+        "summary": summary.summary()
+    }
+
+def score_table_range(table_path: str, start: int, end: int, query_text: str, query_intent: str, search_terms: set) -> List[Tuple[int, float, str]]:
+    """Score rows [start, end) of an indexed table straight from its memory-mapped file."""
+    with pa.memory_map(table_path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+        row_texts = table.column(ROW_TEXT_COLUMN).slice(start, end - start).to_pylist()
+    return score_rows(row_texts, start, query_text, query_intent, search_terms)
+
+def _row_texts(df: pd.DataFrame) -> List[str]:
+    """Lowercased search text per row, built column by column."""
+    if len(df.columns) == 0:
+        return [""] * len(df)
+    columns = []
+    for column in df.columns:
+        series = df[column]
+        columns.append(series.astype(str).str.lower().where(series.notna(), None).tolist())
+    return [build_row_text(values) for values in zip(*columns)]
+
+def build_name_index(tables: List[Dict[str, Any]], max_distance: int) -> NameIndex:
+    """Fuzzy index over the distinct values of person-like columns. Runs in compute pool workers."""
+    name_index = NameIndex(max_distance=max_distance)
+    for table_index, table_info in enumerate(tables):
+        columns = [column for column in table_info["columns"] if is_person_column(normalize_column_name(column))]
+        if not columns:
+            continue
+        with pa.memory_map(table_info["path"], "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            for column in columns:
+                for value in table.column(column).unique().to_pylist():
+                    if isinstance(value, str):
+                        name_index.add(value, (table_index, column))
+    return name_index
+
+# Snapshot catalog: one row per indexed document. Name-index tables are stored as
+# Arrow IPC streams inside the row, so they are read straight from the mapped file.
+NAME_INDEX_TABLES = ["variants", "tokens", "names", "settings"]
+
+@lru_cache(maxsize=None)
+def catalog_schema() -> pa.Schema:
+    return pa.schema(
+        [("document_id", pa.string()), ("entry", pa.string())]
+        + [(f"name_{key}", pa.large_binary()) for key in NAME_INDEX_TABLES]
+    )
+
+SNAPSHOT_POINTER = "CURRENT"
+# Older snapshot files kept around for workers that have not switched yet
+SNAPSHOTS_KEPT = 3
+
+def _ipc_bytes(table: pa.Table) -> pa.Buffer:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+class _Snapshot:
+    """One published version of the corpus catalog, memory-mapped read-only."""
+
+    def __init__(self, version: int, catalog: Optional[pa.Table] = None, stamp: Optional[Tuple[int, int]] = None):
+        self.version = version
+        self.catalog = catalog
+        self.stamp = stamp
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.positions: Dict[str, int] = {}
+        self._name_indexes: Dict[str, Optional[MappedNameIndex]] = {}
+        if catalog is not None:
+            document_ids = catalog.column("document_id").to_pylist()
+            for position, (document_id, entry) in enumerate(zip(document_ids, catalog.column("entry").to_pylist())):
+                self.entries[document_id] = json.loads(entry)
+                self.positions[document_id] = position
+
+    def name_index(self, document_id: str) -> Optional[MappedNameIndex]:
+        """The document's name index, read zero-copy from the snapshot on first use."""
+        if document_id not in self._name_indexes:
+            position = self.positions.get(document_id)
+            name_index = None
+            if position is not None and self.catalog.column("name_names")[position].is_valid:
+                name_index = MappedNameIndex({
+                    key: pa.ipc.open_stream(self.catalog.column(f"name_{key}")[position].as_buffer()).read_all()
+                    for key in NAME_INDEX_TABLES
+                })
+            self._name_indexes[document_id] = name_index
+        return self._name_indexes[document_id]
+
+class DocumentIndex:
+    """Search structures for documents that have finished ingestion.
+
+    The catalog of indexed documents, with their name indexes, is published as
+    versioned, read-only snapshot files under ``<storage_dir>/snapshots``. A
+    ``CURRENT`` pointer names the latest one and is swapped atomically. Every process
+    memory-maps the same files and switches to a new snapshot when the pointer
+    changes, so several API workers share one copy of the corpus.
+    """
+
+    def __init__(self, storage_dir: str = "storage/index"):
+        self.storage_dir = storage_dir
+        self.snapshot_dir = os.path.join(storage_dir, "snapshots")
+        self._pointer_path = os.path.join(self.snapshot_dir, SNAPSHOT_POINTER)
+        self._snapshot = _Snapshot(0)
+        self._tables: Dict[str, pa.Table] = {}
+        self._lock = threading.Lock()
+        self._publish_thread_lock = threading.Lock()
+
+    @staticmethod
+    def document_id(document: Dict[str, Any]) -> str:
+        """Stable key for a stored document (content hash, or file name for legacy files)."""
+        return document.get("sha256") or f"legacy:{document['filename']}"
+
+    def storage_dir_for(self, document: Dict[str, Any]) -> str:
+        """Directory holding a document's Arrow tables."""
+        key = hashlib.sha256(self.document_id(document).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.storage_dir, key)
+
+    def build_entry(self, document: Dict[str, Any], tables_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Describe a document from the output of ``build_document_tables``."""
+        return {
+            "document_id": self.document_id(document),
+            "filename": document["filename"],
+            "path": document["path"],
+            "content_type": tables_result["content_type"],
+            "tables": tables_result["tables"],
+            "row_count": sum(table["rows"] for table in tables_result["tables"]),
+            "text": tables_result.get("text", ""),
+            "metadata": tables_result.get("metadata", {}),
+            "indexed_at": datetime.now().isoformat()
+        }
+
+    def add(self, entry: Dict[str, Any], name_index: Optional[NameIndex] = None):
+        """Publish an entry (and its person-name index, if any) in a new snapshot."""
+        self._publish(upserts={entry["document_id"]: (entry, name_index)}, removals=set())
+
+    def remove(self, document_id: str):
+        self._publish(upserts={}, removals={document_id})
+
+    def contains(self, document_id: str) -> bool:
+        return document_id in self.snapshot().entries
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().entries.get(document_id)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """All fully indexed documents."""
+        return list(self.snapshot().entries.values())
+
+    @property
+    def version(self) -> int:
+        return self.snapshot().version
+
+    def snapshot(self) -> _Snapshot:
+        """The current snapshot, switching to a newer one if another process published it."""
+        try:
+            stat = os.stat(self._pointer_path)
+        except FileNotFoundError:
+            return self._snapshot
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if self._snapshot.stamp == stamp:
+                return self._snapshot
+        snapshot = self._load_current(stamp)
+        with self._lock:
+            if snapshot.version >= self._snapshot.version:
+                if snapshot.version != self._snapshot.version:
+                    # Table files may have been rewritten in place by re-ingestion
+                    self._tables.clear()
+                self._snapshot = snapshot
+            return self._snapshot
+
+    def _load_current(self, stamp: Optional[Tuple[int, int]]) -> _Snapshot:
+        with open(self._pointer_path, "r") as f:
+            filename = f.read().strip()
+        version = int(filename.split("-")[1].split(".")[0])
+        catalog = pa.ipc.open_file(pa.memory_map(os.path.join(self.snapshot_dir, filename), "r")).read_all()
+        return _Snapshot(version, catalog, stamp)
+
+    def _publish(self, upserts: Dict[str, Tuple[Dict[str, Any], Optional[NameIndex]]], removals: set):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with self._publish_thread_lock, file_lock(os.path.join(self.snapshot_dir, "publish.lock")):
+            # Merge onto the newest snapshot on disk, which may come from another process
+            base = self._load_current(None) if os.path.exists(self._pointer_path) else _Snapshot(0)
+
+            parts = []
+            kept = [
+                position for document_id, position in base.positions.items()
+                if document_id not in upserts and document_id not in removals
+            ]
+            if kept:
+                parts.append(base.catalog.take(pa.array(kept, type=pa.int64())).cast(catalog_schema()))
+            if upserts:
+                columns = {"document_id": [], "entry": []}
+                columns.update({f"name_{key}": [] for key in NAME_INDEX_TABLES})
+                for document_id, (entry, name_index) in upserts.items():
+                    columns["document_id"].append(document_id)
+                    columns["entry"].append(json.dumps(entry, default=str))
+                    name_tables = name_index.to_tables() if name_index is not None and len(name_index) else {}
+                    for key in NAME_INDEX_TABLES:
+                        columns[f"name_{key}"].append(
+                            _ipc_bytes(name_tables[key]).to_pybytes() if name_tables else None
+                        )
+                parts.append(pa.table(columns, schema=catalog_schema()))
+            catalog = pa.concat_tables(parts) if parts else catalog_schema().empty_table()
+
+            version = base.version + 1
+            filename = f"snapshot-{version:010d}.arrow"
+            _write_table(catalog, os.path.join(self.snapshot_dir, filename))
+
+            tmp_pointer = f"{self._pointer_path}.tmp"
+            with open(tmp_pointer, "w") as f:
+                f.write(filename)
+            os.replace(tmp_pointer, self._pointer_path)
+
+            self._prune_snapshots(version)
+        self.snapshot()
+
+    def _prune_snapshots(self, current_version: int):
+        """Delete old snapshot files; processes still mapping them keep their pages until they switch."""
+        for filename in os.listdir(self.snapshot_dir):
+            if filename.startswith("snapshot-") and filename.endswith(".arrow"):
+                version = int(filename.split("-")[1].split(".")[0])
+                if version <= current_version - SNAPSHOTS_KEPT:
+                    os.remove(os.path.join(self.snapshot_dir, filename))
+
+    def warm(self) -> int:
+        """Map every indexed table and name index ahead of the first query; returns the table count."""
+        snapshot = self.snapshot()
+        tables = 0
+        for entry in snapshot.entries.values():
+            for table in entry.get("tables", []):
+                self._load_table(table["path"])
+                tables += 1
+            snapshot.name_index(entry["document_id"])
+        return tables
+
+    def materialize_rows(self, entry: Dict[str, Any], row_refs: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """Turn (table index, row index) references into JSON-ready row dicts, keeping their order."""
+        by_table: Dict[int, List[int]] = {}
+        for table_index, row_index in row_refs:
+            by_table.setdefault(table_index, []).append(row_index)
+        
+        materialized = {}
+        for table_index, row_indices in by_table.items():
+            table = self._load_table(entry["tables"][table_index]["path"]).drop([ROW_TEXT_COLUMN])
+            for row_index, row in zip(row_indices, RowTable(table).rows(row_indices)):
+                materialized[(table_index, row_index)] = row
+        return [dict(materialized[ref]) for ref in row_refs]
+
+    def fuzzy_name_rows(self, entry: Dict[str, Any], name: str, top_k: int = 10) -> List[Tuple[int, int, str, int]]:
+        """Rows whose person columns approximately match ``name``.
+
+        Returns ``(table index, row index, matched name, edit distance)`` for the
+        top-k closest distinct names.
+        """
+        name_index = self.snapshot().name_index(entry["document_id"])
+        if name_index is None:
+            return []
+
+        rows = []
+        for matched_name, distance, locations in name_index.lookup(name, top_k):
+            for table_index, column in sorted(locations):
+                table = self._load_table(entry["tables"][table_index]["path"])
+                # Whitespace was normalized when indexing, so compare the same way
+                values = pc.utf8_trim_whitespace(table.column(column).cast(pa.string()))
+                mask = pc.equal(pc.replace_substring_regex(values, r"\s+", " "), matched_name)
+                for row_index in pc.indices_nonzero(pc.fill_null(mask, False)).to_pylist():
+                    rows.append((table_index, row_index, matched_name, distance))
+        return rows
+
+    def _load_table(self, table_path: str) -> pa.Table:
+        """Memory-map an indexed table (zero-copy) and keep it for reuse."""
+        with self._lock:
+            table = self._tables.get(table_path)
+            record_cache_lookup("index_table", hit=table is not None)
+            if table is None:
+                table = pa.ipc.open_file(pa.memory_map(table_path, "r")).read_all()
+                self._tables[table_path] = table
+            return table
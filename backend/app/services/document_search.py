@@ -0,0 +1,289 @@
+"""Pure relevance scoring helpers for document search.
+
+Kept free of FastAPI and service state so they can run inside worker processes.
+"""
+from typing import Dict, List, Optional, Tuple, Iterable
+from collections import deque
+import re
+
+# Minimum relevance for a row to count as a match
+RELEVANCE_THRESHOLD = 0.3
+
+def build_row_text(values: Iterable) -> str:
+    """Lowercased searchable text for a row's values."""
+    return " ".join(str(value).lower() for value in values if value is not None)
+
+def extract_meaningful_terms(query_text: str, query_intent: str, parameters: dict) -> set:
+    """Extract meaningful search terms, filtering out stop words and common words."""
+    
+    # Common stop words that don't add meaning to search
+    stop_words = {
+        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'in', 'is', 'it', 
+        'its', 'of', 'on', 'that', 'the', 'to', 'was', 'will', 'with', 'would', 'this', 'these', 'they',
+        'them', 'their', 'there', 'then', 'than', 'or', 'but', 'if', 'so', 'up', 'out', 'off', 'over',
+        'under', 'again', 'further', 'then', 'once', 'here', 'when', 'where', 'why', 'how', 'all', 'any',
+        'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own',
+        'same', 'so', 'than', 'too', 'very', 'can', 'could', 'should', 'would', 'may', 'might', 'must',
+        'shall', 'will', 'do', 'does', 'did', 'have', 'has', 'had', 'having', 'being', 'been'
+    }
+    
+    # Extract terms from query text
+    query_terms = set()
+    for word in query_text.lower().split():
+        # Remove punctuation and check if it's meaningful
+        clean_word = word.strip('.,!?;:"()[]{}')
+        if clean_word and len(clean_word) > 1 and clean_word not in stop_words:
+            query_terms.add(clean_word)
+    
+    # Extract terms from query intent
+    intent_terms = set()
+    for word in query_intent.lower().split():
+        clean_word = word.strip('.,!?;:"()[]{}')
+        if clean_word and len(clean_word) > 1 and clean_word not in stop_words:
+            intent_terms.add(clean_word)
+    
+    # Extract terms from parameters
+    param_terms = set()
+    for param_value in parameters.values():
+        if isinstance(param_value, str):
+            for word in param_value.lower().split():
+                clean_word = word.strip('.,!?;:"()[]{}')
+                if clean_word and len(clean_word) > 1 and clean_word not in stop_words:
+                    param_terms.add(clean_word)
+    
+    # Combine all meaningful terms
+    all_terms = query_terms.union(intent_terms).union(param_terms)
+    
+    # Special handling for common query patterns
+    if 'list' in query_text.lower() and 'assigned' in query_text.lower():
+        # For "list assets assigned to [person]" queries
+        all_terms.add('assigned')
+        all_terms.add('asset')
+    
+    if 'count' in query_text.lower():
+        all_terms.add('count')
+    
+    if 'find' in query_text.lower():
+        all_terms.add('find')
+    
+    return all_terms
+
+def calculate_row_relevance(row_text: str, query_text: str, query_intent: str, search_terms: set,
+                            matched_terms: Optional[set] = None) -> float:
+    """Calculate relevance score for a data row (given as its lowercased text) based on query.
+    
+    ``matched_terms`` are the search terms already found in ``row_text``; they are
+    looked up here when not given.
+    """
+    try:
+        if not row_text:
+            return 0.0
+        if matched_terms is None:
+            matched_terms = {term for term in search_terms if term in row_text}
+        
+        # Base score from keyword matches
+        keyword_matches = len(matched_terms)
+        base_score = keyword_matches / len(search_terms) if search_terms else 0
+        
+        # Boost score for exact phrase matches
+        phrase_boost = 0.0
+        if query_text.lower() in row_text:
+            phrase_boost = 0.3
+        
+        # Boost score for intent-specific matches
+        intent_boost = 0.0
+        if query_intent and any(word in row_text for word in query_intent.split()):
+            intent_boost = 0.2
+        
+        # Boost score for common query patterns
+        pattern_boost = 0.0
+        
+        # Handle "assigned to [person]" queries
+        if "assigned" in query_text.lower() and "to" in query_text.lower():
+            # Look for assignment-related fields
+            assignment_fields = ['assigned', 'assignee', 'owner', 'user', 'person', 'employee']
+            if any(field in row_text for field in assignment_fields):
+                pattern_boost = 0.5
+                # Extra boost if we find a name match
+                if any(len(term) > 2 for term in matched_terms):  # Likely a name
+                    pattern_boost += 0.3
+        
+        # Handle "count" queries
+        elif "count" in query_text.lower():
+            if matched_terms:
+                pattern_boost = 0.4
+        
+        # Handle "list" queries
+        elif "list" in query_text.lower():
+            if matched_terms:
+                pattern_boost = 0.3
+        
+        # Handle specific device/asset queries
+        elif "laptop" in query_text.lower():
+            if "laptop" in row_text:
+                pattern_boost = 0.4
+        elif "apple" in query_text.lower():
+            if "apple" in row_text:
+                pattern_boost = 0.4
+        elif "office" in query_text.lower():
+            if "office" in row_text:
+                pattern_boost = 0.3
+        
+        # Calculate final relevance score
+        relevance = min(1.0, base_score + phrase_boost + intent_boost + pattern_boost)
+        
+        return relevance
+        
+    except Exception as e:
+        print(f"Error calculating row relevance: {str(e)}")
+        return 0.0
+
+def calculate_text_relevance(text: str, query_text: str, search_terms: set) -> float:
+    """Calculate relevance score for text content."""
+    try:
+        text_lower = text.lower()
+        
+        # Base score from keyword matches
+        keyword_matches = sum(1 for term in search_terms if term in text_lower)
+        base_score = keyword_matches / len(search_terms) if search_terms else 0
+        
+        # Boost for exact phrase matches
+        phrase_boost = 0.3 if query_text.lower() in text_lower else 0.0
+        
+        return min(1.0, base_score + phrase_boost)
+        
+    except Exception as e:
+        print(f"Error calculating text relevance: {str(e)}")
+        return 0.0
+
+def get_match_reason(row_text: str, query_text: str, search_terms: set,
+                     matched_terms: Optional[set] = None) -> str:
+    """Generate a human-readable reason for why a row matched."""
+    try:
+        
+        # Find which terms matched
+        if matched_terms is None:
+            matched_terms = [term for term in search_terms if term in row_text]
+        else:
+            matched_terms = [term for term in search_terms if term in matched_terms]
+        
+        # Special handling for assignment queries
+        if "assigned" in query_text.lower() and "to" in query_text.lower():
+            # Look for name matches in the row
+            name_matches = [term for term in matched_terms if len(term) > 2]
+            
+            if name_matches:
+                return f"Assigned to: {', '.join(name_matches[:2])}"
+            elif any(field in row_text for field in ['assigned', 'assignee', 'owner']):
+                return "Contains assignment information"
+        
+        # Special handling for count queries
+        elif "count" in query_text.lower():
+            if matched_terms:
+                return f"Countable items: {', '.join(matched_terms[:2])}"
+        
+        # Special handling for list queries
+        elif "list" in query_text.lower():
+            if matched_terms:
+                return f"List items: {', '.join(matched_terms[:2])}"
+        
+        # General matching
+        if matched_terms:
+            return f"Matches: {', '.join(matched_terms[:3])}"
+        else:
+            return "Relevant data found"
+            
+    except Exception as e:
+        return "Relevant data found"
+
+def score_rows(row_texts: Iterable[str], start: int, query_text: str, query_intent: str, search_terms: set) -> List[Tuple[int, float, str]]:
+    """Score a contiguous range of rows, returning (row index, relevance, reason) for matches."""
+    matches = []
+    # Every term is found in one scan per row, then shared by scoring and the match reason
+    matcher = TermMatcher(sorted(search_terms))
+    for offset, text in enumerate(row_texts):
+        if not text:
+            continue
+        matched_terms = {matcher.terms[index] for index in matcher.find(text)}
+        relevance_score = calculate_row_relevance(text, query_text, query_intent, search_terms, matched_terms)
+        # Only include rows with meaningful relevance
+        if relevance_score > RELEVANCE_THRESHOLD:
+            matches.append((start + offset, relevance_score, get_match_reason(text, query_text, search_terms, matched_terms)))
+    return matches
+
+def extract_assignee_name(query_text: str) -> Optional[str]:
+    """The person named in an "assigned to <name>" query, if any."""
+    match = re.search(r"assigned to\s+([a-z][a-z.'\- ]*)", query_text.lower())
+    if not match:
+        return None
+    words = [word for word in match.group(1).split() if word not in ('the', 'a', 'an', 'me', 'them')]
+    return " ".join(words[:3]) or None
+
+def normalize_column_name(name: str) -> str:
+    """Canonical column name, so "Assigned To" and "assigned_to" refer to the same column."""
+    return re.sub(r"[^0-9a-z]+", "_", str(name).lower()).strip("_")
+
+def select_columns(columns: List[str], wanted: Optional[Iterable[str]]) -> List[str]:
+    """Columns to search: all of them, or those matching ``wanted`` after normalization."""
+    if not wanted:
+        return list(columns)
+    wanted_names = {normalize_column_name(name) for name in wanted}
+    return [column for column in columns if normalize_column_name(column) in wanted_names]
+
+class TermMatcher:
+    """Aho-Corasick automaton that finds every search term in a string in one scan.
+
+    Matching is case-insensitive substring matching, so overlapping terms such as
+    "jane" and "jane smith" are both reported.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = [term for term in dict.fromkeys(terms) if term]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for term_index, term in enumerate(self.terms):
+            state = 0
+            for char in term.lower():
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(term_index)
+
+        # Breadth-first pass to link failure transitions and inherit their outputs;
+        # depth-one states keep failing back to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+        # Cheap C-level prefilter: a text matches some term iff this finds anything
+        self._any = re.compile("|".join(re.escape(term.lower()) for term in self.terms)) if self.terms else None
+
+    def find(self, text: str) -> List[int]:
+        """Indices (into ``self.terms``) of the terms occurring in ``text``, in term order."""
+        if self._any is None:
+            return []
+        text = text.lower()
+        if not self._any.search(text):
+            return []
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found.update(self._output[state])
+        return sorted(found)
@@ -0,0 +1,129 @@
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from app.core.shared_files import file_lock, read_json, write_json_atomic
+
+# Bytes read from the upload stream per iteration
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class FileTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+class DocumentStore:
+    """Content-addressed storage for uploaded documents."""
+
+    def __init__(self, upload_dir: str = "uploads", max_file_size: int = 10 * 1024 * 1024,
+                 allowed_extensions: Optional[List[str]] = None):
+        self.upload_dir = upload_dir
+        self.max_file_size = max_file_size
+        self.allowed_extensions = allowed_extensions or ['.pdf', '.xlsx', '.xls', '.csv']
+        self.manifest_file = os.path.join(upload_dir, "manifest.json")
+        self.manifest_lock = os.path.join(upload_dir, ".manifest.lock")
+        os.makedirs(self.upload_dir, exist_ok=True)
+
+    async def save_upload(self, filename: str, read_chunk: Callable[[int], Awaitable[bytes]]) -> Dict[str, Any]:
+        """Stream an upload to disk while hashing it, then move it to its content address.
+
+        Returns the stored document record with ``duplicate`` set when the content
+        was already known, in which case nothing new is written.
+        """
+        extension = Path(filename).suffix.lower()
+        hasher = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.upload_dir, prefix=".upload_", suffix=extension)
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                while True:
+                    chunk = await read_chunk(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_file_size:
+                        raise FileTooLargeError(
+                            f"File exceeds maximum upload size of {self.max_file_size} bytes"
+                        )
+                    hasher.update(chunk)
+                    buffer.write(chunk)
+
+            sha256 = hasher.hexdigest()
+            # Held across check and write so two server workers cannot both store the same content
+            with file_lock(self.manifest_lock):
+                manifest = self._load_manifest()
+                known = manifest.get(sha256)
+                if known and os.path.exists(os.path.join(self.upload_dir, known["stored_name"])):
+                    return self._to_record(sha256, known, duplicate=True)
+
+                entry = {
+                    "filename": Path(filename).name,
+                    "stored_name": f"{sha256}{extension}",
+                    "size": size,
+                    "uploaded_at": datetime.now().isoformat()
+                }
+                os.replace(tmp_path, os.path.join(self.upload_dir, entry["stored_name"]))
+                manifest[sha256] = entry
+                self._save_manifest(manifest)
+            return self._to_record(sha256, entry, duplicate=False)
+
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_document(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Look up a stored document by content hash."""
+        entry = self._load_manifest().get(sha256)
+        if not entry:
+            return None
+        return self._to_record(sha256, entry, duplicate=False)
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """List searchable documents, including files copied in before content addressing."""
+        if not os.path.exists(self.upload_dir):
+            return []
+
+        manifest = self._load_manifest()
+        by_stored_name = {entry["stored_name"]: (sha256, entry) for sha256, entry in manifest.items()}
+
+        documents = []
+        for stored_name in sorted(os.listdir(self.upload_dir)):
+            file_path = os.path.join(self.upload_dir, stored_name)
+            if stored_name.startswith(".") or not os.path.isfile(file_path):
+                continue
+            if Path(stored_name).suffix.lower() not in self.allowed_extensions:
+                continue
+
+            if stored_name in by_stored_name:
+                sha256, entry = by_stored_name[stored_name]
+                documents.append(self._to_record(sha256, entry, duplicate=False))
+            else:
+                documents.append({
+                    "sha256": None,
+                    "filename": stored_name,
+                    "path": file_path,
+                    "size": os.path.getsize(file_path),
+                    "uploaded_at": None
+                })
+
+        return documents
+
+    def _to_record(self, sha256: str, entry: Dict[str, Any], duplicate: bool) -> Dict[str, Any]:
+        return {
+            "sha256": sha256,
+            "filename": entry["filename"],
+            "path": os.path.join(self.upload_dir, entry["stored_name"]),
+            "size": entry["size"],
+            "uploaded_at": entry["uploaded_at"],
+            "duplicate": duplicate
+        }
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Load the hash -> original filename manifest."""
+        return read_json(self.manifest_file, default={})
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        """Atomically replace the manifest file."""
+        write_json_atomic(self.manifest_file, manifest, indent=2)
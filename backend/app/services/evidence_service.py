@@ -1,15 +1,45 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+import asyncio
 import json
 import csv
+import io
 import os
-from datetime import datetime
+import time
+import uuid
+import hashlib
+from datetime import datetime, timezone
 from pathlib import Path
 
+from app.core.metrics import record_cache_lookup
+from app.services.result_journal import ResultJournal
+
+# Fixed leading columns of every flattened evidence row; data fields follow as data_<key>
+BASE_COLUMNS = ["source", "source_type", "title", "description", "confidence_score", "timestamp"]
+
+# Per-item provenance columns dropped when an export is requested without metadata
+METADATA_COLUMNS = ["confidence_score", "timestamp"]
+
+EXPORT_FORMATS = ["json", "csv", "xlsx", "xls", "parquet", "arrow"]
+
+EXCEL_FORMATS = ["xlsx", "xls"]
+
+# Rows buffered per chunk when streaming exports
+STREAM_BATCH_ROWS = 500
+
+# Rows per record batch (and Parquet row group) in columnar exports
+COLUMNAR_BATCH_ROWS = 64 * 1024
+
+# No export takes this long to write; older temporary files were left by a crashed writer
+EXPORT_TMP_GRACE_SECONDS = 3600
+
 class EvidenceService:
-    def __init__(self):
+    def __init__(self, max_export_bytes: int = 500 * 1024 * 1024, journal_compact_bytes: int = 16 * 1024 * 1024):
         self.storage_dir = "storage"
         os.makedirs(self.storage_dir, exist_ok=True)
         self.results_file = os.path.join(self.storage_dir, "query_results.json")
+        self.results = ResultJournal(self.results_file, compact_bytes=journal_compact_bytes)
+        self.export_dir = os.path.join(self.storage_dir, "exports")
+        self.max_export_bytes = max_export_bytes
     
     async def store_query_result(self, query_id: str, query: str, evidence: List[Dict[str, Any]], summary: str) -> Dict[str, Any]:
         """Store query results to local storage."""
@@ -19,134 +49,392 @@ class EvidenceService:
             "evidence": evidence,
             "summary": summary,
             "created_at": datetime.now().isoformat(),
-            "evidence_count": len(evidence)
+            "evidence_count": len(evidence),
+            "columns": self._column_schema(evidence)
         }
         
-        # Load existing results
-        results = self._load_results()
-        results[query_id] = result
-        
-        # Save updated results
-        self._save_results(results)
+        # Durable once this returns; concurrent writers share one fsync
+        await asyncio.to_thread(self.results.append, result)
         
         return result
     
     async def get_query_result(self, query_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve query results from storage."""
-        results = self._load_results()
-        return results.get(query_id)
-    
-    async def export_evidence(self, query_id: str, evidence: List[Dict[str, Any]], format: str) -> str:
-        """Export evidence to specified format."""
-        export_dir = os.path.join(self.storage_dir, "exports")
-        os.makedirs(export_dir, exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"evidence_{query_id}_{timestamp}.{format}"
-        file_path = os.path.join(export_dir, filename)
-        
-        if format.lower() == "json":
-            await self._export_json(evidence, file_path)
-        elif format.lower() == "csv":
-            await self._export_csv(evidence, file_path)
-        elif format.lower() in ["xlsx", "xls"]:
-            await self._export_excel(evidence, file_path)
-        else:
+        # Catching up with the journal reads files, so keep it off the event loop
+        return await asyncio.to_thread(self.results.get, query_id)
+    
+    async def export_evidence(self, query_id: str, evidence: List[Dict[str, Any]], format: str, columns: Optional[List[str]] = None, include_metadata: bool = True, split_by_source: bool = False, check_cache: bool = True) -> Tuple[str, bool]:
+        """Export evidence to specified format, reusing the cached artifact when one exists.
+        
+        ``columns`` selects and orders the exported columns; None exports the full schema.
+        Returns the artifact path and whether it came from the cache. Callers that already
+        looked the artifact up pass ``check_cache=False``, so each request counts one lookup.
+        """
+        format = format.lower()
+        if format not in EXPORT_FORMATS:
             raise ValueError(f"Unsupported export format: {format}")
         
+        # Stored results never change, so the export options fully determine the artifact
+        if check_cache:
+            cached_path = self.get_cached_export(query_id, format, include_metadata, split_by_source, columns)
+            if cached_path:
+                return cached_path, True
+        
+        os.makedirs(self.export_dir, exist_ok=True)
+        file_path = os.path.join(self.export_dir, self._export_filename(query_id, format, include_metadata, split_by_source, columns))
+        
+        # Serializing and writing the artifact is blocking, so it runs in a worker thread
+        await asyncio.to_thread(self._write_export, evidence, file_path, format, columns, include_metadata, split_by_source)
+        return file_path, False
+    
+    def get_cached_export(self, query_id: str, format: str, include_metadata: bool = True, split_by_source: bool = False, columns: Optional[List[str]] = None) -> Optional[str]:
+        """Return the cached export artifact for these options, if it exists."""
+        file_path = os.path.join(self.export_dir, self._export_filename(query_id, format.lower(), include_metadata, split_by_source, columns))
+        if not os.path.exists(file_path):
+            record_cache_lookup("export", hit=False)
+            return None
+        record_cache_lookup("export", hit=True)
+        
+        # Record the access for LRU eviction; mtime is left alone so ETags stay stable
+        now = time.time()
+        try:
+            os.utime(file_path, (now, os.stat(file_path).st_mtime))
+        except OSError:
+            return None
         return file_path
     
-    def _load_results(self) -> Dict[str, Any]:
-        """Load results from storage file."""
-        if os.path.exists(self.results_file):
+    def get_export_columns(self, result: Dict[str, Any]) -> List[str]:
+        """Return the flattened column schema for a stored result."""
+        # Results stored before column metadata existed get a cheap key-only pass
+        return result.get("columns") or self._column_schema(result.get("evidence", []))
+    
+    def iter_csv(self, result: Dict[str, Any], columns: Optional[List[str]] = None) -> Iterator[str]:
+        """Stream a stored result as CSV text chunks without materializing all rows."""
+        columns = columns or self.get_export_columns(result)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        
+        for index, item in enumerate(result.get("evidence", []), 1):
+            writer.writerow(self._flatten_item(item))
+            if index % STREAM_BATCH_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    def iter_ndjson(self, result: Dict[str, Any]) -> Iterator[str]:
+        """Stream a stored result as newline-delimited JSON, one evidence item per line."""
+        lines = []
+        for item in result.get("evidence", []):
+            lines.append(json.dumps(item, default=str))
+            if len(lines) >= STREAM_BATCH_ROWS:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        
+        if lines:
+            yield "\n".join(lines) + "\n"
+    
+    def _column_schema(self, evidence: List[Dict[str, Any]]) -> List[str]:
+        """Compute ordered CSV columns from evidence keys, without flattening values."""
+        columns = list(BASE_COLUMNS)
+        seen = set(columns)
+        for item in evidence:
+            for key in (item.get("data") or {}):
+                column = f"data_{key}"
+                if column not in seen:
+                    seen.add(column)
+                    columns.append(column)
+        return columns
+    
+    def _flatten_item(self, item: Dict[str, Any], stringify: bool = True) -> Dict[str, Any]:
+        """Flatten an evidence item into a single CSV-style row."""
+        flat_item = {column: item.get(column) for column in BASE_COLUMNS}
+        
+        # Add key data fields
+        data = item.get("data") or {}
+        for key, value in data.items():
+            if not stringify or isinstance(value, (str, int, float, bool)):
+                flat_item[f"data_{key}"] = value
+            else:
+                flat_item[f"data_{key}"] = str(value)
+        
+        return flat_item
+    
+    def _export_filename(self, query_id: str, format: str, include_metadata: bool, split_by_source: bool, columns: Optional[List[str]] = None) -> str:
+        """Content-addressed file name for an export artifact."""
+        # Only workbooks have sheets to split, so other formats share one artifact either way
+        if format not in EXCEL_FORMATS:
+            split_by_source = False
+        key = json.dumps([query_id, format, include_metadata, split_by_source, columns])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        return f"evidence_{query_id}_{digest}.{format}"
+    
+    def _evict_exports(self, keep: Optional[str] = None):
+        """Evict least recently used export artifacts once the cache exceeds its size budget.
+        
+        Temporary files of writes abandoned more than ``EXPORT_TMP_GRACE_SECONDS`` ago are
+        always removed.
+        """
+        entries = []
+        total_size = 0
+        tmp_cutoff = time.time() - EXPORT_TMP_GRACE_SECONDS
+        for filename in os.listdir(self.export_dir):
+            file_path = os.path.join(self.export_dir, filename)
             try:
-                with open(self.results_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
-    
-    def _save_results(self, results: Dict[str, Any]):
-        """Save results to storage file."""
-        with open(self.results_file, 'w') as f:
-            json.dump(results, f, indent=2, default=str)
-    
-    async def _export_json(self, evidence: List[Dict[str, Any]], file_path: str):
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            if filename.startswith("tmp_"):
+                if stat.st_mtime < tmp_cutoff:
+                    try:
+                        os.remove(file_path)
+                    except OSError:
+                        pass
+                continue
+            entries.append((stat.st_atime, stat.st_size, file_path))
+            total_size += stat.st_size
+        
+        if total_size <= self.max_export_bytes:
+            return
+        
+        for _, size, file_path in sorted(entries):
+            if total_size <= self.max_export_bytes:
+                break
+            if file_path == keep:
+                continue
+            try:
+                os.remove(file_path)
+                total_size -= size
+            except OSError:
+                continue
+    
+    def _write_export(self, evidence: List[Dict[str, Any]], file_path: str, format: str, columns: Optional[List[str]], include_metadata: bool, split_by_source: bool):
+        """Write an export artifact to ``file_path`` and evict old ones. Blocking."""
+        columns = columns or self._column_schema(evidence)
+        if not include_metadata:
+            columns = [column for column in columns if column not in METADATA_COLUMNS]
+        
+        # Write under a temporary name so readers never see a partial artifact
+        tmp_path = os.path.join(self.export_dir, f"tmp_{uuid.uuid4().hex}_{os.path.basename(file_path)}")
+        try:
+            if format == "json":
+                if not include_metadata:
+                    evidence = [{key: value for key, value in item.items() if key not in METADATA_COLUMNS} for item in evidence]
+                self._export_json(evidence, tmp_path)
+            elif format == "csv":
+                self._export_csv(evidence, tmp_path, columns=columns)
+            elif format in ["parquet", "arrow"]:
+                self._export_columnar(evidence, tmp_path, columns, format)
+            else:
+                self._export_excel(evidence, tmp_path, columns=columns, split_by_source=split_by_source)
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        self._evict_exports(keep=file_path)
+    
+    def _load_results(self) -> Dict[str, Any]:
+        """All stored results by query id."""
+        return self.results.all()
+    
+    def _export_json(self, evidence: List[Dict[str, Any]], file_path: str):
         """Export evidence to JSON format."""
         with open(file_path, 'w') as f:
             json.dump(evidence, f, indent=2, default=str)
     
-    async def _export_csv(self, evidence: List[Dict[str, Any]], file_path: str):
+    def _export_csv(self, evidence: List[Dict[str, Any]], file_path: str, columns: Optional[List[str]] = None):
         """Export evidence to CSV format."""
-        if not evidence:
-            return
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in self.iter_csv({"evidence": evidence}, columns=columns):
+                f.write(chunk)
+    
+    def _export_excel(self, evidence: List[Dict[str, Any]], file_path: str, columns: Optional[List[str]] = None, split_by_source: bool = False):
+        """Export evidence to Excel format, writing rows incrementally."""
+        try:
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        except ImportError:
+            raise ValueError("Excel export requires openpyxl to be installed")
+        
+        columns = columns or self._column_schema(evidence)
+        header = [self._excel_label(column) for column in columns]
+        
+        # Write-only mode streams each sheet to disk instead of building it in memory
+        workbook = Workbook(write_only=True)
+        sheets = {}
+        
+        def sheet_for(item: Dict[str, Any]):
+            title = str(item.get("source_type") or "unknown")[:31] if split_by_source else "Evidence"
+            if title not in sheets:
+                sheet = workbook.create_sheet(title=title)
+                sheet.append(header)
+                sheets[title] = sheet
+            return sheets[title]
         
-        # Flatten evidence items for CSV
-        flattened_data = []
         for item in evidence:
-            flat_item = {
-                "source": item.get("source"),
-                "source_type": item.get("source_type"),
-                "title": item.get("title"),
-                "description": item.get("description"),
-                "confidence_score": item.get("confidence_score"),
-                "timestamp": item.get("timestamp")
-            }
-            
-            # Add key data fields
-            data = item.get("data", {})
-            for key, value in data.items():
-                if isinstance(value, (str, int, float, bool)):
-                    flat_item[f"data_{key}"] = value
-                else:
-                    flat_item[f"data_{key}"] = str(value)
-            
-            flattened_data.append(flat_item)
-        
-        # Write to CSV
-        if flattened_data:
-            fieldnames = set()
-            for item in flattened_data:
-                fieldnames.update(item.keys())
-            
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=list(fieldnames))
-                writer.writeheader()
-                writer.writerows(flattened_data)
-    
-    async def _export_excel(self, evidence: List[Dict[str, Any]], file_path: str):
-        """Export evidence to Excel format."""
+            sheet = sheet_for(item)
+            flat_item = self._flatten_item(item)
+            row = []
+            for column in columns:
+                value = self._excel_value(column, flat_item.get(column))
+                if isinstance(value, str):
+                    value = ILLEGAL_CHARACTERS_RE.sub("", value)
+                    if value.startswith("="):
+                        # Keep user data that looks like a formula as plain text
+                        cell = WriteOnlyCell(sheet, value=value)
+                        cell.data_type = "s"
+                        value = cell
+                row.append(value)
+            sheet.append(row)
+        
+        if not sheets:
+            sheet_for({})
+        
+        workbook.save(file_path)
+    
+    def _export_columnar(self, evidence: List[Dict[str, Any]], file_path: str, columns: List[str], format: str):
+        """Export evidence to Parquet (zstd) or Arrow IPC, one record batch at a time.
+        
+        Column types come from the first batch, and later batches are cast to them. A later
+        batch that cannot be cast (say, text in a column typed int) widens the types and the
+        file is written again, so only unrepresentative first batches cost a second pass.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError(f"{format} export requires pyarrow to be installed")
+        
+        column_types = None
+        while True:
+            column_types = self._write_columnar(pa, pq, evidence, file_path, columns, format, column_types)
+            if column_types is None:
+                return
+    
+    def _write_columnar(self, pa, pq, evidence: List[Dict[str, Any]], file_path: str, columns: List[str], format: str,
+                        column_types: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """Write one columnar pass; returns widened column types if a batch did not fit, else None."""
+        arrow_types = {
+            "bool": pa.bool_(),
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "timestamp": pa.timestamp("us", tz="UTC"),
+            "str": pa.string()
+        }
+        writer = None
         try:
-            import pandas as pd
-            
-            # Convert evidence to DataFrame
-            df_data = []
-            for item in evidence:
-                row = {
-                    "Source": item.get("source"),
-                    "Source Type": item.get("source_type"),
-                    "Title": item.get("title"),
-                    "Description": item.get("description"),
-                    "Confidence Score": item.get("confidence_score"),
-                    "Timestamp": item.get("timestamp")
-                }
+            for start in range(0, max(len(evidence), 1), COLUMNAR_BATCH_ROWS):
+                rows = [self._flatten_item(item, stringify=False) for item in evidence[start:start + COLUMNAR_BATCH_ROWS]]
+                batch_types = self._infer_column_types(rows, columns)
+                if column_types is None:
+                    # Columns with no values yet are stored as text
+                    column_types = {column: batch_types[column] or "str" for column in columns}
+                else:
+                    widened = {column: self._widen_column_type(column_types[column], batch_types[column]) for column in columns}
+                    if widened != column_types:
+                        return widened
                 
-                # Add data fields
-                data = item.get("data", {})
-                for key, value in data.items():
-                    if isinstance(value, (str, int, float, bool)):
-                        row[f"Data: {key}"] = value
+                if writer is None:
+                    schema = pa.schema([pa.field(column, arrow_types[column_types[column]]) for column in columns])
+                    if format == "parquet":
+                        writer = pq.ParquetWriter(file_path, schema, compression="zstd")
                     else:
-                        row[f"Data: {key}"] = str(value)
-                
-                df_data.append(row)
-            
-            df = pd.DataFrame(df_data)
-            df.to_excel(file_path, index=False)
-            
-        except ImportError:
-            # Fallback to CSV if pandas not available
-            csv_path = file_path.replace('.xlsx', '.csv').replace('.xls', '.csv')
-            await self._export_csv(evidence, csv_path)
-            return csv_path
-    
\ No newline at end of file
+                        writer = pa.ipc.new_file(file_path, schema)
+                if rows:
+                    writer.write_batch(pa.record_batch(
+                        [[self._columnar_value(row.get(column), column_types[column]) for row in rows] for column in columns],
+                        schema=schema
+                    ))
+        finally:
+            if writer is not None:
+                writer.close()
+        return None
+    
+    def _infer_column_types(self, rows: List[Dict[str, Any]], columns: List[str]) -> Dict[str, Optional[str]]:
+        """Derive a column type (bool, int, float, timestamp or str) from flattened rows.
+        
+        Columns without any values get None.
+        """
+        kinds = {column: set() for column in columns}
+        for flat_item in rows:
+            for column in columns:
+                value = flat_item.get(column)
+                if value is None:
+                    continue
+                if isinstance(value, bool):
+                    kinds[column].add("bool")
+                elif isinstance(value, int):
+                    kinds[column].add("int")
+                elif isinstance(value, float):
+                    kinds[column].add("float")
+                elif column == "timestamp" and self._parse_timestamp(value) is not None:
+                    kinds[column].add("timestamp")
+                else:
+                    kinds[column].add("str")
+        
+        column_types = {}
+        for column, column_kinds in kinds.items():
+            if not column_kinds:
+                column_types[column] = None
+            elif len(column_kinds) == 1:
+                column_types[column] = column_kinds.pop()
+            elif column_kinds == {"int", "float"}:
+                column_types[column] = "float"
+            else:
+                # Mixed columns are stored as text
+                column_types[column] = "str"
+        return column_types
+    
+    def _widen_column_type(self, column_type: str, batch_type: Optional[str]) -> str:
+        """The narrowest type holding both a column's values and a new batch's."""
+        if batch_type is None or batch_type == column_type or column_type == "str":
+            return column_type
+        if {column_type, batch_type} == {"int", "float"}:
+            return "float"
+        return "str"
+    
+    def _columnar_value(self, value: Any, column_type: str) -> Any:
+        """Coerce a flattened value to its inferred column type."""
+        if value is None:
+            return None
+        if column_type == "float":
+            return float(value)
+        if column_type == "timestamp":
+            return self._parse_timestamp(value)
+        if column_type == "str" and not isinstance(value, str):
+            return json.dumps(value, default=str) if isinstance(value, (dict, list)) else str(value)
+        return value
+    
+    def _parse_timestamp(self, value: Any) -> Optional[datetime]:
+        """Parse an ISO-8601 timestamp as an aware UTC datetime."""
+        if isinstance(value, datetime):
+            parsed = value
+        elif isinstance(value, str) and value:
+            try:
+                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+        else:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+    
+    def _excel_label(self, column: str) -> str:
+        """Human-readable Excel header for a flattened column name."""
+        if column.startswith("data_"):
+            return f"Data: {column[len('data_'):]}"
+        return column.replace("_", " ").title()
+    
+    def _excel_value(self, column: str, value: Any) -> Any:
+        """Convert a flattened value into a typed Excel cell value."""
+        if column == "timestamp" and isinstance(value, str) and value:
+            parsed = self._parse_timestamp(value)
+            # Excel has no timezone support; store as naive UTC
+            return parsed.replace(tzinfo=None) if parsed else value
+        return value
@@ -0,0 +1,183 @@
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import os
+import uuid
+
+from app.core.tracing import tracer
+from app.services.compute_pool import ComputePool
+from app.integrations.document_parser import DocumentParser
+from app.services.document_index import DocumentIndex, build_document_tables, build_name_index, build_pdf_tables
+from app.services.document_store import DocumentStore
+from app.services.status_store import StatusStore
+
+# Statuses of ingestions that still have work to do
+IN_FLIGHT_STATUSES = ("queued", "parsing")
+
+# Statuses of ingestions that are done, successfully or not
+FINISHED_STATUSES = ("indexed", "failed")
+
+class IngestionService:
+    """Background queue that parses uploaded documents and publishes them to the index.
+
+    Each ingestion moves through ``queued`` -> ``parsing`` -> ``indexed`` (or ``failed``).
+    Statuses live in a ``StatusStore``, so any server worker can report on an ingestion
+    that another worker is running. The store should treat ``FINISHED_STATUSES`` as
+    terminal, which keeps ``pending_count`` to the ingestions still in flight.
+    """
+
+    def __init__(self, document_store: DocumentStore, document_index: DocumentIndex,
+                 compute_pool: ComputePool, document_parser: DocumentParser,
+                 status_store: StatusStore, workers: int = 2,
+                 csv_chunk_rows: int = 100000, excel_engine: str = "auto",
+                 excel_streaming_min_bytes: int = 50 * 1024 * 1024, name_max_distance: int = 2):
+        self.compute_pool = compute_pool
+        self.document_parser = document_parser
+        self.document_store = document_store
+        self.document_index = document_index
+        self.workers = workers
+        self.csv_chunk_rows = csv_chunk_rows
+        self.excel_engine = excel_engine
+        self.excel_streaming_min_bytes = excel_streaming_min_bytes
+        self.name_max_distance = name_max_distance
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._statuses = status_store
+        # Latest ingestion id per document
+        self._latest_by_document = StatusStore(os.path.join(status_store.directory, "by_document"), status_store.lease)
+
+    async def start(self):
+        """Start the worker tasks and queue any stored documents that are not indexed yet.
+
+        A document is skipped while the process that last took it is still running,
+        so server workers starting together do not parse the same file. Work left
+        behind by a worker that exited is picked up again.
+        """
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(worker_id)) for worker_id in range(self.workers)
+        ]
+
+        for document in self.document_store.list_documents():
+            if self.document_index.contains(self.document_index.document_id(document)):
+                continue
+            status = self._new_status(document, unless_owned=True)
+            if status is not None:
+                await self._queue.put((status["ingestion_id"], document))
+
+    async def stop(self):
+        """Cancel the worker tasks."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+
+    async def enqueue(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a stored document for parsing and indexing."""
+        await self.start()
+        status = self._new_status(document)
+        await self._queue.put((status["ingestion_id"], document))
+        return status
+
+    def get_status(self, ingestion_id: str) -> Optional[Dict[str, Any]]:
+        return self._statuses.get(ingestion_id)
+
+    def get_document_status(self, document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Latest ingestion status for a stored document."""
+        latest = self._latest_by_document.get(self.document_index.document_id(document))
+        return self.get_status(latest["ingestion_id"]) if latest else None
+
+    def list_statuses(self) -> List[Dict[str, Any]]:
+        return self._statuses.list()
+
+    def pending_count(self) -> int:
+        """Documents that are queued or still being parsed, across all server workers."""
+        return sum(1 for status in self._statuses.list_active() if not self._statuses.owner_gone(status))
+
+    def _new_status(self, document: Dict[str, Any], unless_owned: bool = False) -> Optional[Dict[str, Any]]:
+        """Record a new queued ingestion for this process.
+
+        With ``unless_owned``, returns None instead when a running process has already
+        taken the document.
+        """
+        document_id = self.document_index.document_id(document)
+        status = {
+            "ingestion_id": str(uuid.uuid4()),
+            "document_id": document_id,
+            "sha256": document.get("sha256"),
+            "filename": document["filename"],
+            "status": "queued",
+            "error": None,
+            "row_count": None,
+            "queued_at": datetime.now().isoformat(),
+            "started_at": None,
+            "completed_at": None
+        }
+        with self._statuses.lock():
+            if unless_owned:
+                latest = self.get_document_status(document)
+                if latest is not None:
+                    if not self._statuses.owner_gone(latest):
+                        return None
+                    if latest["status"] in IN_FLIGHT_STATUSES:
+                        latest.update(status="failed", error="Server worker exited before indexing finished",
+                                      completed_at=status["queued_at"])
+                        self._statuses.put(latest["ingestion_id"], latest)
+            self._statuses.put(status["ingestion_id"], status)
+            self._latest_by_document.put(document_id, {"document_id": document_id, "ingestion_id": status["ingestion_id"]})
+        return status
+
+    async def _worker(self, worker_id: int):
+        while True:
+            ingestion_id, document = await self._queue.get()
+            try:
+                await self._ingest(ingestion_id, document)
+            finally:
+                self._queue.task_done()
+
+    async def _ingest(self, ingestion_id: str, document: Dict[str, Any]):
+        self._set_status(ingestion_id, status="parsing", started_at=datetime.now().isoformat())
+        try:
+            with tracer.start_span("ingest_document", root=True, filename=document["filename"], ingestion_id=ingestion_id):
+                output_dir = self.document_index.storage_dir_for(document)
+                with tracer.start_span("parse_document", filename=document["filename"]) as span:
+                    if Path(document["path"]).suffix.lower() == '.pdf':
+                        # The parser fans page extraction out over the compute pool itself
+                        tables_result = await build_pdf_tables(self.document_parser, document["path"], output_dir)
+                    else:
+                        # Parsing is CPU-bound, so it runs in the compute pool; rows come back as Arrow files
+                        tables_result = await self.compute_pool.run(
+                            build_document_tables,
+                            document["path"],
+                            output_dir,
+                            self.csv_chunk_rows,
+                            self.excel_engine,
+                            self.excel_streaming_min_bytes
+                        )
+                    span.set_attribute("tables", len(tables_result["tables"]))
+
+                with tracer.start_span("build_name_index"):
+                    name_index = await self.compute_pool.run(
+                        build_name_index, tables_result["tables"], self.name_max_distance
+                    )
+
+                entry = self.document_index.build_entry(document, tables_result)
+                # Publishing writes a new snapshot file, so keep it off the event loop
+                with tracer.start_span("publish_index"):
+                    await asyncio.to_thread(self.document_index.add, entry, name_index)
+            self._set_status(
+                ingestion_id,
+                status="indexed",
+                row_count=entry["row_count"],
+                completed_at=datetime.now().isoformat()
+            )
+        except Exception as e:
+            print(f"Ingestion of {document['filename']} failed: {str(e)}")
+            self._set_status(ingestion_id, status="failed", error=str(e), completed_at=datetime.now().isoformat())
+
+    def _set_status(self, ingestion_id: str, **fields):
+        self._statuses.update(ingestion_id, **fields)
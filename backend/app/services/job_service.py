@@ -0,0 +1,307 @@
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from datetime import datetime
+import asyncio
+import contextvars
+import threading
+import time
+
+from app.core.tracing import tracer
+from app.services.status_store import StatusStore
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+# Finished jobs stay in memory this long; after that their status is read from the store
+LOCAL_RETENTION_SECONDS = 300
+
+# The progress handle of the background job running in this context, if any
+_current_progress: contextvars.ContextVar = contextvars.ContextVar("job_progress", default=None)
+
+class JobCancelledError(Exception):
+    """Raised inside a running job once cancellation has been requested."""
+
+def checkpoint_current_job():
+    """Stop the background job running in this context if it has been cancelled.
+
+    Does nothing outside a background job, so integrations can call it unconditionally.
+    """
+    progress = _current_progress.get()
+    if progress is not None:
+        progress.checkpoint()
+
+class JobProgress:
+    """Progress handle handed to the query pipeline of a background job."""
+
+    def __init__(self, job_service: "JobService", query_id: str):
+        self._job_service = job_service
+        self.query_id = query_id
+
+    def checkpoint(self):
+        """Stop the pipeline if the job has been cancelled."""
+        if self._job_service._is_cancel_requested(self.query_id):
+            raise JobCancelledError(f"Job {self.query_id} was cancelled")
+
+    def start_stage(self, stage: str):
+        """Mark a pipeline stage as running."""
+        self.checkpoint()
+        self._job_service._update_stage(self.query_id, stage, "running")
+
+    def finish_stage(self, stage: str, evidence_count: Optional[int] = None):
+        """Mark a pipeline stage as completed, recording partial evidence counts."""
+        self._job_service._update_stage(self.query_id, stage, "completed", evidence_count)
+
+class NullProgress:
+    """Progress handle used for inline (synchronous) queries."""
+
+    def checkpoint(self):
+        pass
+
+    def start_stage(self, stage: str):
+        pass
+
+    def finish_stage(self, stage: str, evidence_count: Optional[int] = None):
+        pass
+
+class JobService:
+    """Runs long evidence queries in a bounded in-process worker pool.
+
+    Every job state change is also written to a ``StatusStore``. Other server workers
+    can then report on the job, and a cancellation they record is picked up by the
+    owning process at its next checkpoint. A cancellation made in the owning process
+    also cancels the pipeline task, interrupting whatever it is awaiting. Finished jobs
+    are dropped from memory after ``LOCAL_RETENTION_SECONDS`` and reported from the
+    store copy from then on.
+
+    Status reads and cancellations do file I/O, so async callers should run them in a
+    thread.
+    """
+
+    def __init__(self, status_store: StatusStore, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._store = status_store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="evidence-job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Any] = {}
+        # (event loop, pipeline task) of running jobs
+        self._tasks: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+        # (monotonic finish time, query id) of finished jobs, oldest first
+        self._finished: deque = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, query_id: str, query: str, pipeline: Callable[[JobProgress], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Queue a query pipeline for background execution."""
+        now = datetime.now().isoformat()
+        job = {
+            "query_id": query_id,
+            "query": query,
+            "status": "queued",
+            "current_stage": None,
+            "stages": [],
+            "evidence_counts": {},
+            "evidence_count": 0,
+            "error": None,
+            "cancel_requested": False,
+            "created_at": now,
+            "started_at": None,
+            "completed_at": None
+        }
+        with self._lock:
+            self._evict_finished()
+            self._jobs[query_id] = job
+            self._publish(job)
+            # Carry the request's trace context into the worker thread
+            self._futures[query_id] = self._executor.submit(
+                contextvars.copy_context().run, self._run_job, query_id, pipeline
+            )
+        return self.get_status(query_id)
+
+    def get_status(self, query_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of a job's status and per-stage progress."""
+        # Read before taking the lock, so job threads never wait on this file I/O
+        stored = self._store.get(query_id)
+        with self._lock:
+            self._evict_finished()
+            job = self._jobs.get(query_id)
+            if job is not None:
+                self._sync_cancel(job, stored)
+                return self._snapshot(job)
+        # Started by another server worker, or finished long enough ago to be evicted
+        job = stored
+        if job is None:
+            return None
+        if job["status"] not in TERMINAL_STATUSES and self._store.owner_gone(job):
+            job["status"] = "failed"
+            job["error"] = "Server worker exited before the query finished"
+        return self._snapshot(job)
+
+    def cancel(self, query_id: str) -> Optional[Dict[str, Any]]:
+        """Request cancellation of a queued or running job."""
+        with self._lock:
+            job = self._jobs.get(query_id)
+            if job is not None and job["status"] not in TERMINAL_STATUSES:
+                job["cancel_requested"] = True
+                future = self._futures.get(query_id)
+                if job["status"] == "queued" and future is not None and future.cancel():
+                    # Never picked up by a worker, so it can be cancelled right away
+                    self._finish(job, "cancelled")
+                else:
+                    job["status"] = "cancelling"
+                    self._interrupt(query_id)
+                self._publish(job)
+        if job is None:
+            return self._cancel_elsewhere(query_id)
+        return self.get_status(query_id)
+
+    def shutdown(self):
+        """Stop taking jobs: fail the ones still queued and wait for running ones to finish."""
+        with self._lock:
+            for query_id, future in list(self._futures.items()):
+                if future.cancel():
+                    job = self._jobs[query_id]
+                    job["error"] = "Server shut down before the query started"
+                    self._finish(job, "failed")
+        self._executor.shutdown(wait=True)
+
+    def _cancel_elsewhere(self, query_id: str) -> Optional[Dict[str, Any]]:
+        """Flag a job owned by another server worker for cancellation."""
+        with self._store.lock():
+            job = self._store.get(query_id)
+            if job is None:
+                return None
+            if job["status"] not in TERMINAL_STATUSES:
+                job["cancel_requested"] = True
+                job["status"] = "cancelling"
+                self._store.put(query_id, job)
+        return self.get_status(query_id)
+
+    def _run_job(self, query_id: str, pipeline: Callable[[JobProgress], Awaitable[Dict[str, Any]]]):
+        """Worker entry point: run the pipeline on a private event loop."""
+        with self._lock:
+            job = self._jobs[query_id]
+            if job["cancel_requested"]:
+                self._finish(job, "cancelled")
+                return
+            job["status"] = "running"
+            job["started_at"] = datetime.now().isoformat()
+            self._publish(job)
+
+        try:
+            with tracer.start_span("query_job", query_id=query_id):
+                result = asyncio.run(self._run_pipeline(query_id, pipeline))
+            with self._lock:
+                job["evidence_count"] = result.get("evidence_count", job["evidence_count"])
+                self._finish(job, "completed")
+        except JobCancelledError:
+            with self._lock:
+                self._finish(job, "cancelled")
+        except Exception as e:
+            print(f"Background query {query_id} failed: {str(e)}")
+            with self._lock:
+                job["error"] = str(e)
+                self._finish(job, "failed")
+
+    async def _run_pipeline(self, query_id: str, pipeline: Callable[[JobProgress], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Run the pipeline as a task that ``cancel`` can interrupt from another thread."""
+        progress = JobProgress(self, query_id)
+        with self._lock:
+            self._tasks[query_id] = (asyncio.get_running_loop(), asyncio.current_task())
+        _current_progress.set(progress)
+        try:
+            # Cancelled between the job starting and its task being registered
+            progress.checkpoint()
+            return await pipeline(progress)
+        except asyncio.CancelledError:
+            raise JobCancelledError(f"Job {query_id} was cancelled")
+        finally:
+            with self._lock:
+                self._tasks.pop(query_id, None)
+
+    def _interrupt(self, query_id: str):
+        """Cancel the pipeline task of a running job. Caller must hold the lock."""
+        running = self._tasks.get(query_id)
+        if running is not None:
+            loop, task = running
+            loop.call_soon_threadsafe(task.cancel)
+
+    def _finish(self, job: Dict[str, Any], status: str):
+        """Move a job into a terminal state. Caller must hold the lock."""
+        job["status"] = status
+        job["current_stage"] = None
+        job["completed_at"] = datetime.now().isoformat()
+        for stage in job["stages"]:
+            if stage["status"] == "running":
+                stage["status"] = status
+        self._futures.pop(job["query_id"], None)
+        self._finished.append((time.monotonic(), job["query_id"]))
+        self._publish(job)
+
+    def _evict_finished(self):
+        """Drop finished jobs older than the retention window. Caller must hold the lock."""
+        cutoff = time.monotonic() - LOCAL_RETENTION_SECONDS
+        while self._finished and self._finished[0][0] <= cutoff:
+            _, query_id = self._finished.popleft()
+            self._jobs.pop(query_id, None)
+
+    def _publish(self, job: Dict[str, Any]):
+        """Write a local job to the shared store, keeping a cancellation another worker recorded.
+
+        Caller must hold the lock.
+        """
+        with self._store.lock():
+            self._sync_cancel(job, self._store.get(job["query_id"]))
+            self._store.put(job["query_id"], dict(job))
+
+    def _snapshot(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        snapshot = {key: value for key, value in job.items() if key not in ("cancel_requested", "owner")}
+        snapshot["stages"] = [dict(stage) for stage in job["stages"]]
+        snapshot["evidence_counts"] = dict(job["evidence_counts"])
+        return snapshot
+
+    def _sync_cancel(self, job: Dict[str, Any], stored: Optional[Dict[str, Any]]):
+        """Pick up a cancellation another server worker recorded in the stored copy of a job.
+
+        Caller must hold the lock.
+        """
+        if job["cancel_requested"] or job["status"] in TERMINAL_STATUSES:
+            return
+        if stored and stored.get("cancel_requested"):
+            job["cancel_requested"] = True
+            job["status"] = "cancelling"
+            self._interrupt(job["query_id"])
+
+    def _is_cancel_requested(self, query_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(query_id)
+            if job is None:
+                return False
+            if job["cancel_requested"]:
+                return True
+        stored = self._store.get(query_id)
+        with self._lock:
+            self._sync_cancel(job, stored)
+            return job["cancel_requested"]
+
+    def _update_stage(self, query_id: str, stage_name: str, status: str, evidence_count: Optional[int] = None):
+        with self._lock:
+            job = self._jobs.get(query_id)
+            if job is None:
+                return
+            stage = next((s for s in job["stages"] if s["name"] == stage_name), None)
+            now = datetime.now().isoformat()
+            if stage is None:
+                stage = {"name": stage_name, "status": "pending", "started_at": None, "completed_at": None}
+                job["stages"].append(stage)
+            stage["status"] = status
+            if status == "running":
+                stage["started_at"] = now
+                job["current_stage"] = stage_name
+            else:
+                stage["completed_at"] = now
+                if job["current_stage"] == stage_name:
+                    job["current_stage"] = None
+            if evidence_count is not None:
+                stage["evidence_count"] = evidence_count
+                job["evidence_counts"][stage_name] = evidence_count
+                job["evidence_count"] = sum(job["evidence_counts"].values())
+            self._publish(job)
@@ -0,0 +1,239 @@
+"""Typo-tolerant person name lookup for assignment queries.
+
+A SymSpell-style index: every name token is stored under all of its single- and
+multi-character deletions, so candidates for a misspelled token are found with a
+few dictionary lookups instead of comparing against every name in the register.
+"""
+from __future__ import annotations
+from typing import Dict, List, Set, Tuple, Iterable
+from abc import ABC, abstractmethod
+from itertools import combinations
+import bisect
+import re
+
+from app.core.lazy_imports import LazyModule
+
+pa = LazyModule("pyarrow")
+
+# Column names that usually hold people (compared against normalized column names)
+PERSON_COLUMN_HINTS = ['assigned', 'assignee', 'owner', 'user', 'person', 'employee']
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+def is_person_column(normalized_name: str) -> bool:
+    return any(hint in normalized_name for hint in PERSON_COLUMN_HINTS)
+
+def name_tokens(name: str) -> List[str]:
+    return TOKEN_RE.findall(name.lower())
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, capped at ``max_distance + 1``."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[len(b)], max_distance + 1)
+
+class _NameLookup(ABC):
+    """Lookup logic shared by the in-memory and the memory-mapped index."""
+
+    max_distance: int
+
+    def lookup(self, query: str, top_k: int = 10) -> List[Tuple[str, int, Set[Tuple[int, str]]]]:
+        """Top-k ``(name, total edit distance, locations)``; every query token must match a name token."""
+        query_tokens = name_tokens(query)
+        if not query_tokens:
+            return []
+
+        # Per query token: candidate name token -> distance
+        token_matches = []
+        for query_token in query_tokens:
+            allowed = self._token_distance(query_token)
+            candidates: Dict[str, int] = {}
+            for variant in self._delete_variants(query_token, allowed):
+                for token in self._tokens_for_variant(variant):
+                    if token not in candidates:
+                        distance = edit_distance(query_token, token, allowed)
+                        if distance <= allowed:
+                            candidates[token] = distance
+            if not candidates:
+                return []
+            token_matches.append(candidates)
+
+        # Names that contain a close token for every query token
+        names = None
+        for candidates in token_matches:
+            matched = set()
+            for token in candidates:
+                matched |= self._names_for_token(token)
+            names = matched if names is None else names & matched
+
+        ranked = []
+        for name in names:
+            tokens = set(name_tokens(name))
+            distance = sum(
+                min(distance for token, distance in candidates.items() if token in tokens)
+                for candidates in token_matches
+            )
+            ranked.append((distance, name))
+        ranked.sort()
+        return [(name, distance, self._locations_for_name(name)) for distance, name in ranked[:top_k]]
+
+    def _token_distance(self, token: str) -> int:
+        """Edit budget for a token; short tokens get less so "jo" does not match every two-letter name."""
+        return min(self.max_distance, max(0, (len(token) - 1) // 2))
+
+    @staticmethod
+    def _delete_variants(token: str, distance: int) -> Iterable[str]:
+        variants = {token}
+        for removed in range(1, min(distance, len(token)) + 1):
+            for positions in combinations(range(len(token)), removed):
+                variants.add("".join(char for i, char in enumerate(token) if i not in positions))
+        return variants
+
+    @abstractmethod
+    def _tokens_for_variant(self, variant: str) -> Iterable[str]:
+        pass
+
+    @abstractmethod
+    def _names_for_token(self, token: str) -> Set[str]:
+        pass
+
+    @abstractmethod
+    def _locations_for_name(self, name: str) -> Set[Tuple[int, str]]:
+        pass
+
+class NameIndex(_NameLookup):
+    """Approximate matching of person names, token by token. Built in memory at ingestion."""
+
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        self._deletes: Dict[str, Set[str]] = {}
+        self._names_by_token: Dict[str, Set[str]] = {}
+        self._locations: Dict[str, Set[Tuple[int, str]]] = {}
+
+    def add(self, name: str, location: Tuple[int, str]):
+        """Register a name seen at ``location`` (table index, column name)."""
+        name = " ".join(name.split())
+        if not name:
+            return
+        tokens = name_tokens(name)
+        if not tokens:
+            return
+        self._locations.setdefault(name, set()).add(location)
+        for token in tokens:
+            if token not in self._names_by_token:
+                self._names_by_token[token] = set()
+                for variant in self._delete_variants(token, self._token_distance(token)):
+                    self._deletes.setdefault(variant, set()).add(token)
+            self._names_by_token[token].add(name)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def to_tables(self) -> Dict[str, pa.Table]:
+        """Sorted Arrow tables that ``MappedNameIndex`` can search without loading them."""
+        names = sorted(self._locations)
+        name_ids = {name: name_id for name_id, name in enumerate(names)}
+        tokens = sorted(self._names_by_token)
+        token_ids = {token: token_id for token_id, token in enumerate(tokens)}
+        variants = sorted(self._deletes)
+        location_type = pa.list_(pa.struct([("table", pa.int32()), ("column", pa.string())]))
+        return {
+            "variants": pa.table({
+                "variant": pa.array(variants, type=pa.string()),
+                "token_ids": pa.array([sorted(token_ids[t] for t in self._deletes[v]) for v in variants],
+                                      type=pa.list_(pa.int32()))
+            }),
+            "tokens": pa.table({
+                "token": pa.array(tokens, type=pa.string()),
+                "name_ids": pa.array([sorted(name_ids[n] for n in self._names_by_token[t]) for t in tokens],
+                                     type=pa.list_(pa.int32()))
+            }),
+            "names": pa.table({
+                "name": pa.array(names, type=pa.string()),
+                "locations": pa.array(
+                    [[{"table": table, "column": column} for table, column in sorted(self._locations[n])] for n in names],
+                    type=location_type
+                )
+            }),
+            "settings": pa.table({"max_distance": pa.array([self.max_distance], type=pa.int32())})
+        }
+
+    def _tokens_for_variant(self, variant: str) -> Iterable[str]:
+        return self._deletes.get(variant, ())
+
+    def _names_for_token(self, token: str) -> Set[str]:
+        return self._names_by_token[token]
+
+    def _locations_for_name(self, name: str) -> Set[Tuple[int, str]]:
+        return self._locations[name]
+
+class _ArrowStrings:
+    """Sequence view over a sorted Arrow string array, so ``bisect`` can search it in place."""
+
+    def __init__(self, array: pa.Array):
+        self._array = array
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, index: int) -> str:
+        return self._array[index].as_py()
+
+class MappedNameIndex(_NameLookup):
+    """Read-only name index backed by (typically memory-mapped) Arrow tables from ``to_tables``.
+
+    Lookups binary-search the sorted columns, so nothing is copied into Python
+    dicts and every worker mapping the same file shares its pages.
+    """
+
+    def __init__(self, tables: Dict[str, pa.Table]):
+        self.max_distance = tables["settings"].column("max_distance")[0].as_py()
+        self._variants = tables["variants"].combine_chunks()
+        self._tokens = tables["tokens"].combine_chunks()
+        self._names = tables["names"].combine_chunks()
+        self._variant_keys = _ArrowStrings(self._variants.column("variant").chunk(0))
+        self._token_keys = _ArrowStrings(self._tokens.column("token").chunk(0))
+        self._name_keys = _ArrowStrings(self._names.column("name").chunk(0))
+
+    def __len__(self) -> int:
+        return self._names.num_rows
+
+    def _tokens_for_variant(self, variant: str) -> Iterable[str]:
+        position = self._find(self._variant_keys, variant)
+        if position is None:
+            return ()
+        token_ids = self._variants.column("token_ids")[position].as_py()
+        return [self._token_keys[token_id] for token_id in token_ids]
+
+    def _names_for_token(self, token: str) -> Set[str]:
+        position = self._find(self._token_keys, token)
+        if position is None:
+            return set()
+        return {self._name_keys[name_id] for name_id in self._tokens.column("name_ids")[position].as_py()}
+
+    def _locations_for_name(self, name: str) -> Set[Tuple[int, str]]:
+        position = self._find(self._name_keys, name)
+        if position is None:
+            return set()
+        return {(location["table"], location["column"]) for location in self._names.column("locations")[position].as_py()}
+
+    @staticmethod
+    def _find(keys: _ArrowStrings, value: str):
+        position = bisect.bisect_left(keys, value)
+        if position < len(keys) and keys[position] == value:
+            return position
+        return None
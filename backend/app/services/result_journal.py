@@ -0,0 +1,251 @@
+"""Stored query results: an append-only journal plus a compacted snapshot.
+
+Files next to the snapshot path (``storage/query_results.json`` by default):
+
+- ``query_results.json``: the snapshot, a JSON object of query id -> result.
+- ``query_results.journal/<seq>.jsonl``: journal segments, one result per line. The
+  highest-numbered segment is the open one; lower ones are sealed.
+
+A write appends a line to the open segment and fsyncs it before returning. Writers
+arriving while an fsync is in progress queue up, and the next fsync covers all of them
+(group commit), so a durable write costs one append no matter how large the history
+is. When the open segment reaches ``compact_bytes``, a background thread seals it by
+starting the next segment. It then folds the sealed segments into a new snapshot
+(temporary file, fsync, atomic rename) and deletes them. A crash at any point leaves
+either the old snapshot with its segments, or the new snapshot with segments that
+replay to the same records.
+
+Every server worker appends to the same journal. Appends hold a shared file lock,
+relying on ``O_APPEND`` to keep concurrent lines whole, and sealing takes it exclusively.
+Readers keep the results in memory and only parse journal bytes they have not seen yet.
+"""
+from typing import Dict, Any, List, Optional
+import json
+import os
+import threading
+import time
+
+from app.core.metrics import RESULTS_COMMIT_BATCH, RESULTS_COMMIT_SECONDS, RESULTS_COMPACTION_SECONDS
+from app.core.shared_files import file_lock, fsync_dir, read_json, write_json_atomic
+
+SEGMENT_SUFFIX = ".jsonl"
+
+# Snapshot stamp that never matches a file on disk, forcing a reload
+NOT_LOADED = ()
+
+class _PendingWrite:
+    __slots__ = ("line", "done", "error")
+
+    def __init__(self, line: str):
+        self.line = line
+        self.done = False
+        self.error: Optional[Exception] = None
+
+class ResultJournal:
+    """Durable, multi-writer store of query results keyed by query id."""
+
+    def __init__(self, snapshot_path: str, compact_bytes: int = 16 * 1024 * 1024):
+        self.snapshot_path = snapshot_path
+        self.journal_dir = f"{os.path.splitext(snapshot_path)[0]}.journal"
+        self.compact_bytes = compact_bytes
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self._append_lock = os.path.join(self.journal_dir, ".append.lock")
+        self._compact_lock = os.path.join(self.journal_dir, ".compact.lock")
+
+        # Group commit: the first waiting writer flushes everything queued so far
+        self._commit = threading.Condition()
+        self._pending: List[_PendingWrite] = []
+        self._flushing = False
+        self._compacting = False
+        self._segment: Optional[int] = None
+
+        # Read side: results loaded so far and how far into each segment they go
+        self._read_lock = threading.Lock()
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._snapshot_stamp: Optional[tuple] = NOT_LOADED
+        self._offsets: Dict[int, int] = {}
+
+    def append(self, result: Dict[str, Any]):
+        """Add a result; returns once it is on disk. Blocking, so call it off the event loop."""
+        started = time.perf_counter()
+        entry = _PendingWrite(json.dumps(result, default=str) + "\n")
+        with self._commit:
+            self._pending.append(entry)
+            while not entry.done:
+                if self._flushing:
+                    self._commit.wait()
+                    continue
+                batch, self._pending = self._pending, []
+                self._flushing = True
+                self._commit.release()
+                try:
+                    size, error = self._write_batch([item.line for item in batch]), None
+                except Exception as e:
+                    size, error = 0, e
+                finally:
+                    self._commit.acquire()
+                for item in batch:
+                    item.error = error
+                    item.done = True
+                self._flushing = False
+                self._commit.notify_all()
+                if size >= self.compact_bytes:
+                    self._start_compaction()
+        RESULTS_COMMIT_SECONDS.observe(time.perf_counter() - started)
+        if entry.error is not None:
+            raise entry.error
+
+    def get(self, query_id: str) -> Optional[Dict[str, Any]]:
+        with self._read_lock:
+            self._refresh()
+            return self._results.get(query_id)
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Every stored result by query id."""
+        with self._read_lock:
+            self._refresh()
+            return dict(self._results)
+
+    def compact(self, force: bool = True) -> bool:
+        """Fold sealed segments into a new snapshot; returns whether anything was compacted.
+
+        Without ``force``, the open segment is only sealed once it has reached
+        ``compact_bytes``, so a compaction another worker just finished is not repeated.
+        """
+        with file_lock(self._compact_lock):
+            started = time.perf_counter()
+            with file_lock(self._append_lock):
+                segments = self._segments()
+                if not segments:
+                    return False
+                open_segment = segments[-1]
+                open_size = os.path.getsize(self._segment_path(open_segment))
+                if open_size == 0 or (not force and open_size < self.compact_bytes):
+                    return False
+                # Appends go to the next segment from now on
+                open(self._segment_path(open_segment + 1), "a").close()
+                fsync_dir(self.journal_dir)
+
+            sealed = [seq for seq in self._segments() if seq <= open_segment]
+            # Unlike readers, fail on an unreadable snapshot rather than replace it with less
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    results = json.load(f)
+            except FileNotFoundError:
+                results = {}
+            for seq in sealed:
+                with open(self._segment_path(seq), "rb") as f:
+                    self._apply(results, f.read())
+            write_json_atomic(self.snapshot_path, results, durable=True, indent=2)
+
+            # Only now that the snapshot holds their records
+            for seq in sealed:
+                os.remove(self._segment_path(seq))
+            fsync_dir(self.journal_dir)
+            RESULTS_COMPACTION_SECONDS.observe(time.perf_counter() - started)
+            return True
+
+    def _write_batch(self, lines: List[str]) -> int:
+        """Append lines to the open segment and fsync it; returns the segment's new size."""
+        # The leading newline keeps these records apart from a line torn by a crashed writer
+        data = memoryview(("\n" + "".join(lines)).encode("utf-8"))
+        with file_lock(self._append_lock, shared=True):
+            path = self._segment_path(self._open_segment())
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+                os.fsync(fd)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+        RESULTS_COMMIT_BATCH.observe(len(lines))
+        return size
+
+    def _open_segment(self) -> int:
+        """Number of the segment appends go to. Caller holds the append lock."""
+        seq = self._segment
+        if seq is None or not os.path.exists(self._segment_path(seq)):
+            segments = self._segments()
+            seq = segments[-1] if segments else 1
+            if not segments:
+                open(self._segment_path(seq), "a").close()
+                fsync_dir(self.journal_dir)
+        # Sealed by another process since we last looked
+        while os.path.exists(self._segment_path(seq + 1)):
+            seq += 1
+        self._segment = seq
+        return seq
+
+    def _start_compaction(self):
+        """Compact in the background so writers never wait for it. Caller holds the commit lock."""
+        if self._compacting:
+            return
+        self._compacting = True
+        threading.Thread(target=self._compact_in_background, name="results-compaction", daemon=True).start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact(force=False)
+        except Exception as e:
+            print(f"Warning: results journal compaction failed: {str(e)}")
+        finally:
+            with self._commit:
+                self._compacting = False
+
+    def _refresh(self):
+        """Catch up with the snapshot and journal on disk. Caller holds the read lock."""
+        while True:
+            stamp = self._stamp()
+            if stamp != self._snapshot_stamp:
+                self._results = read_json(self.snapshot_path, default={})
+                self._offsets = {}
+                self._snapshot_stamp = stamp
+            segments = self._segments()
+            try:
+                if any(seq not in segments for seq in self._offsets):
+                    # Compacted away, so the snapshot we hold is out of date
+                    raise FileNotFoundError
+                for seq in segments:
+                    offset = self._offsets.get(seq, 0)
+                    with open(self._segment_path(seq), "rb") as f:
+                        f.seek(offset)
+                        data = f.read()
+                    # Whole lines only; a line still being written is read next time
+                    end = data.rfind(b"\n") + 1
+                    self._apply(self._results, data[:end])
+                    self._offsets[seq] = offset + end
+                # A compaction between loading the snapshot and listing the segments
+                # deleted sealed segments the loaded snapshot does not cover yet
+                if self._stamp() == stamp:
+                    return
+            except FileNotFoundError:
+                pass
+            self._snapshot_stamp = NOT_LOADED
+
+    def _apply(self, results: Dict[str, Dict[str, Any]], data: bytes):
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn line from a writer that crashed before its fsync; never acknowledged
+                continue
+            results[result["query_id"]] = result
+
+    def _stamp(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.journal_dir)
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        )
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.journal_dir, f"{seq:010d}{SEGMENT_SUFFIX}")
@@ -0,0 +1,146 @@
+from typing import Dict, Any, List, Optional, Iterator
+from datetime import datetime
+import json
+import os
+import re
+import threading
+
+from app.core.query_stats import QueryStats
+from app.core.shared_files import file_lock
+
+# Literals replaced by "?" so queries of the same shape share one normalized form
+NORMALIZE_PATTERNS = [
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "?"),       # quoted strings
+    (re.compile(r"\b[a-z][a-z0-9]+-\d+\b"), "?"),   # ticket keys (proj-123)
+    (re.compile(r"#?\b\d+(?:\.\d+)?\b"), "?"),      # numbers and #PR numbers
+]
+
+def normalize_query(query: str) -> str:
+    """Lowercased query with literals replaced, e.g. ``"PR #42 in last 7 days"`` -> ``"pr ? in last ? days"``."""
+    normalized = " ".join(query.lower().split())
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        normalized = pattern.sub(replacement, normalized)
+    return normalized
+
+class SlowQueryLog:
+    """JSON-lines log of queries slower than a threshold, rotated by size.
+
+    The live file is ``path``. Older entries move to ``path.1`` ... ``path.<backups>``,
+    the same way ``logging.handlers.RotatingFileHandler`` does it. Appends and rotation
+    run under a file lock, so several server workers can share one log.
+    """
+
+    def __init__(self, path: str = "./storage/slow_queries.jsonl", threshold_ms: float = 2000,
+                 max_bytes: int = 10 * 1024 * 1024, backups: int = 5):
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def record(self, query_id: str, query: str, duration_ms: float, stats: QueryStats,
+               status: str = "completed", error: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Append an entry when the query reached the threshold; returns the entry if written."""
+        if duration_ms < self.threshold_ms:
+            return None
+        entry = {
+            "query_id": query_id,
+            "recorded_at": datetime.now().isoformat(),
+            "duration_ms": round(duration_ms, 1),
+            "status": status,
+            "error": error,
+            "normalized_query": normalize_query(query),
+            "query_type": stats.query_type,
+            "github_function": stats.github_function,
+            "github_parameters": stats.github_parameters,
+            "files_scanned": stats.files_scanned,
+            "rows_scored": stats.rows_scored,
+            "upstream_calls": dict(stats.upstream_calls),
+            "stage_ms": {stage: round(seconds * 1000, 1) for stage, seconds in stats.stage_seconds.items()}
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock, file_lock(f"{self.path}.lock"):
+            if self._should_rotate(len(line)):
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return entry
+
+    def entries(self, limit: int = 100, query_type: Optional[str] = None,
+                min_duration_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Most recent entries first, optionally filtered by query type and duration."""
+        matches = []
+        for entry in self._iter_newest_first():
+            if query_type and entry.get("query_type") != query_type:
+                continue
+            if min_duration_ms is not None and entry.get("duration_ms", 0) < min_duration_ms:
+                continue
+            matches.append(entry)
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def shapes(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Entries grouped by normalized query and query type, ordered by total time spent."""
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for entry in self._iter_newest_first():
+            key = (entry.get("normalized_query"), entry.get("query_type"), entry.get("github_function"))
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "normalized_query": key[0],
+                    "query_type": key[1],
+                    "github_function": key[2],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "stage_ms": {},
+                    "last_seen": entry.get("recorded_at")
+                }
+            duration = entry.get("duration_ms", 0)
+            group["count"] += 1
+            group["total_ms"] += duration
+            group["max_ms"] = max(group["max_ms"], duration)
+            for stage, stage_ms in (entry.get("stage_ms") or {}).items():
+                group["stage_ms"][stage] = group["stage_ms"].get(stage, 0.0) + stage_ms
+
+        ranked = sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)[:limit]
+        for group in ranked:
+            group["avg_ms"] = round(group["total_ms"] / group["count"], 1)
+            group["total_ms"] = round(group["total_ms"], 1)
+            # Average per stage shows where that shape spends its time
+            group["stage_ms"] = {stage: round(total / group["count"], 1) for stage, total in group["stage_ms"].items()}
+        return ranked
+
+    def _files_newest_first(self) -> List[str]:
+        return [self.path] + [f"{self.path}.{index}" for index in range(1, self.backups + 1)]
+
+    def _iter_newest_first(self) -> Iterator[Dict[str, Any]]:
+        for file_path in self._files_newest_first():
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                continue
+            for line in reversed(lines):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash; skip it
+                    continue
+
+    def _should_rotate(self, incoming: int) -> bool:
+        try:
+            return os.path.getsize(self.path) + incoming > self.max_bytes
+        except OSError:
+            return False
+
+    def _rotate(self):
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
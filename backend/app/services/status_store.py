@@ -0,0 +1,136 @@
+from typing import Dict, Any, Iterable, List, Optional
+import hashlib
+import os
+import re
+import time
+
+from app.core.shared_files import ProcessLease, file_lock, read_json, write_json_atomic
+
+# Keys used as file names as they are; anything else is hashed
+SAFE_KEY = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+# How often one process looks for finished records past their retention
+PRUNE_INTERVAL_SECONDS = 600
+
+class StatusStore:
+    """Status records shared by every server worker, one JSON file per record.
+
+    Records written through ``put`` carry the lease of the process doing the work,
+    so a worker can tell when another worker died with work in flight (``owner_gone``).
+
+    A record whose ``status`` is not one of ``terminal_statuses`` is active and also
+    listed in the ``active`` subdirectory, so ``list_active`` reads only those.
+    Finished records are deleted ``retention_seconds`` after their last write (0 keeps
+    them forever); records without a status are never deleted.
+    """
+
+    def __init__(self, directory: str, lease: ProcessLease,
+                 terminal_statuses: Iterable[str] = (), retention_seconds: float = 0):
+        self.directory = directory
+        self.lease = lease
+        self.terminal_statuses = set(terminal_statuses)
+        self.retention_seconds = retention_seconds
+        self._active_dir = os.path.join(directory, "active")
+        os.makedirs(self._active_dir, exist_ok=True)
+        self._lock_path = os.path.join(directory, ".lock")
+        self._last_prune: Optional[float] = None
+
+    def lock(self):
+        """Cross-process lock for check-then-write sequences over this store."""
+        return file_lock(self._lock_path)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return read_json(self._path(key))
+
+    def put(self, key: str, record: Dict[str, Any]):
+        record.setdefault("owner", self.lease.owner)
+        path = self._path(key)
+        marker = os.path.join(self._active_dir, os.path.basename(path))
+        status = record.get("status")
+        if status is None:
+            write_json_atomic(path, record)
+        elif status in self.terminal_statuses:
+            write_json_atomic(path, record)
+            # After the write, so a crash in between leaves a marker list_active ignores
+            self._remove(marker)
+            self._maybe_prune()
+        else:
+            write_json_atomic(path, record)
+            open(marker, "a").close()
+
+    def owner_gone(self, record: Dict[str, Any]) -> bool:
+        """Whether the process that owns this record has exited."""
+        owner = record.get("owner")
+        return bool(owner) and not self.lease.is_held(owner)
+
+    def update(self, key: str, **fields) -> Optional[Dict[str, Any]]:
+        """Merge fields into a stored record; returns the updated record, or None if unknown."""
+        with self.lock():
+            record = self.get(key)
+            if record is None:
+                return None
+            record.update(fields)
+            self.put(key, record)
+            return record
+
+    def list(self) -> List[Dict[str, Any]]:
+        records = []
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.startswith(".") or not filename.endswith(".json"):
+                continue
+            record = read_json(os.path.join(self.directory, filename))
+            if record is not None:
+                records.append(record)
+        return records
+
+    def list_active(self) -> List[Dict[str, Any]]:
+        """Records that are not finished, reading only those."""
+        records = []
+        for filename in sorted(os.listdir(self._active_dir)):
+            record = read_json(os.path.join(self.directory, filename))
+            if record is None or record.get("status") in self.terminal_statuses:
+                # Left behind by a process that stopped between writing a record and its marker
+                self._remove(os.path.join(self._active_dir, filename))
+                continue
+            records.append(record)
+        return records
+
+    def prune(self) -> int:
+        """Delete finished records older than the retention window; returns how many went."""
+        if not self.retention_seconds:
+            return 0
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        for filename in os.listdir(self.directory):
+            if filename.startswith(".") or not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                if os.stat(path).st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            record = read_json(path)
+            if record is not None and record.get("status") in self.terminal_statuses:
+                removed += self._remove(path)
+        return removed
+
+    def _maybe_prune(self):
+        if not self.retention_seconds:
+            return
+        if self._last_prune is None or time.monotonic() - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self._last_prune = time.monotonic()
+            self.prune()
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def _path(self, key: str) -> str:
+        if not SAFE_KEY.fullmatch(key):
+            key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
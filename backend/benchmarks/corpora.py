@@ -0,0 +1,140 @@
+"""Synthetic, seeded corpora shaped like the sample asset register.
+
+The same seed always produces the same files, so benchmark runs on different
+machines or branches score the same data.
+"""
+from typing import Iterator, List
+import csv
+import os
+import random
+
+COLUMNS = ["Asset ID", "Asset Type", "Brand", "Model", "Serial Number", "Purchase Date",
+           "Assigned To", "Location", "Status", "Warranty Expiry"]
+
+ASSET_MODELS = {
+    "Laptop": [("Apple", "MacBook Pro 16\""), ("Dell", "XPS 13"), ("HP", "EliteBook 840"), ("Lenovo", "ThinkPad X1")],
+    "Monitor": [("Dell", "U2720Q"), ("LG", "27UK850"), ("Samsung", "Odyssey G7")],
+    "Phone": [("Apple", "iPhone 15"), ("Samsung", "Galaxy S24"), ("Google", "Pixel 8")],
+    "Server": [("Dell", "PowerEdge R750"), ("HPE", "ProLiant DL380")],
+    "Printer": [("HP", "LaserJet Pro"), ("Brother", "HL-L2350DW")],
+}
+ASSET_TYPES = list(ASSET_MODELS)
+
+FIRST_NAMES = ["John", "Jane", "Bob", "Alice", "Carlos", "Priya", "Wei", "Fatima", "Olga", "Kwame",
+               "Sofia", "Liam", "Aisha", "Mateo", "Yuki", "Noah", "Emma", "Ravi", "Chloe", "Omar"]
+LAST_NAMES = ["Doe", "Smith", "Wilson", "Johnson", "Garcia", "Patel", "Chen", "Khan", "Ivanova", "Mensah",
+              "Rossi", "Murphy", "Bello", "Lopez", "Tanaka", "Brown", "Davis", "Sharma", "Martin", "Haddad"]
+LOCATIONS = ["Office Floor 1", "Office Floor 2", "Office Floor 3", "Home Office", "Data Center A",
+             "Data Center B", "Warehouse", "Remote"]
+STATUSES = ["Active", "Active", "Active", "In Repair", "Retired", "Lost"]
+
+# Rows per sheet when a workbook is split into several sheets
+DEFAULT_SHEETS = 3
+
+def people(count: int = 400) -> List[str]:
+    """The fixed pool of assignees; queries pick names from the same pool."""
+    rng = random.Random(7)
+    names = set()
+    while len(names) < min(count, len(FIRST_NAMES) * len(LAST_NAMES)):
+        names.add(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+    return sorted(names)
+
+def asset_rows(rows: int, seed: int = 42, start: int = 0) -> Iterator[list]:
+    rng = random.Random(seed + start)
+    assignees = people()
+    for index in range(start, start + rows):
+        asset_type = rng.choice(ASSET_TYPES)
+        brand, model = rng.choice(ASSET_MODELS[asset_type])
+        year = rng.randint(2019, 2025)
+        month = rng.randint(1, 12)
+        day = rng.randint(1, 28)
+        yield [
+            f"{asset_type[:2].upper()}{index + 1:07d}",
+            asset_type,
+            brand,
+            model,
+            f"SN{rng.randrange(16 ** 8):08X}",
+            f"{year}-{month:02d}-{day:02d}",
+            rng.choice(assignees),
+            rng.choice(LOCATIONS),
+            rng.choice(STATUSES),
+            f"{year + 3}-{month:02d}-{day:02d}",
+        ]
+
+def write_asset_register_csv(path: str, rows: int, seed: int = 42) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(asset_rows(rows, seed))
+    return path
+
+def write_asset_register_xlsx(path: str, rows: int, sheets: int = DEFAULT_SHEETS, seed: int = 42) -> str:
+    """Workbook with ``rows`` spread over ``sheets`` sheets, written in streaming mode."""
+    from openpyxl import Workbook
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    workbook = Workbook(write_only=True)
+    per_sheet = -(-rows // sheets)
+    for sheet_index in range(sheets):
+        start = sheet_index * per_sheet
+        count = max(0, min(per_sheet, rows - start))
+        sheet = workbook.create_sheet(f"Region {sheet_index + 1}")
+        sheet.append(COLUMNS)
+        for row in asset_rows(count, seed, start=start):
+            sheet.append(row)
+    workbook.save(path)
+    return path
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_policy_pdf(path: str, pages: int, seed: int = 42, lines_per_page: int = 40) -> str:
+    """Minimal text PDF (Helvetica, one content stream per page) of audit-style policy prose."""
+    rng = random.Random(seed)
+    assignees = people()
+    sentences = [
+        "Access reviews for {loc} are completed quarterly and approved by {name}.",
+        "Laptop {sn} assigned to {name} was verified against the asset register.",
+        "Encryption is enforced on all {kind} devices located at {loc}.",
+        "Change tickets for {loc} require approval from {name} before deployment.",
+        "The {kind} inventory at {loc} was reconciled with no exceptions noted.",
+        "Incident response contacts for {loc} include {name} as primary owner.",
+    ]
+
+    page_streams = []
+    for _ in range(pages):
+        lines = []
+        for _ in range(lines_per_page):
+            line = rng.choice(sentences).format(
+                loc=rng.choice(LOCATIONS), name=rng.choice(assignees),
+                kind=rng.choice(ASSET_TYPES).lower(), sn=f"SN{rng.randrange(16 ** 8):08X}"
+            )
+            lines.append(f"({_pdf_escape(line)}) Tj T*")
+        page_streams.append("BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(lines) + " ET")
+
+    # 1 catalog, 2 page tree, 3 font, then a page object and a content stream per page
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [" + " ".join(f"{4 + 2 * i} 0 R" for i in range(pages)) + f"] /Count {pages} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, stream in enumerate(page_streams):
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        offsets = []
+        position = f.write(b"%PDF-1.4\n")
+        for number, body in enumerate(objects, start=1):
+            offsets.append(position)
+            position += f.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{position}\n%%EOF\n".encode())
+    return path
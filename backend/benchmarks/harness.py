@@ -0,0 +1,199 @@
+"""Building blocks for end-to-end benchmarks: a real API server process, a load
+generator and baseline comparison."""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative change in p95 latency or throughput reported as a regression
+DEFAULT_TOLERANCE = 0.2
+
+# Longer than any think time or stall, so the server never closes a connection the client is about to reuse
+KEEP_ALIVE_SECONDS = 75
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class ApiServer:
+    """Runs the production server (``app.server``) in a subprocess, with all storage under ``workdir``."""
+
+    def __init__(self, workdir: str, env: Optional[Dict[str, str]] = None, workers: int = 1):
+        self.workdir = workdir
+        self.port = free_port()
+        self.workers = workers
+        self.env = {
+            **os.environ,
+            "PYTHONPATH": BACKEND_DIR,
+            "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+            "INDEX_DIR": os.path.join(workdir, "storage", "index"),
+            "PDF_CACHE_DIR": os.path.join(workdir, "storage", "pdf_pages"),
+            "SLOW_QUERY_LOG": os.path.join(workdir, "storage", "slow_queries.jsonl"),
+            "MAX_FILE_SIZE": str(64 * 1024 ** 3),
+            **(env or {})
+        }
+        self._process: Optional[subprocess.Popen] = None
+        self._log = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 60) -> "ApiServer":
+        os.makedirs(self.workdir, exist_ok=True)
+        self._log = open(os.path.join(self.workdir, "server.log"), "w")
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "app.server", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning",
+             "--timeout-keep-alive", str(KEEP_ALIVE_SECONDS)],
+            cwd=self.workdir, env=self.env, stdout=self._log, stderr=subprocess.STDOUT
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"API server exited early; see {self._log.name}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"API server did not become healthy within {timeout}s")
+
+    def stop(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._log is not None:
+            self._log.close()
+
+    def __enter__(self) -> "ApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds and throughput in requests per second."""
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> Optional[float]:
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000, 2)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else None,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2) if ordered else None,
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else None,
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds > 0 else None
+    }
+
+async def run_load(send: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]], base_url: str,
+                   requests: int, concurrency: int, warmup: int = 0, timeout: float = 300) -> Dict[str, Any]:
+    """Call ``send(client, i)`` ``requests`` times from ``concurrency`` workers and summarize.
+
+    Non-2xx responses and transport errors count as errors; their latency is still recorded.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        for index in range(warmup):
+            await send(client, index)
+
+        latencies: List[float] = []
+        errors = 0
+        next_index = 0
+
+        async def worker():
+            nonlocal errors, next_index
+            while next_index < requests:
+                index = next_index
+                next_index += 1
+                started = time.perf_counter()
+                try:
+                    response = await send(client, index)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, requests)))])
+        return summarize(latencies, errors, time.perf_counter() - started)
+
+def parse_metrics(text: str, prefixes: tuple = ("evidence_upstream_requests_total", "evidence_cache_hit_ratio")) -> Dict[str, float]:
+    """Samples from a Prometheus text scrape whose names start with one of ``prefixes``."""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith(prefixes):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+    return samples
+
+def environment_info() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """Per-scenario comparison of p95 latency and throughput against a stored baseline."""
+    rows = []
+    for name, current in results.get("scenarios", {}).items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        row = {"scenario": name, "regressions": []}
+        for metric, worse_when_higher in (("p95_ms", True), ("throughput_rps", False)):
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            row[metric] = {"baseline": before, "current": after, "change": round(change, 3)}
+            if (change > tolerance) if worse_when_higher else (change < -tolerance):
+                row["regressions"].append(metric)
+        rows.append(row)
+    return rows
+
+def load_json(path: str) -> Optional[Dict[str, Any]]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_json(path: str, data: Dict[str, Any]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,338 @@
+"""Load test: concurrent auditors replaying audit-week traffic against a local server.
+
+    cd backend
+    python -m benchmarks.load
+    python -m benchmarks.load --workload reporting --auditors 2,4,8,16,32 --stage-seconds 60
+    python -m benchmarks.load --slo-p95-ms 3000 --stop-at-saturation --save-baseline
+
+Each simulated auditor runs a closed loop. It picks an action using the workload's
+weights, waits for the response, thinks for a while and repeats. Actions are evidence
+queries, document queries, document uploads, report listing, report export and
+evidence export. The number of auditors steps up from stage to stage. Each stage
+reports p50/p95/p99 latency, error rate and throughput, both overall and per action.
+The saturation point is the first stage where one of these holds:
+
+- throughput grows by less than ``--min-scaling`` times the growth in auditors
+  (with the default 0.5, doubling the auditors must add at least 50% throughput)
+- p95 exceeds ``--slo-p95-ms``
+- the error rate exceeds ``--max-error-rate``
+
+GitHub, Jira and the OpenAI API are local stubs, so runs are offline and repeatable.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks import corpora
+from benchmarks.harness import (
+    DEFAULT_TOLERANCE, ApiServer, compare, environment_info, load_json, parse_metrics, save_json, summarize
+)
+from benchmarks.run import GITHUB_QUERIES, JIRA_QUERIES, MIXED_QUERIES, EXPORT_FORMATS, build_corpus, ingest
+from benchmarks.stub_servers import StubGitHubServer, StubJiraServer, StubOpenAIServer
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Relative weight of each auditor action per workload
+WORKLOADS: Dict[str, Dict[str, int]] = {
+    "audit-week": {"evidence_query": 40, "document_query": 15, "document_upload": 5,
+                   "reports_list": 20, "report_export": 10, "export": 10},
+    "fieldwork": {"evidence_query": 55, "document_query": 25, "document_upload": 10,
+                  "reports_list": 5, "report_export": 0, "export": 5},
+    "reporting": {"evidence_query": 15, "document_query": 5, "document_upload": 0,
+                  "reports_list": 30, "report_export": 25, "export": 25},
+}
+
+# Share of the relative increase in auditors that must show up as extra throughput
+DEFAULT_MIN_SCALING = 0.5
+
+# Evidence queries per source, in the proportions auditors ask them
+EVIDENCE_QUERIES = [(query, "github") for query in GITHUB_QUERIES] \
+    + [(query, "jira") for query in JIRA_QUERIES] \
+    + [(query, None) for query in MIXED_QUERIES]
+
+class Auditor:
+    """One simulated user; all of its choices come from its own seeded generator."""
+
+    def __init__(self, number: int, client: httpx.AsyncClient, workload: Dict[str, int], seed: int,
+                 think_time: float, upload_rows: int, query_ids: List[str], upload_numbers: Iterator[int]):
+        self.number = number
+        self.client = client
+        self.rng = random.Random(seed * 1000 + number)
+        self.actions = [name for name, weight in workload.items() if weight]
+        self.weights = [workload[name] for name in self.actions]
+        self.think_time = think_time
+        self.upload_rows = upload_rows
+        self.seed = seed
+        self.query_ids = query_ids
+        self.upload_numbers = upload_numbers
+
+    async def run(self, deadline: float, record):
+        while time.monotonic() < deadline:
+            action = self.rng.choices(self.actions, self.weights)[0]
+            if action in ("report_export", "export") and not self.query_ids:
+                action = "evidence_query"
+            started = time.perf_counter()
+            try:
+                response = await getattr(self, action)()
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            record(action, time.perf_counter() - started, ok)
+
+            if self.think_time:
+                pause = min(self.rng.expovariate(1 / self.think_time), self.think_time * 5)
+                await asyncio.sleep(max(0.0, min(pause, deadline - time.monotonic())))
+
+    async def _post_query(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
+        response = await self.client.post(path, json=payload)
+        if response.status_code == 200:
+            self.query_ids.append(response.json()["query_id"])
+        return response
+
+    async def evidence_query(self) -> httpx.Response:
+        query, query_type = self.rng.choice(EVIDENCE_QUERIES)
+        return await self._post_query("/api/v1/evidence/query",
+                                      {"query": query.format(n=self.rng.randint(1, 50)), "query_type": query_type})
+
+    async def document_query(self) -> httpx.Response:
+        name = self.rng.choice(corpora.people())
+        query = self.rng.choice([f"laptops assigned to {name}", f"assets at {self.rng.choice(corpora.LOCATIONS)}",
+                                 f"access reviews approved by {name}"])
+        return await self._post_query("/api/v1/evidence/documents/query", {"query": query})
+
+    async def document_upload(self) -> httpx.Response:
+        # Every upload has new content, so it is ingested rather than skipped as a duplicate
+        number = next(self.upload_numbers)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(corpora.COLUMNS)
+        writer.writerows(corpora.asset_rows(self.upload_rows, self.seed, start=number * self.upload_rows))
+        filename = f"auditor{self.number}_workpaper{number}.csv"
+        return await self.client.post("/api/v1/evidence/documents/upload",
+                                      files={"file": (filename, buffer.getvalue().encode(), "text/csv")})
+
+    async def reports_list(self) -> httpx.Response:
+        return await self.client.get("/api/v1/evidence/reports")
+
+    async def report_export(self) -> httpx.Response:
+        return await self.client.post(f"/api/v1/evidence/reports/{self.rng.choice(self.query_ids)}/export",
+                                      params={"format": self.rng.choice(["txt", "json"])})
+
+    async def export(self) -> httpx.Response:
+        query_id = self.rng.choice(self.query_ids)
+        return await self.client.post(f"/api/v1/evidence/export/{query_id}",
+                                      json={"query_id": query_id, "format": self.rng.choice(EXPORT_FORMATS)})
+
+async def run_stage(base_url: str, auditors: int, seconds: float, workload: Dict[str, int], seed: int,
+                    think_time: float, upload_rows: int, query_ids: List[str],
+                    upload_numbers: Iterator[int]) -> Dict[str, Any]:
+    """Run ``auditors`` auditors for ``seconds`` and summarize overall and per action.
+
+    ``query_ids`` and ``upload_numbers`` are shared across stages, so later stages export
+    earlier results and never upload the same workpaper twice.
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+
+    def record(action: str, seconds: float, ok: bool):
+        latencies[action].append(seconds)
+        if not ok:
+            errors[action] += 1
+
+    limits = httpx.Limits(max_connections=auditors, max_keepalive_connections=auditors)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        users = [Auditor(number, client, workload, seed, think_time, upload_rows, query_ids, upload_numbers)
+                 for number in range(auditors)]
+        started = time.perf_counter()
+        deadline = time.monotonic() + seconds
+        await asyncio.gather(*[user.run(deadline, record) for user in users])
+        wall_seconds = time.perf_counter() - started
+
+    everything = [latency for values in latencies.values() for latency in values]
+    return {
+        "auditors": auditors,
+        **summarize(everything, sum(errors.values()), wall_seconds),
+        "actions": {action: summarize(latencies[action], errors[action], wall_seconds) for action in sorted(latencies)}
+    }
+
+def find_saturation(stages: List[Dict[str, Any]], min_scaling: float = DEFAULT_MIN_SCALING,
+                    slo_p95_ms: Optional[float] = None, max_error_rate: float = 0.01) -> Optional[Dict[str, Any]]:
+    """The first stage that saturated the server, and why; ``None`` if none did."""
+    for index, stage in enumerate(stages):
+        if stage["error_rate"] is not None and stage["error_rate"] > max_error_rate:
+            return {"auditors": stage["auditors"], "reason": f"error rate {stage['error_rate']:.1%} above {max_error_rate:.1%}"}
+        if slo_p95_ms is not None and stage["p95_ms"] is not None and stage["p95_ms"] > slo_p95_ms:
+            return {"auditors": stage["auditors"], "reason": f"p95 {stage['p95_ms']} ms above the {slo_p95_ms:g} ms SLO"}
+        if index:
+            previous = stages[index - 1]
+            growth = stage["auditors"] / previous["auditors"] - 1
+            if growth > 0 and previous["throughput_rps"] and stage["throughput_rps"] is not None:
+                gain = stage["throughput_rps"] / previous["throughput_rps"] - 1
+                if gain < min_scaling * growth:
+                    return {"auditors": stage["auditors"],
+                            "reason": f"throughput {gain:+.0%} going from {previous['auditors']} to {stage['auditors']} auditors"}
+    return None
+
+def print_summary(results: Dict[str, Any], comparison: List[Dict[str, Any]]):
+    changes = {row["scenario"]: row for row in comparison}
+    print(f"\n{'auditors':>8}{'req':>7}{'err %':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}  vs baseline")
+    for stage in results["stages"]:
+        row = changes.get(f"{stage['auditors']}_auditors", {})
+        delta = ""
+        if "p95_ms" in row:
+            delta = f"p95 {row['p95_ms']['change']:+.0%}"
+        if "throughput_rps" in row:
+            delta += f", req/s {row['throughput_rps']['change']:+.0%}"
+        if row.get("regressions"):
+            delta += "  REGRESSION"
+        error_rate = f"{stage['error_rate'] * 100:.1f}" if stage["error_rate"] is not None else "-"
+        print(f"{stage['auditors']:>8}{stage['requests']:>7}{error_rate:>7}{str(stage['p50_ms']):>10}"
+              f"{str(stage['p95_ms']):>10}{str(stage['p99_ms']):>10}{str(stage['throughput_rps']):>9}  {delta}")
+
+    saturation = results["saturation"]
+    last = next((stage for stage in results["stages"] if saturation and stage["auditors"] == saturation["auditors"]),
+                results["stages"][-1])
+    print(f"\nPer action at {last['auditors']} auditors:")
+    print(f"{'action':<18}{'req':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for action, stats in last["actions"].items():
+        print(f"{action:<18}{stats['requests']:>7}{stats['errors']:>6}{str(stats['p50_ms']):>10}"
+              f"{str(stats['p95_ms']):>10}{str(stats['p99_ms']):>10}")
+
+    if saturation:
+        print(f"\nSaturated at {saturation['auditors']} auditors: {saturation['reason']}")
+    else:
+        print("\nNo saturation within the tested range")
+    print(f"Peak throughput {results['peak']['throughput_rps']} req/s at {results['peak']['auditors']} auditors")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="audit-week")
+    parser.add_argument("--auditors", default="1,2,4,8,16,32", help="Comma-separated auditor counts, one stage each")
+    parser.add_argument("--stage-seconds", type=float, default=30)
+    parser.add_argument("--warmup-seconds", type=float, default=5)
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds an auditor pauses between requests")
+    parser.add_argument("--upload-rows", type=int, default=2000, help="Rows per uploaded workpaper CSV")
+    parser.add_argument("--csv-rows", type=int, default=10_000)
+    parser.add_argument("--xlsx-rows", type=int, default=10_000)
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="API server worker processes")
+    parser.add_argument("--github-latency-ms", type=float, default=50)
+    parser.add_argument("--jira-latency-ms", type=float, default=80)
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Stub LLM time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="Share of LLM calls that fail with 500")
+    parser.add_argument("--llm-unavailable-model", action="append", default=[],
+                        help="Model the stub LLM refuses with 404, e.g. gpt-4 (repeatable)")
+    parser.add_argument("--no-llm", action="store_true", help="Run with AI disabled instead of the stub LLM")
+    parser.add_argument("--min-scaling", type=float, default=DEFAULT_MIN_SCALING)
+    parser.add_argument("--slo-p95-ms", type=float)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--stop-at-saturation", action="store_true")
+    parser.add_argument("--workdir", help="Keep corpus and server storage here instead of a temp dir")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/load-<workload>-<time>.json)")
+    parser.add_argument("--baseline", help="Baseline to compare against (default benchmarks/baselines/load-<workload>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    auditor_counts = [int(count) for count in args.auditors.split(",") if count.strip()]
+    workload = WORKLOADS[args.workload]
+    workdir = args.workdir or tempfile.mkdtemp(prefix="evidence-load-")
+    corpus = {"csv_rows": args.csv_rows, "xlsx_rows": args.xlsx_rows, "pdf_pages": args.pdf_pages}
+    files = build_corpus(os.path.join(workdir, "corpus"), corpus, args.seed)
+
+    github = StubGitHubServer(latency_ms=args.github_latency_ms, seed=args.seed)
+    jira = StubJiraServer(latency_ms=args.jira_latency_ms, seed=args.seed)
+    llm = StubOpenAIServer(latency_ms=args.llm_latency_ms, tokens_per_second=args.llm_tokens_per_second,
+                           failure_rate=args.llm_failure_rate, unavailable_models=args.llm_unavailable_model,
+                           seed=args.seed)
+    server_env = {
+        "OPENAI_API_KEY": "" if args.no_llm else "stub",
+        "OPENAI_BASE_URL": f"{llm.url}/v1",
+        "GITHUB_API_URL": github.url,
+        "GITHUB_ORG": "bench",
+        "GITHUB_TOKEN": "bench",
+        "JIRA_URL": jira.url,
+        "JIRA_USERNAME": "bench",
+        "JIRA_API_TOKEN": "bench",
+    }
+
+    server_dir = os.path.join(workdir, "server")
+    shutil.rmtree(server_dir, ignore_errors=True)
+    stages: List[Dict[str, Any]] = []
+    saturation = None
+    with github, jira, llm, ApiServer(server_dir, env=server_env, workers=args.workers) as server:
+        print(f"Ingesting {len(files)} documents ...")
+        ingestion = ingest(server.url, files, timeout=3600)
+        query_ids: List[str] = []
+        upload_numbers = itertools.count(1)
+        if args.warmup_seconds:
+            asyncio.run(run_stage(server.url, auditor_counts[0], args.warmup_seconds, workload, args.seed,
+                                  args.think_time, args.upload_rows, query_ids, upload_numbers))
+
+        for auditors in auditor_counts:
+            print(f"Stage: {auditors} auditors for {args.stage_seconds:g}s ...")
+            stages.append(asyncio.run(run_stage(server.url, auditors, args.stage_seconds, workload, args.seed,
+                                                args.think_time, args.upload_rows, query_ids, upload_numbers)))
+            saturation = find_saturation(stages, args.min_scaling, args.slo_p95_ms, args.max_error_rate)
+            if saturation and args.stop_at_saturation:
+                break
+
+        server_metrics = parse_metrics(httpx.get(f"{server.url}/metrics").text)
+        upstream = {"github": github.stats(), "jira": jira.stats(), "openai": llm.stats()}
+
+    peak = max(stages, key=lambda stage: stage["throughput_rps"] or 0)
+    results = {
+        "workload": args.workload,
+        "config": {**corpus, "weights": workload, "auditors": auditor_counts, "stage_seconds": args.stage_seconds,
+                   "think_time": args.think_time, "upload_rows": args.upload_rows, "seed": args.seed,
+                   "workers": args.workers, "github_latency_ms": args.github_latency_ms,
+                   "jira_latency_ms": args.jira_latency_ms,
+                   "llm": None if args.no_llm else llm.settings()},
+        "environment": environment_info(),
+        "ingestion": ingestion,
+        "stages": stages,
+        # Keyed like benchmarks.run scenarios so harness.compare works on load runs too
+        "scenarios": {f"{stage['auditors']}_auditors": {k: v for k, v in stage.items() if k != "actions"} for stage in stages},
+        "saturation": saturation,
+        "peak": {"auditors": peak["auditors"], "throughput_rps": peak["throughput_rps"]},
+        "upstream": upstream,
+        "server_metrics": server_metrics
+    }
+
+    output = args.output or os.path.join(BENCHMARKS_DIR, "results", f"load-{args.workload}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    save_json(output, results)
+    baseline_path = args.baseline or os.path.join(BENCHMARKS_DIR, "baselines", f"load-{args.workload}.json")
+    baseline = load_json(baseline_path)
+    comparison = compare(results, baseline, args.tolerance) if baseline else []
+    print_summary(results, comparison)
+    print(f"\nResults written to {output}")
+
+    if args.save_baseline:
+        save_json(baseline_path, results)
+        print(f"Baseline stored at {baseline_path}")
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = [row for row in comparison if row["regressions"]]
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed beyond {args.tolerance:.0%} of {baseline_path}")
+        return 1 if args.fail_on_regression else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
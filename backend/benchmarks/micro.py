@@ -0,0 +1,103 @@
+"""In-process benchmarks of the parsing and scoring hot paths, with optional profiling.
+
+    cd backend
+    python -m benchmarks.micro --csv-rows 1000000
+    python -m benchmarks.micro --xlsx-rows 200000 --profile parse.folded
+
+Each step is timed on its own: building the Arrow tables, the name index, row
+scoring (the work ``_search_document_data`` hands to the compute pool) and
+``DocumentParser.parse_document``. With ``--profile``, everything runs under the
+sampling profiler from ``app.core.profiler``, and the folded stacks are written to
+the given file.
+"""
+from typing import Any, Callable, Dict
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks import corpora
+from app.core.profiler import profile
+from app.integrations.document_parser import DocumentParser
+from app.services.document_index import build_document_tables, build_name_index, score_table_range
+from app.services.document_search import extract_meaningful_terms
+from app.services.name_index import NameIndex
+
+QUERY = "laptops assigned to jane smith at office floor 2"
+
+def timed(results: Dict[str, Any], name: str, func: Callable[[], Any]) -> Any:
+    started = time.perf_counter()
+    value = func()
+    results[name] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"{name:<36}{results[name]:>12.1f} ms")
+    return value
+
+def bench_document(results: Dict[str, Any], label: str, path: str, workdir: str):
+    tables = timed(results, f"{label}.build_tables",
+                   lambda: build_document_tables(path, os.path.join(workdir, f"{label}_tables")))
+    timed(results, f"{label}.name_index", lambda: build_name_index(tables["tables"], 2))
+
+    terms = extract_meaningful_terms(QUERY, QUERY, {})
+
+    def score_all():
+        return sum(len(score_table_range(table["path"], 0, table["rows"], QUERY, QUERY, terms))
+                   for table in tables["tables"])
+    timed(results, f"{label}.score_rows", score_all)
+
+    parser = DocumentParser(pdf_cache_dir=os.path.join(workdir, "pdf_cache"))
+    timed(results, f"{label}.parse_document", lambda: asyncio.run(parser.parse_document(path)))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv-rows", type=int, default=100_000)
+    parser.add_argument("--xlsx-rows", type=int, default=50_000)
+    parser.add_argument("--pdf-pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profile", help="Write folded stacks for the whole run to this file")
+    parser.add_argument("--profile-interval-ms", type=float, default=1)
+    parser.add_argument("--output", help="Write timings as JSON to this file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="evidence-micro-")
+    # build_document_tables keeps its PDF page cache under ./storage
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+    results: Dict[str, Any] = {}
+    sampler_context = profile(args.profile_interval_ms / 1000) if args.profile else contextlib.nullcontext()
+    try:
+        files = {}
+        if args.csv_rows:
+            files["csv"] = corpora.write_asset_register_csv(os.path.join(workdir, "assets.csv"), args.csv_rows, args.seed)
+        if args.xlsx_rows:
+            files["xlsx"] = corpora.write_asset_register_xlsx(os.path.join(workdir, "assets.xlsx"), args.xlsx_rows, seed=args.seed)
+        if args.pdf_pages:
+            files["pdf"] = corpora.write_policy_pdf(os.path.join(workdir, "policy.pdf"), args.pdf_pages, args.seed)
+
+        with sampler_context as sampler:
+            for label, path in files.items():
+                bench_document(results, label, path, workdir)
+
+            lookup_index = NameIndex()
+            for name in corpora.people():
+                lookup_index.add(name, (0, "Assigned To"))
+            timed(results, "name_lookup.x1000", lambda: [lookup_index.lookup("Jayne Smyth") for _ in range(1000)])
+
+        if args.profile:
+            with open(args.profile, "w", encoding="utf-8") as f:
+                f.write(sampler.folded())
+            print(f"Folded stacks ({sampler.samples} samples) written to {args.profile}")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""End-to-end benchmark: synthetic corpus, stub upstreams, a real API server.
+
+    cd backend
+    python -m benchmarks.run --preset small
+    python -m benchmarks.run --preset medium --save-baseline
+    python -m benchmarks.run --preset medium --fail-on-regression
+
+Each run uploads the corpus, waits for ingestion and drives /evidence/query,
+/documents/query, /reports and the export endpoints. Results go to
+``benchmarks/results/<preset>-<timestamp>.json``. When a baseline exists for the
+preset, the run is compared against it.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks import corpora
+from benchmarks.harness import (
+    DEFAULT_TOLERANCE, ApiServer, compare, environment_info, load_json, parse_metrics, run_load, save_json
+)
+from benchmarks.stub_servers import StubGitHubServer, StubJiraServer, StubOpenAIServer
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Corpus sizes and request counts per preset
+PRESETS: Dict[str, Dict[str, int]] = {
+    "small": {"csv_rows": 10_000, "xlsx_rows": 10_000, "pdf_pages": 20, "requests": 40, "concurrency": 4},
+    "medium": {"csv_rows": 250_000, "xlsx_rows": 100_000, "pdf_pages": 200, "requests": 100, "concurrency": 8},
+    "large": {"csv_rows": 1_000_000, "xlsx_rows": 500_000, "pdf_pages": 1000, "requests": 200, "concurrency": 16},
+    "xlarge": {"csv_rows": 5_000_000, "xlsx_rows": 1_000_000, "pdf_pages": 2000, "requests": 200, "concurrency": 16},
+}
+
+GITHUB_QUERIES = [
+    "Which PRs were merged in the last 7 days and who approved them?",
+    "Which PRs have been waiting for review for more than 48 hours?",
+    "Show details for PR #{n}",
+    "List PRs",
+]
+JIRA_QUERIES = [
+    "Show jira ticket {n}",
+    "List jira issues",
+]
+MIXED_QUERIES = [
+    "Evidence of access reviews for Data Center A",
+    "Who approved changes for Office Floor 2",
+]
+EXPORT_FORMATS = ["csv", "json", "xlsx", "parquet"]
+
+def build_corpus(directory: str, preset: Dict[str, int], seed: int) -> List[str]:
+    files = [
+        corpora.write_asset_register_csv(os.path.join(directory, "asset_register.csv"), preset["csv_rows"], seed),
+        corpora.write_asset_register_xlsx(os.path.join(directory, "asset_register_regions.xlsx"), preset["xlsx_rows"], seed=seed),
+        corpora.write_policy_pdf(os.path.join(directory, "security_policy.pdf"), preset["pdf_pages"], seed),
+    ]
+    return files
+
+def ingest(base_url: str, files: List[str], timeout: float) -> Dict[str, Any]:
+    """Upload every file and wait until all of them are indexed."""
+    results = {}
+    with httpx.Client(base_url=base_url, timeout=timeout) as client:
+        pending = {}
+        for path in files:
+            started = time.perf_counter()
+            with open(path, "rb") as f:
+                response = client.post("/api/v1/evidence/documents/upload", files={"file": (os.path.basename(path), f)})
+            response.raise_for_status()
+            body = response.json()
+            pending[body["ingestion_id"]] = (path, started, time.perf_counter() - started)
+
+        deadline = time.monotonic() + timeout
+        while pending and time.monotonic() < deadline:
+            for ingestion_id in list(pending):
+                status = client.get(f"/api/v1/evidence/documents/ingestions/{ingestion_id}").json()
+                if status["status"] in ("indexed", "failed"):
+                    path, started, upload_seconds = pending.pop(ingestion_id)
+                    results[os.path.basename(path)] = {
+                        "bytes": os.path.getsize(path),
+                        "status": status["status"],
+                        "error": status.get("error"),
+                        "rows": status.get("row_count"),
+                        "upload_ms": round(upload_seconds * 1000, 1),
+                        "ready_ms": round((time.perf_counter() - started) * 1000, 1)
+                    }
+            time.sleep(0.2)
+        for path, _, _ in pending.values():
+            results[os.path.basename(path)] = {"status": "timeout"}
+    return results
+
+async def run_scenarios(base_url: str, requests: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    assignees = corpora.people()
+    query_ids: List[str] = []
+
+    async def post_query(client, payload):
+        response = await client.post("/api/v1/evidence/query", json=payload)
+        if response.status_code == 200:
+            query_ids.append(response.json()["query_id"])
+        return response
+
+    def evidence_query(queries, query_type):
+        async def send(client, index):
+            query = queries[index % len(queries)].format(n=index % 50 + 1)
+            return await post_query(client, {"query": query, "query_type": query_type})
+        return send
+
+    async def documents_query(client, index):
+        name = assignees[index * 7 % len(assignees)]
+        queries = [f"laptops assigned to {name}", f"assets at {corpora.LOCATIONS[index % len(corpora.LOCATIONS)]}",
+                   f"access reviews approved by {name}"]
+        response = await client.post("/api/v1/evidence/documents/query", json={"query": queries[index % len(queries)]})
+        if response.status_code == 200:
+            query_ids.append(response.json()["query_id"])
+        return response
+
+    scenarios = {}
+    scenarios["evidence_query_github"] = await run_load(evidence_query(GITHUB_QUERIES, "github"), base_url, requests, concurrency)
+    scenarios["evidence_query_jira"] = await run_load(evidence_query(JIRA_QUERIES, "jira"), base_url, requests, concurrency)
+    scenarios["evidence_query_mixed"] = await run_load(evidence_query(MIXED_QUERIES, None), base_url, requests, concurrency)
+    scenarios["documents_query"] = await run_load(documents_query, base_url, requests, concurrency)
+
+    if not query_ids:
+        raise RuntimeError("No query succeeded, so there is nothing to report on or export")
+
+    async def reports(client, index):
+        return await client.get("/api/v1/evidence/reports")
+    scenarios["reports_list"] = await run_load(reports, base_url, max(1, requests // 4), concurrency)
+
+    async def report_export(client, index):
+        return await client.post(f"/api/v1/evidence/reports/{query_ids[index % len(query_ids)]}/export", params={"format": "json"})
+    scenarios["report_export"] = await run_load(report_export, base_url, requests, concurrency)
+
+    for format in EXPORT_FORMATS:
+        # Each stored result is exported once (cold), then downloaded again from the cache
+        export_ids = query_ids[:requests]
+
+        async def export_cold(client, index, format=format):
+            query_id = export_ids[index]
+            return await client.post(f"/api/v1/evidence/export/{query_id}", json={"query_id": query_id, "format": format})
+
+        async def export_cached(client, index, format=format):
+            return await client.get(f"/api/v1/evidence/export/{export_ids[index % len(export_ids)]}/download",
+                                    params={"format": format})
+
+        scenarios[f"export_{format}_cold"] = await run_load(export_cold, base_url, len(export_ids), concurrency)
+        scenarios[f"export_{format}_cached"] = await run_load(export_cached, base_url, requests, concurrency)
+
+    async def export_stream(client, index):
+        return await client.get(f"/api/v1/evidence/export/{query_ids[index % len(query_ids)]}/stream", params={"format": "csv"})
+    scenarios["export_stream_csv"] = await run_load(export_stream, base_url, requests, concurrency)
+    return scenarios
+
+def print_summary(results: Dict[str, Any], comparison: List[Dict[str, Any]]):
+    print(f"\n{'document':<32}{'status':>10}{'rows':>12}{'ready ms':>12}")
+    for name, ingestion in results["ingestion"].items():
+        print(f"{name:<32}{ingestion['status']:>10}{str(ingestion.get('rows')):>12}{str(ingestion.get('ready_ms')):>12}")
+
+    changes = {row["scenario"]: row for row in comparison}
+    print(f"\n{'scenario':<28}{'req':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}  vs baseline")
+    for name, stats in results["scenarios"].items():
+        row = changes.get(name, {})
+        delta = ""
+        if "p95_ms" in row:
+            delta = f"p95 {row['p95_ms']['change']:+.0%}"
+        if "throughput_rps" in row:
+            delta += f", req/s {row['throughput_rps']['change']:+.0%}"
+        if row.get("regressions"):
+            delta += "  REGRESSION"
+        print(f"{name:<28}{stats['requests']:>6}{stats['errors']:>5}{str(stats['p50_ms']):>10}"
+              f"{str(stats['p95_ms']):>10}{str(stats['p99_ms']):>10}{str(stats['throughput_rps']):>9}  {delta}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--csv-rows", type=int)
+    parser.add_argument("--xlsx-rows", type=int)
+    parser.add_argument("--pdf-pages", type=int)
+    parser.add_argument("--requests", type=int, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="API server worker processes")
+    parser.add_argument("--github-latency-ms", type=float, default=50)
+    parser.add_argument("--github-rate-limit", type=float, help="Stub GitHub requests per second")
+    parser.add_argument("--jira-latency-ms", type=float, default=80)
+    parser.add_argument("--jira-rate-limit", type=float, help="Stub Jira requests per second")
+    parser.add_argument("--llm", action="store_true", help="Enable AI against the stub LLM (default: AI disabled)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Stub LLM time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50)
+    parser.add_argument("--workdir", help="Keep corpus and server storage here instead of a temp dir")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/<preset>-<time>.json)")
+    parser.add_argument("--baseline", help="Baseline to compare against (default benchmarks/baselines/<preset>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the preset's baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--profile", help="Write folded stacks of the server for the whole run to this file")
+    args = parser.parse_args(argv)
+
+    preset = dict(PRESETS[args.preset])
+    for key in ("csv_rows", "xlsx_rows", "pdf_pages", "requests", "concurrency"):
+        if getattr(args, key) is not None:
+            preset[key] = getattr(args, key)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="evidence-bench-")
+    corpus_dir = os.path.join(workdir, "corpus")
+    print(f"Generating corpus in {corpus_dir} ...")
+    started = time.perf_counter()
+    files = build_corpus(corpus_dir, preset, args.seed)
+    print(f"Corpus ready in {time.perf_counter() - started:.1f}s")
+
+    github = StubGitHubServer(latency_ms=args.github_latency_ms, rate_limit=args.github_rate_limit, seed=args.seed)
+    jira = StubJiraServer(latency_ms=args.jira_latency_ms, rate_limit=args.jira_rate_limit, seed=args.seed)
+    llm = StubOpenAIServer(latency_ms=args.llm_latency_ms, tokens_per_second=args.llm_tokens_per_second, seed=args.seed)
+    admin_token = "benchmark-admin"
+    server_env = {
+        "OPENAI_API_KEY": "stub" if args.llm else "",
+        "OPENAI_BASE_URL": f"{llm.url}/v1",
+        "GITHUB_API_URL": github.url,
+        "GITHUB_ORG": "bench",
+        "GITHUB_TOKEN": "bench",
+        "JIRA_URL": jira.url,
+        "JIRA_USERNAME": "bench",
+        "JIRA_API_TOKEN": "bench",
+        "ADMIN_TOKEN": admin_token,
+        "SLOW_QUERY_THRESHOLD_MS": "0",
+    }
+
+    server_dir = os.path.join(workdir, "server")
+    shutil.rmtree(server_dir, ignore_errors=True)
+    with github, jira, llm, ApiServer(server_dir, env=server_env, workers=args.workers) as server:
+        admin = {"X-Admin-Token": admin_token}
+        print(f"Ingesting {len(files)} documents ...")
+        ingestion = ingest(server.url, files, timeout=3600)
+        if args.profile:
+            httpx.post(f"{server.url}/api/v1/admin/profile", json={"seconds": 3600}, headers=admin).raise_for_status()
+        print(f"Running scenarios: {preset['requests']} requests at concurrency {preset['concurrency']} ...")
+        scenarios = asyncio.run(run_scenarios(server.url, preset["requests"], preset["concurrency"]))
+        if args.profile:
+            httpx.post(f"{server.url}/api/v1/admin/profile/stop", headers=admin)
+            folded = httpx.get(f"{server.url}/api/v1/admin/profile/folded", headers=admin).text
+            with open(args.profile, "w", encoding="utf-8") as f:
+                f.write(folded)
+        server_metrics = parse_metrics(httpx.get(f"{server.url}/metrics").text)
+        upstream = {"github": github.stats(), "jira": jira.stats(), "openai": llm.stats()}
+
+    results = {
+        "preset": args.preset,
+        "config": {**preset, "seed": args.seed, "workers": args.workers,
+                   "github_latency_ms": args.github_latency_ms, "github_rate_limit": args.github_rate_limit,
+                   "jira_latency_ms": args.jira_latency_ms, "jira_rate_limit": args.jira_rate_limit,
+                   "llm": llm.settings() if args.llm else None},
+        "environment": environment_info(),
+        "ingestion": ingestion,
+        "scenarios": scenarios,
+        "upstream": upstream,
+        "server_metrics": server_metrics
+    }
+
+    output = args.output or os.path.join(BENCHMARKS_DIR, "results", f"{args.preset}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    save_json(output, results)
+    baseline_path = args.baseline or os.path.join(BENCHMARKS_DIR, "baselines", f"{args.preset}.json")
+    baseline = load_json(baseline_path)
+    comparison = compare(results, baseline, args.tolerance) if baseline else []
+    print_summary(results, comparison)
+    print(f"\nResults written to {output}")
+
+    if args.save_baseline:
+        save_json(baseline_path, results)
+        print(f"Baseline stored at {baseline_path}")
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = [row for row in comparison if row["regressions"]]
+    if regressions:
+        print(f"{len(regressions)} scenario(s) regressed beyond {args.tolerance:.0%} of {baseline_path}")
+        return 1 if args.fail_on_regression else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
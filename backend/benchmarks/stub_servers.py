@@ -0,0 +1,544 @@
+"""Local stand-ins for the GitHub, Jira and OpenAI REST APIs.
+
+Each stub serves seeded data from memory on a background thread, adds a fixed
+latency per request and can enforce a rate limit, so upstream behaviour is
+repeatable between benchmark runs. Any of them can also run on its own:
+
+    cd backend
+    python -m benchmarks.stub_servers openai --port 8100 --latency-ms 300 --tokens-per-second 40
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8100/v1 uvicorn app.main:app
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+
+from benchmarks.corpora import people
+
+class RateLimiter:
+    """Token bucket: ``rate`` requests per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate or 1))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[bool, float]:
+        """``(allowed, seconds until the next token)``."""
+        if not self.rate:
+            return True, 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True, 0.0
+            return False, (1 - self._tokens) / self.rate
+
+class StreamingBody:
+    """A response body that ``route`` hands back to be sent chunk by chunk as it is produced."""
+
+    def __init__(self, chunks: Iterable[bytes], content_type: str = "text/event-stream"):
+        self.chunks = chunks
+        self.content_type = content_type
+
+class StubServer:
+    """Threaded HTTP server with latency and rate limiting; subclasses implement ``route``."""
+
+    name = "stub"
+
+    def __init__(self, latency_ms: float = 0, rate_limit: Optional[float] = None,
+                 burst: Optional[int] = None, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency_ms / 1000
+        self.limiter = RateLimiter(rate_limit, burst)
+        self.requests = 0
+        self.rate_limited = 0
+        self._counter_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"{self.name}-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._counter_lock:
+            return {"requests": self.requests, "rate_limited": self.rate_limited}
+
+    def route(self, method: str, path: str, query: Dict[str, List[str]], body: Any) -> Tuple[int, Any]:
+        raise NotImplementedError
+
+    def rate_limit_response(self, retry_after: float) -> Tuple[int, Dict[str, str], Any]:
+        return 429, {"Retry-After": str(max(1, round(retry_after)))}, {"message": "Rate limit exceeded"}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+            def _serve(self, method: str):
+                with stub._counter_lock:
+                    stub.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                allowed, retry_after = stub.limiter.acquire()
+                headers: Dict[str, str] = {}
+                if not allowed:
+                    with stub._counter_lock:
+                        stub.rate_limited += 1
+                    status, headers, payload = stub.rate_limit_response(retry_after)
+                else:
+                    parsed = urlparse(self.path)
+                    try:
+                        body = json.loads(raw) if raw else None
+                    except json.JSONDecodeError:
+                        body = None
+                    status, payload = stub.route(method, parsed.path, parse_qs(parsed.query), body)
+
+                if isinstance(payload, StreamingBody):
+                    self._stream(status, headers, payload)
+                    return
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, status: int, headers: Dict[str, str], body: "StreamingBody"):
+                self.send_response(status)
+                self.send_header("Content-Type", body.content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                for chunk in body.chunks:
+                    self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+class StubGitHubServer(StubServer):
+    """Pull requests and reviews for one repository under ``/repos/{org}/{repo}/pulls``."""
+
+    name = "github"
+
+    def __init__(self, pull_requests: int = 300, seed: int = 42, **kwargs):
+        super().__init__(**kwargs)
+        rng = random.Random(seed)
+        logins = [name.lower().replace(" ", "-") for name in people(60)]
+        now = datetime.now(timezone.utc)
+        self.pulls: List[Dict[str, Any]] = []
+        self.reviews: Dict[int, List[Dict[str, Any]]] = {}
+        for number in range(pull_requests, 0, -1):
+            created = now - timedelta(hours=rng.uniform(1, 24 * 60))
+            merged = created + timedelta(hours=rng.uniform(1, 72)) if rng.random() < 0.6 else None
+            if merged and merged > now:
+                merged = None
+            state = "closed" if merged or rng.random() < 0.1 else "open"
+            self.pulls.append({
+                "number": number,
+                "title": f"Change {number}: update asset sync",
+                "state": state,
+                "user": {"login": rng.choice(logins)},
+                "created_at": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "updated_at": (merged or created).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "merged_at": merged.strftime("%Y-%m-%dT%H:%M:%SZ") if merged else None,
+                "html_url": f"https://github.example/pulls/{number}"
+            })
+            self.reviews[number] = [
+                {"user": {"login": rng.choice(logins)}, "state": rng.choice(["APPROVED", "COMMENTED", "CHANGES_REQUESTED"])}
+                for _ in range(rng.randint(0, 3))
+            ]
+
+    def rate_limit_response(self, retry_after: float):
+        # GitHub reports exhausted primary limits as 403 with rate limit headers
+        reset = int(time.time() + retry_after) + 1
+        return 403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)}, {"message": "API rate limit exceeded"}
+
+    def route(self, method, path, query, body):
+        match = re.fullmatch(r"/repos/[^/]+/[^/]+/pulls(?:/(\d+)(/reviews)?)?", path)
+        if method != "GET" or not match:
+            return 404, {"message": "Not Found"}
+        number, reviews = match.groups()
+        if number is None:
+            return 200, self._list_pulls(query)
+        pull = next((pull for pull in self.pulls if pull["number"] == int(number)), None)
+        if pull is None:
+            return 404, {"message": "Not Found"}
+        return 200, self.reviews[pull["number"]] if reviews else pull
+
+    def _list_pulls(self, query):
+        state = query.get("state", ["open"])[0]
+        sort = query.get("sort", ["created"])[0]
+        direction = query.get("direction", ["desc"])[0]
+        per_page = min(100, int(query.get("per_page", ["30"])[0]))
+        page = int(query.get("page", ["1"])[0])
+        pulls = [pull for pull in self.pulls if state == "all" or pull["state"] == state]
+        key = "updated_at" if sort == "updated" else "created_at"
+        pulls.sort(key=lambda pull: pull[key], reverse=direction == "desc")
+        return pulls[(page - 1) * per_page: page * per_page]
+
+class StubJiraServer(StubServer):
+    """Issue lookup and JQL search (``project``, ``assignee`` and ``status`` clauses)."""
+
+    name = "jira"
+
+    def __init__(self, issues: int = 2000, project: str = "PROJ", seed: int = 42, **kwargs):
+        super().__init__(**kwargs)
+        rng = random.Random(seed)
+        assignees = people(80)
+        statuses = ["To Do", "In Progress", "In Review", "Done"]
+        now = datetime.now(timezone.utc)
+        self.issues: Dict[str, Dict[str, Any]] = {}
+        for number in range(1, issues + 1):
+            key = f"{project}-{number}"
+            created = now - timedelta(days=rng.uniform(0, 365))
+            assignee = rng.choice(assignees) if rng.random() < 0.9 else None
+            self.issues[key] = {
+                "key": key,
+                "fields": {
+                    "project": {"key": project},
+                    "summary": f"Audit control {number}: verify asset ownership",
+                    "description": "Synthetic issue for benchmarking",
+                    "status": {"name": rng.choice(statuses)},
+                    "assignee": {"displayName": assignee} if assignee else None,
+                    "reporter": {"displayName": rng.choice(assignees)},
+                    "created": created.isoformat(),
+                    "updated": (created + timedelta(days=rng.uniform(0, 30))).isoformat(),
+                    "priority": {"name": rng.choice(["Low", "Medium", "High"])},
+                    "comment": {"comments": []}
+                },
+                "changelog": {"histories": []}
+            }
+
+    def route(self, method, path, query, body):
+        match = re.fullmatch(r"/rest/api/3/issue/([A-Za-z0-9]+-\d+)", path)
+        if method == "GET" and match:
+            issue = self.issues.get(match.group(1))
+            return (200, issue) if issue else (404, {"errorMessages": ["Issue does not exist"]})
+        if method == "POST" and path == "/rest/api/3/search":
+            return 200, self._search(body or {})
+        return 404, {"errorMessages": ["Not found"]}
+
+    def _search(self, body):
+        jql = body.get("jql", "")
+        max_results = int(body.get("maxResults", 50))
+        clauses = dict(
+            (field.lower(), value.strip("'\""))
+            for field, value in re.findall(r"(\w+)\s*=\s*('[^']*'|\"[^\"]*\"|\S+)", jql)
+        )
+        matches = []
+        for issue in self.issues.values():
+            fields = issue["fields"]
+            if "project" in clauses and fields["project"]["key"] != clauses["project"]:
+                continue
+            if "status" in clauses and fields["status"]["name"].lower() != clauses["status"].lower():
+                continue
+            if "assignee" in clauses:
+                assignee = (fields["assignee"] or {}).get("displayName") or ""
+                if clauses["assignee"].lower() not in assignee.lower():
+                    continue
+            matches.append(issue)
+        return {"total": len(matches), "maxResults": max_results, "issues": matches[:max_results]}
+
+# Which AIService call a chat completion serves, recognised from its system prompt
+OPENAI_OPERATIONS = [
+    ("github_function", "github evidence queries"),
+    ("query_analysis", "analyze the user's query"),
+    ("evidence_summary", "formatting evidence"),
+]
+
+# Models listed by GET /v1/models unless marked unavailable
+OPENAI_MODELS = ["gpt-4", "gpt-3.5-turbo"]
+
+def load_script(path: str) -> List[Dict[str, Any]]:
+    """Scripted responses for ``StubOpenAIServer``, from a JSON list of rules.
+
+    Each rule has a ``match`` regex, tested case-insensitively against the last user
+    message, and the ``content`` to answer with. Objects are sent as JSON text. An
+    optional ``operation`` (one of ``OPENAI_OPERATIONS``) limits the rule to one call.
+    The first matching rule wins::
+
+        [{"operation": "query_analysis", "match": "access review",
+          "content": {"query_type": "document", "intent": "Access reviews", "parameters": {}, "confidence": 0.9}},
+         {"operation": "evidence_summary", "match": ".", "content": "Scripted summary"}]
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class StubOpenAIServer(StubServer):
+    """Deterministic OpenAI-compatible ``/v1/chat/completions`` and ``/v1/models``.
+
+    The system prompt tells the stub which ``AIService`` call it is serving. Answers come
+    from the first matching ``script`` rule, or else from built-in keyword rules, so the
+    same prompt always gets the same answer. On top of the base latency, which stands in
+    for time to first token:
+
+    - ``tokens_per_second`` paces completion tokens, streamed or not
+    - ``failure_rate`` fails that share of requests with ``failure_status``, drawn from a
+      seeded generator so the same requests fail on every run
+    - ``unavailable_models`` get 404 ``model_not_found``, like a key without GPT-4 access
+
+    ``stream: true`` requests are answered with server-sent events, one chunk per token.
+    ``POST /_stub/config`` changes the settings above mid-run (for example, to break the
+    upstream and then restore it), and ``GET /_stub/stats`` returns the counters.
+    """
+
+    name = "openai"
+
+    # Settings that POST /_stub/config may change
+    CONFIGURABLE = ("latency_ms", "tokens_per_second", "failure_rate", "failure_status", "unavailable_models")
+
+    def __init__(self, script: Optional[List[Dict[str, Any]]] = None, tokens_per_second: Optional[float] = None,
+                 failure_rate: float = 0.0, failure_status: int = 500, unavailable_models: Iterable[str] = (),
+                 seed: int = 42, **kwargs):
+        super().__init__(**kwargs)
+        self.script = [(re.compile(rule["match"], re.IGNORECASE), rule.get("operation"), rule["content"])
+                       for rule in script or []]
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.unavailable_models = set(unavailable_models)
+        self._failure_rng = random.Random(seed)
+        self._seen_prompts = set()
+        self.counters: Dict[str, Any] = {
+            "failed": 0, "model_unavailable": 0, "streamed": 0, "repeated_prompts": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "by_model": {}, "by_operation": {}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        base = super().stats()
+        with self._counter_lock:
+            return {**base, **json.loads(json.dumps(self.counters))}
+
+    def configure(self, **settings) -> Dict[str, Any]:
+        unknown = set(settings) - set(self.CONFIGURABLE)
+        if unknown:
+            raise ValueError(f"Unknown stub settings: {', '.join(sorted(unknown))}")
+        for key, value in settings.items():
+            if key == "latency_ms":
+                self.latency = value / 1000
+            elif key == "unavailable_models":
+                self.unavailable_models = set(value)
+            else:
+                setattr(self, key, value)
+        return self.settings()
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": self.latency * 1000,
+            "tokens_per_second": self.tokens_per_second,
+            "failure_rate": self.failure_rate,
+            "failure_status": self.failure_status,
+            "unavailable_models": sorted(self.unavailable_models)
+        }
+
+    def rate_limit_response(self, retry_after: float):
+        return 429, {"Retry-After": str(max(1, round(retry_after)))}, \
+            self._error("Rate limit reached for requests", "requests", "rate_limit_exceeded")
+
+    def route(self, method, path, query, body):
+        path = path.rstrip("/")
+        if method == "GET" and path == "/_stub/stats":
+            return 200, self.stats()
+        if method == "POST" and path == "/_stub/config":
+            try:
+                return 200, self.configure(**(body or {}))
+            except ValueError as e:
+                return 400, self._error(str(e), "invalid_request_error")
+        if method == "GET" and path == "/v1/models":
+            models = [model for model in OPENAI_MODELS if model not in self.unavailable_models]
+            return 200, {"object": "list", "data": [{"id": model, "object": "model", "owned_by": "stub"} for model in models]}
+        if method != "POST" or path != "/v1/chat/completions":
+            return 404, self._error("Not found", "invalid_request_error")
+
+        body = body or {}
+        model = body.get("model", "gpt-4")
+        messages = body.get("messages") or []
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        operation = next((name for name, marker in OPENAI_OPERATIONS if marker in system.lower()), "other")
+        prompt_key = json.dumps([model, messages], sort_keys=True)
+
+        with self._counter_lock:
+            by_model, by_operation = self.counters["by_model"], self.counters["by_operation"]
+            by_model[model] = by_model.get(model, 0) + 1
+            by_operation[operation] = by_operation.get(operation, 0) + 1
+            if prompt_key in self._seen_prompts:
+                self.counters["repeated_prompts"] += 1
+            self._seen_prompts.add(prompt_key)
+            if model in self.unavailable_models:
+                self.counters["model_unavailable"] += 1
+                return 404, self._error(f"The model `{model}` does not exist or you do not have access to it.",
+                                        "invalid_request_error", "model_not_found")
+            if self.failure_rate and self._failure_rng.random() < self.failure_rate:
+                self.counters["failed"] += 1
+                return self.failure_status, self._error("The server had an error while processing your request.", "server_error")
+
+        content = self.respond(operation, system, user)
+        tokens = re.findall(r"\S+\s*", content)
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        with self._counter_lock:
+            self.counters["prompt_tokens"] += prompt_tokens
+            self.counters["completion_tokens"] += len(tokens)
+            if body.get("stream"):
+                self.counters["streamed"] += 1
+
+        completion_id = f"chatcmpl-stub-{self.requests}"
+        if body.get("stream"):
+            return 200, StreamingBody(self._stream_chunks(completion_id, model, tokens))
+        if self.tokens_per_second:
+            time.sleep(len(tokens) / self.tokens_per_second)
+        return 200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                      "total_tokens": prompt_tokens + len(tokens)}
+        }
+
+    def respond(self, operation: str, system: str, user: str) -> str:
+        for pattern, rule_operation, content in self.script:
+            if (rule_operation is None or rule_operation == operation) and pattern.search(user):
+                return content if isinstance(content, str) else json.dumps(content)
+
+        text = user.lower()
+        if operation == "github_function":
+            return json.dumps(self._github_function(text))
+        if operation == "query_analysis":
+            if any(word in text for word in ("pr ", "prs", "pull request", "merged", "github")):
+                query_type = "github"
+            elif any(word in text for word in ("jira", "ticket", "issue")):
+                query_type = "jira"
+            elif any(word in text for word in ("assigned", "laptop", "asset", "document")):
+                query_type = "document"
+            else:
+                query_type = "mixed"
+            return json.dumps({
+                "query_type": query_type,
+                "intent": f"Find evidence related to: {user}",
+                "parameters": {},
+                "confidence": 0.9,
+                "clarifying_questions": []
+            })
+        query = user.splitlines()[0].replace("Query: ", "", 1) if user else ""
+        findings = [line[2:] for line in user.splitlines() if line.startswith("- ")]
+        lines = [f"Evidence summary for: {query}", "", f"{len(findings)} evidence item(s) were found."]
+        lines += [f"{i}. {finding}" for i, finding in enumerate(findings[:5], 1)]
+        return "\n".join(lines)
+
+    def _github_function(self, text: str) -> Dict[str, Any]:
+        if "merged" in text:
+            match = re.search(r"last (\d+) days", text)
+            return {"function": "get_merged_prs_last_n_days", "parameters": {"n": int(match.group(1)) if match else 7}}
+        if "waiting for review" in text:
+            match = re.search(r"(\d+)\s*hours", text)
+            return {"function": "get_prs_waiting_for_review", "parameters": {"hours": int(match.group(1)) if match else 24}}
+        match = re.search(r"pr\s*#?(\d+)", text)
+        if match:
+            return {"function": "get_pr_details", "parameters": {"pr_number": int(match.group(1))}}
+        return {"function": "get_prs", "parameters": {}}
+
+    def _stream_chunks(self, completion_id: str, model: str, tokens: List[str]) -> Iterator[bytes]:
+        created = int(time.time())
+
+        def event(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> bytes:
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(chunk)}\n\n".encode()
+
+        yield event({"role": "assistant", "content": ""})
+        for token in tokens:
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield event({"content": token})
+        yield event({}, "stop")
+        yield b"data: [DONE]\n\n"
+
+    @staticmethod
+    def _error(message: str, type: str, code: Optional[str] = None) -> Dict[str, Any]:
+        return {"error": {"message": message, "type": type, "param": None, "code": code}}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run one stub upstream in the foreground until interrupted.")
+    parser.add_argument("stub", choices=["github", "jira", "openai"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, help="Requests per second")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tokens-per-second", type=float, help="openai: pace completion tokens")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="openai: share of requests to fail")
+    parser.add_argument("--failure-status", type=int, default=500, help="openai: status of injected failures")
+    parser.add_argument("--unavailable-model", action="append", default=[], help="openai: answer 404 for this model")
+    parser.add_argument("--script", help="openai: JSON file of scripted responses")
+    args = parser.parse_args(argv)
+
+    common = {"latency_ms": args.latency_ms, "rate_limit": args.rate_limit, "host": args.host, "port": args.port}
+    if args.stub == "openai":
+        server = StubOpenAIServer(script=load_script(args.script) if args.script else None,
+                                  tokens_per_second=args.tokens_per_second, failure_rate=args.failure_rate,
+                                  failure_status=args.failure_status, unavailable_models=args.unavailable_model,
+                                  seed=args.seed, **common)
+    elif args.stub == "github":
+        server = StubGitHubServer(seed=args.seed, **common)
+    else:
+        server = StubJiraServer(seed=args.seed, **common)
+
+    with server:
+        print(f"{server.name} stub listening on {server.url}", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
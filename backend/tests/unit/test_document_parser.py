@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.integrations.document_parser import DocumentParser, build_pdf_page_index
+
+PAGES = {
+    1: "Change tickets require approval before deployment.",
+    2: "Open PRs are reviewed within a day.",
+    3: "Laptops are reconciled quarterly."
+}
+
+@pytest.fixture
+def parsed_pdf(tmp_path):
+    parser = DocumentParser(pdf_cache_dir=str(tmp_path / "pages"))
+    for page, text in PAGES.items():
+        parser.page_cache.put("abc123", page, text)
+    parsed_data = {
+        "content_type": "pdf",
+        "path": str(tmp_path / "missing.pdf"),
+        "metadata": {"sha256": "abc123", "pages": len(PAGES)}
+    }
+    return parser, parsed_data
+
+def test_page_index_maps_trigrams_to_pages():
+    page_index = build_pdf_page_index(PAGES)
+    assert page_index["dep"] == [1]
+    assert page_index["rte"] == [3]
+    assert page_index["are"] == [2, 3]
+
+def test_pdf_search_matches_substrings_of_words(parsed_pdf):
+    parser, parsed_data = parsed_pdf
+    matches = asyncio.run(parser.search_in_document(parsed_data, ["deploy", "PR", "quarter", "absent"]))
+    assert {(match["term"], match["page"]) for match in matches} == {
+        ("deploy", 1), ("PR", 1), ("PR", 2), ("quarter", 3)
+    }
+
+def test_pdf_search_does_not_modify_parsed_data(parsed_pdf):
+    parser, parsed_data = parsed_pdf
+    before = dict(parsed_data)
+    asyncio.run(parser.search_in_document(parsed_data, ["tickets"]))
+    assert parsed_data == before
@@ -0,0 +1,47 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.services import evidence_service
+from app.services.evidence_service import EvidenceService
+
+EVIDENCE = [
+    {"source": "github", "source_type": "github", "title": "PR #1", "description": "Merged",
+     "confidence_score": 0.9, "timestamp": "2024-01-01T00:00:00Z", "data": {"number": 1}}
+]
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return EvidenceService()
+
+def _lookups():
+    return {result: CACHE_LOOKUPS.value(cache="export", result=result) for result in ("hit", "miss")}
+
+def test_export_counts_one_lookup_per_call(service):
+    before = _lookups()
+    path, cached = asyncio.run(service.export_evidence("q1", EVIDENCE, "csv"))
+    assert not cached and os.path.exists(path)
+    assert _lookups() == {"hit": before["hit"], "miss": before["miss"] + 1}
+
+    again, cached = asyncio.run(service.export_evidence("q1", EVIDENCE, "csv"))
+    assert cached and again == path
+    assert _lookups() == {"hit": before["hit"] + 1, "miss": before["miss"] + 1}
+
+def test_stale_temporary_exports_are_evicted(service):
+    os.makedirs(service.export_dir)
+    stale = os.path.join(service.export_dir, "tmp_stale_evidence.csv")
+    fresh = os.path.join(service.export_dir, "tmp_fresh_evidence.csv")
+    for path in (stale, fresh):
+        with open(path, "w") as f:
+            f.write("partial")
+    old = time.time() - evidence_service.EXPORT_TMP_GRACE_SECONDS - 1
+    os.utime(stale, (old, old))
+
+    asyncio.run(service.export_evidence("q1", EVIDENCE, "json"))
+
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
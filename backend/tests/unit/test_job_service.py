@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.shared_files import ProcessLease
+from app.services.job_service import TERMINAL_STATUSES, JobService, checkpoint_current_job
+from app.services.status_store import StatusStore
+
+@pytest.fixture
+def lease(tmp_path):
+    lease = ProcessLease(str(tmp_path / "leases"))
+    yield lease
+    lease.release()
+
+@pytest.fixture
+def store(tmp_path, lease):
+    return StatusStore(str(tmp_path / "jobs"), lease, terminal_statuses=TERMINAL_STATUSES)
+
+@pytest.fixture
+def jobs(store):
+    service = JobService(store, max_workers=2)
+    yield service
+    service.shutdown()
+
+def _wait_for(jobs, query_id, statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = jobs.get_status(query_id)
+        if status["status"] in statuses:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {query_id} never reached {statuses}: {status}")
+
+def test_cancel_interrupts_a_running_stage(jobs):
+    async def pipeline(progress):
+        progress.start_stage("documents")
+        await asyncio.sleep(60)
+        return {}
+
+    jobs.submit("q1", "slow", pipeline)
+    _wait_for(jobs, "q1", {"running"})
+    started = time.monotonic()
+    jobs.cancel("q1")
+
+    status = _wait_for(jobs, "q1", TERMINAL_STATUSES)
+    assert status["status"] == "cancelled"
+    assert status["stages"][0]["status"] == "cancelled"
+    assert time.monotonic() - started < 5
+
+def test_cancel_recorded_by_another_worker_stops_at_a_checkpoint(jobs, store):
+    reached = []
+
+    async def pipeline(progress):
+        for page in range(1000):
+            checkpoint_current_job()
+            reached.append(page)
+            await asyncio.to_thread(time.sleep, 0.01)
+        return {}
+
+    jobs.submit("q2", "paged", pipeline)
+    _wait_for(jobs, "q2", {"running"})
+    store.update("q2", cancel_requested=True, status="cancelling")
+
+    assert _wait_for(jobs, "q2", TERMINAL_STATUSES)["status"] == "cancelled"
+    assert len(reached) < 1000
+
+def test_checkpoint_outside_a_job_does_nothing():
+    checkpoint_current_job()
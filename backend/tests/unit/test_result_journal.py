@@ -0,0 +1,163 @@
+import json
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from app.services.result_journal import ResultJournal
+
+PROCESSES = 4
+THREADS = 4
+RECORDS_PER_THREAD = 50
+
+def _result(query_id, size=0):
+    return {"query_id": query_id, "summary": "x" * size, "evidence": []}
+
+def _append_from_threads(snapshot_path, worker, compact_bytes):
+    journal = ResultJournal(snapshot_path, compact_bytes=compact_bytes)
+
+    def append_all(thread):
+        for index in range(RECORDS_PER_THREAD):
+            journal.append(_result(f"{worker}-{thread}-{index}", size=200))
+
+    threads = [threading.Thread(target=append_all, args=(thread,)) for thread in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.compact()
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "query_results.json")
+
+def test_append_then_get(snapshot_path):
+    journal = ResultJournal(snapshot_path)
+    journal.append(_result("q1"))
+    journal.append({**_result("q1"), "summary": "updated"})
+    assert journal.get("q1")["summary"] == "updated"
+    assert journal.get("missing") is None
+    # A second reader, as in another worker, sees the same
+    assert ResultJournal(snapshot_path).all() == {"q1": journal.get("q1")}
+
+def test_concurrent_appends_from_several_processes(snapshot_path):
+    context = multiprocessing.get_context("fork")
+    # Small segments, so compactions run while other processes append
+    processes = [
+        context.Process(target=_append_from_threads, args=(snapshot_path, worker, 4096))
+        for worker in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    expected = {
+        f"{worker}-{thread}-{index}"
+        for worker in range(PROCESSES) for thread in range(THREADS) for index in range(RECORDS_PER_THREAD)
+    }
+    assert set(ResultJournal(snapshot_path).all()) == expected
+    with open(snapshot_path, encoding="utf-8") as f:
+        assert set(json.load(f)) == expected
+
+def test_torn_line_from_a_crashed_writer_is_skipped(snapshot_path):
+    journal = ResultJournal(snapshot_path)
+    journal.append(_result("before"))
+    segment = journal._segment_path(journal._segments()[-1])
+    with open(segment, "ab") as f:
+        f.write(b'\n{"query_id": "torn", "summ')
+    journal.append(_result("after"))
+
+    reader = ResultJournal(snapshot_path)
+    assert set(reader.all()) == {"before", "after"}
+    reader.compact()
+    assert set(ResultJournal(snapshot_path).all()) == {"before", "after"}
+
+def test_partial_trailing_line_is_read_once_complete(snapshot_path):
+    journal = ResultJournal(snapshot_path)
+    journal.append(_result("q1"))
+    reader = ResultJournal(snapshot_path)
+    assert set(reader.all()) == {"q1"}
+    segment = journal._segment_path(journal._segments()[-1])
+    line = json.dumps(_result("q2")).encode("utf-8")
+    with open(segment, "ab") as f:
+        f.write(b"\n" + line[:10])
+        f.flush()
+        assert set(reader.all()) == {"q1"}
+        f.write(line[10:] + b"\n")
+    assert set(reader.all()) == {"q1", "q2"}
+
+def test_compaction_between_snapshot_load_and_segment_listing(snapshot_path):
+    writer = ResultJournal(snapshot_path)
+    writer.append(_result("q1"))
+    reader = ResultJournal(snapshot_path)
+    list_segments = reader._segments
+
+    def compact_first(*args):
+        # Another worker compacts right after the reader loaded the (empty) snapshot
+        reader._segments = list_segments
+        assert writer.compact()
+        return list_segments()
+
+    reader._segments = compact_first
+    assert reader.get("q1") is not None
+
+def test_compaction_while_reading(snapshot_path):
+    writer = ResultJournal(snapshot_path, compact_bytes=2048)
+    reader = ResultJournal(snapshot_path)
+    acknowledged = []
+    missing = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            for query_id in list(acknowledged):
+                if reader.get(query_id) is None:
+                    missing.append(query_id)
+
+    def compact():
+        while not done.is_set():
+            writer.compact()
+
+    threads = [threading.Thread(target=read), threading.Thread(target=compact)]
+    for thread in threads:
+        thread.start()
+    try:
+        for index in range(300):
+            writer.append(_result(f"q{index}", size=100))
+            acknowledged.append(f"q{index}")
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+    assert missing == []
+    assert len(reader.all()) == 300
+
+def test_existing_snapshot_is_migrated(snapshot_path):
+    legacy = {"old1": _result("old1"), "old2": _result("old2")}
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+
+    journal = ResultJournal(snapshot_path)
+    assert journal.get("old1") == legacy["old1"]
+    journal.append(_result("new"))
+    assert journal.compact()
+    with open(snapshot_path, encoding="utf-8") as f:
+        assert set(json.load(f)) == {"old1", "old2", "new"}
+    assert journal._segments() == [journal._segments()[0]]
+    assert os.path.getsize(journal._segment_path(journal._segments()[0])) == 0
+    assert set(ResultJournal(snapshot_path).all()) == {"old1", "old2", "new"}
+
+def test_compaction_refuses_an_unreadable_snapshot(snapshot_path):
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    journal = ResultJournal(snapshot_path)
+    journal.append(_result("q1"))
+    with pytest.raises(json.JSONDecodeError):
+        journal.compact()
+    # The journal still holds the record
+    assert journal.get("q1") is not None
+    with open(snapshot_path, encoding="utf-8") as f:
+        assert f.read() == "{not json"
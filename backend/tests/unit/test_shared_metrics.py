@@ -0,0 +1,74 @@
+import multiprocessing
+import re
+
+from app.core.metrics import Counter, Gauge, Histogram, Registry
+from app.core.shared_files import ProcessLease
+from app.core.shared_metrics import SharedMetrics
+
+def _registry():
+    registry = Registry()
+    requests = registry.register(Counter("test_requests_total", "Requests.", ("status",)))
+    latency = registry.register(Histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+    startup = registry.register(Gauge("test_startup_seconds", "Startup.", ("phase",)))
+    return registry, requests, latency, startup
+
+def _worker(state_dir, metrics_dir, started, finish):
+    registry, requests, latency, startup = _registry()
+    lease = ProcessLease(f"{state_dir}/leases")
+    shared = SharedMetrics(metrics_dir, lease, registry)
+    requests.inc(3, status="200")
+    latency.observe(0.5)
+    startup.set(2.0, phase="import")
+    shared.start()
+    started.set()
+    finish.wait(30)
+    shared.stop()
+    lease.release()
+
+def _sample(text, name):
+    match = re.search(rf"^{re.escape(name)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_scrape_merges_workers_and_keeps_totals_of_exited_ones(tmp_path):
+    state_dir, metrics_dir = str(tmp_path), str(tmp_path / "metrics")
+    context = multiprocessing.get_context("fork")
+    started, finish = context.Event(), context.Event()
+    other = context.Process(target=_worker, args=(state_dir, metrics_dir, started, finish))
+    other.start()
+    assert started.wait(10)
+
+    registry, requests, latency, startup = _registry()
+    lease = ProcessLease(f"{state_dir}/leases")
+    shared = SharedMetrics(metrics_dir, lease, registry)
+    requests.inc(2, status="200")
+    latency.observe(0.05)
+    startup.set(1.0, phase="import")
+    try:
+        text = shared.render()
+        assert _sample(text, 'test_requests_total{status="200"}') == 5
+        assert _sample(text, 'test_latency_seconds_bucket{le="0.1"}') == 1
+        assert _sample(text, 'test_latency_seconds_count') == 2
+        assert len(re.findall(r'^test_startup_seconds\{phase="import",worker="[^"]+"\}', text, re.MULTILINE)) == 2
+
+        finish.set()
+        other.join(10)
+        requests.inc(status="200")
+        text = shared.render()
+        # The exited worker's counts stay in the totals; its gauges go
+        assert _sample(text, 'test_requests_total{status="200"}') == 6
+        assert _sample(text, 'test_latency_seconds_count') == 2
+        assert _sample(text, f'test_startup_seconds{{phase="import",worker="{lease.owner}"}}') == 1
+        assert len(re.findall(r"^test_startup_seconds\{", text, re.MULTILINE)) == 1
+        # Folded once, not again on the next scrape
+        assert _sample(shared.render(), 'test_requests_total{status="200"}') == 6
+    finally:
+        finish.set()
+        lease.release()
+
+def test_render_without_snapshots_is_this_process_only():
+    registry, requests, _, startup = _registry()
+    requests.inc(status="500")
+    startup.set(1.5, phase="import")
+    text = registry.render()
+    assert _sample(text, 'test_requests_total{status="500"}') == 1
+    assert _sample(text, 'test_startup_seconds{phase="import"}') == 1.5
@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from app.core.shared_files import ProcessLease
+from app.services import status_store
+from app.services.status_store import StatusStore
+
+TERMINAL = ("completed", "failed")
+
+def _hold_lease(directory, owners, release):
+    lease = ProcessLease(directory)
+    owners.send(lease.owner)
+    release.wait(30)
+
+def _crash_with_lease(directory, owners):
+    lease = ProcessLease(directory)
+    owners.send(lease.owner)
+    os._exit(1)
+
+@pytest.fixture
+def lease(tmp_path):
+    lease = ProcessLease(str(tmp_path / "leases"))
+    yield lease
+    lease.release()
+
+@pytest.fixture
+def store(tmp_path, lease):
+    return StatusStore(str(tmp_path / "jobs"), lease, terminal_statuses=TERMINAL, retention_seconds=60)
+
+def _other_process_lease(directory, target, *args):
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=target, args=(directory, sender) + args)
+    process.start()
+    assert receiver.poll(10)
+    return process, receiver.recv()
+
+def test_lease_held_while_owner_runs(tmp_path, lease):
+    directory = str(tmp_path / "leases")
+    release = multiprocessing.get_context("fork").Event()
+    process, owner = _other_process_lease(directory, _hold_lease, release)
+    try:
+        assert lease.is_held(owner)
+        assert lease.is_held(lease.owner)
+    finally:
+        release.set()
+        process.join(10)
+    assert not lease.is_held(owner)
+
+def test_lease_of_crashed_process_is_dropped(tmp_path, lease):
+    directory = str(tmp_path / "leases")
+    process, owner = _other_process_lease(directory, _crash_with_lease)
+    process.join(10)
+    assert process.exitcode == 1
+    assert not lease.is_held(owner)
+    # The stale lock file is cleaned up by the first check
+    assert not os.path.exists(os.path.join(directory, f"{owner}.lock"))
+
+def test_released_lease_is_not_held(tmp_path, lease):
+    other = ProcessLease(str(tmp_path / "leases"))
+    other.release()
+    assert not lease.is_held(other.owner)
+    assert not lease.is_held("no-such-owner")
+
+def test_put_records_owner_and_round_trips(store, lease):
+    store.put("job-1", {"status": "running", "stages": []})
+    record = store.get("job-1")
+    assert record == {"status": "running", "stages": [], "owner": lease.owner}
+    assert store.get("missing") is None
+
+def test_unsafe_keys_are_hashed(store):
+    store.put("../../etc/passwd", {"status": "running"})
+    assert store.get("../../etc/passwd")["status"] == "running"
+    assert not any(".." in name for name in os.listdir(store.directory))
+
+def test_update_merges_fields(store):
+    store.put("job-1", {"status": "running", "error": None})
+    assert store.update("job-1", status="failed", error="boom")["error"] == "boom"
+    assert store.get("job-1")["status"] == "failed"
+    assert store.update("missing", status="failed") is None
+
+def test_list_active_skips_finished_records(store):
+    store.put("a", {"status": "running"})
+    store.put("b", {"status": "queued"})
+    store.put("c", {"status": "completed"})
+    store.update("b", status="failed")
+    assert [record["status"] for record in store.list_active()] == ["running"]
+    assert len(store.list()) == 3
+
+def test_list_active_drops_stale_markers(store):
+    store.put("a", {"status": "running"})
+    # A writer that stopped between finishing the record and removing its marker
+    store.put("a", {"status": "completed"})
+    open(os.path.join(store.directory, "active", "a.json"), "a").close()
+    assert store.list_active() == []
+    assert os.listdir(os.path.join(store.directory, "active")) == []
+
+def test_owner_gone(tmp_path, store):
+    process, owner = _other_process_lease(str(tmp_path / "leases"), _crash_with_lease)
+    process.join(10)
+    store.put("orphan", {"status": "running", "owner": owner})
+    store.put("mine", {"status": "running"})
+    assert store.owner_gone(store.get("orphan"))
+    assert not store.owner_gone(store.get("mine"))
+
+def test_prune_deletes_only_expired_finished_records(store):
+    store.put("old-done", {"status": "completed"})
+    store.put("old-running", {"status": "running"})
+    store.put("new-done", {"status": "failed"})
+    store.put("pointer", {"ingestion_id": "x"})
+    expired = time.time() - 120
+    for key in ("old-done", "old-running", "pointer"):
+        os.utime(os.path.join(store.directory, f"{key}.json"), (expired, expired))
+
+    assert store.prune() == 1
+    assert store.get("old-done") is None
+    assert store.get("old-running") is not None
+    assert store.get("new-done") is not None
+    assert store.get("pointer") is not None
+
+def test_finishing_a_record_prunes_at_most_once_per_interval(store, monkeypatch):
+    calls = []
+    monkeypatch.setattr(store, "prune", lambda: calls.append(1))
+    store.put("a", {"status": "completed"})
+    store.put("b", {"status": "completed"})
+    assert len(calls) == 1
+    monkeypatch.setattr(status_store, "PRUNE_INTERVAL_SECONDS", 0)
+    store.put("c", {"status": "failed"})
+    assert len(calls) == 2
+
+def test_no_retention_keeps_everything(tmp_path, lease):
+    store = StatusStore(str(tmp_path / "keep"), lease, terminal_statuses=TERMINAL)
+    store.put("done", {"status": "completed"})
+    expired = time.time() - 10 ** 6
+    os.utime(os.path.join(store.directory, "done.json"), (expired, expired))
+    assert store.prune() == 0
+    assert store.get("done") is not None